@@ -17,6 +17,7 @@ from strategies.rsi_crossover import RSI_CrossoverStrategy
 from strategies.straddle_strangle import StraddleStrangleStrategy
 from strategies.breakout_strategy import BreakoutStrategy
 from backtest_engine.backtest_runner import BacktestRunner
+from backtest_engine.result_sink import JsonlResultSink, params_hash
 from utils.logger import setup_logging, get_logger
 
 # Load environment variables
@@ -49,6 +50,7 @@ end_time = config["backtesting"]["end_date"]
 
 active_strategy = config["trading"].get("active_strategy", None)
 strategies = config["trading"].get("strategies", {})
+risk_management = strategies.get("risk_management", {})  # Shared stop-loss / take-profit / trailing-stop defaults
 
 if not active_strategy or active_strategy not in strategies:
     raise ValueError(f"⚠️ Active strategy '{active_strategy}' not found in configuration.")
@@ -63,6 +65,8 @@ db_handler = DatabaseHandler(db_config)
 
 backtesting_symbols = config["backtesting"].get("symbols", ["NIFTY50"])
 timeframes = config["backtesting"].get("timeframes", ["1m", "5m", "15m", "1h", "1d"])
+max_workers = config["backtesting"].get("max_workers")  # Defaults to the number of CPU cores
+results_path = config["backtesting"].get("results_path", "backtest_results.jsonl")  # Delete to rerun everything
 
 symbol_table_mapping = {
     ("NIFTY50", "1m"): "nifty50_1m",
@@ -79,66 +83,100 @@ symbol_table_mapping = {
     ("SENSEX", "1d"): "sensex_1m",
 }
 
+def result_identity(job):
+    """The fields identifying a job's result: strategy, symbol, timeframe, date range and parameters."""
+    return {
+        "strategy": job["strategy_name"],
+        "symbol": job["symbol"],
+        "timeframe": job["timeframe"],
+        "start_date": str(job["start_date"]),
+        "end_date": str(job["end_date"]),
+        "params_hash": params_hash(job["strategy_params"]),
+    }
+
+
+def result_record(job, trades, performance):
+    """Builds the stored result of one backtest job."""
+    serializable_trades = []
+    for trade in trades:
+        serializable_trade = {
+            "symbol": trade["symbol"],
+            "timestamp": trade["timestamp"].isoformat() if isinstance(trade["timestamp"], pd.Timestamp) else str(trade["timestamp"]),
+            "action": trade["action"],
+            "price": trade["price"],
+            "quantity": trade["quantity"],
+            "commission": trade["commission"],
+            "profit": trade["profit"]
+        }
+        serializable_trades.append(serializable_trade)
+
+    return {
+        **result_identity(job),
+        "trades": serializable_trades,
+        "performance": performance
+    }
+
+
 async def run_backtest():
-    """Run backtest on historical data and store results in JSON."""
-    all_backtest_results = []
+    """Run backtest on historical data, streaming each result to the JSONL sink, and export JSON for the dashboards."""
+    result_sink = JsonlResultSink(results_path)
+    completed = result_sink.completed_keys()
     try:
+        jobs = []
         for strategy_name, strategy_params in strategies.items():
+            if strategy_name == "risk_management":
+                continue
             if strategy_name not in strategy_mapping:
                 logger.warning(f"⚠️ Strategy '{strategy_name}' is not recognized. Skipping...")
                 continue
 
-            strategy_class = strategy_mapping[strategy_name]
-            logger.info(f"Running strategy: {strategy_name}")
-
-            backtest_runner = BacktestRunner(strategy_class, strategy_params, db_handler)
-
             for symbol in backtesting_symbols:
                 for timeframe in timeframes:
                     table_name = symbol_table_mapping.get((symbol, timeframe))
-                    if table_name:
-                        logger.info(f"Backtesting {symbol} with timeframe {timeframe} using table '{table_name}'")
-                        trades, performance = await backtest_runner.run_backtest(
-                            symbols=[symbol],
-                            start_date=start_time,
-                            end_date=end_time,
-                            timeframe=timeframe,
-                            custom_table_name=table_name
-                        )
-
-                        if trades:
-                            serializable_trades = []
-                            for trade in trades:
-                                serializable_trade = {
-                                    "symbol": trade["symbol"],
-                                    "timestamp": trade["timestamp"].isoformat() if isinstance(trade["timestamp"], pd.Timestamp) else str(trade["timestamp"]),
-                                    "action": trade["action"],
-                                    "price": trade["price"],
-                                    "quantity": trade["quantity"],
-                                    "commission": trade["commission"],
-                                    "profit": trade["profit"]
-                                }
-                                serializable_trades.append(serializable_trade)
-
-                            all_backtest_results.append({
-                                "strategy": strategy_name,
-                                "symbol": symbol,
-                                "timeframe": timeframe,
-                                "trades": serializable_trades,
-                                "performance": performance
-                            })
-                        else:
-                            logger.warning(f"No trades generated for {strategy_name} on {symbol} with timeframe {timeframe}.")
-                    else:
+                    if not table_name:
                         logger.warning(f"No table mapping found for symbol '{symbol}' and timeframe '{timeframe}'. Skipping.")
+                        continue
+                    job = {
+                        "strategy_name": strategy_name,
+                        "strategy_class": strategy_mapping[strategy_name],
+                        "strategy_params": {"risk_management": risk_management, **strategy_params},
+                        "symbol": symbol,
+                        "timeframe": timeframe,
+                        "table_name": table_name,
+                        "start_date": start_time,
+                        "end_date": end_time
+                    }
+                    # Reused only for the same date range and parameters
+                    if JsonlResultSink.result_key(result_identity(job)) in completed:
+                        logger.info(f"Skipping {strategy_name} on {symbol} ({timeframe}): already in {results_path}.")
+                        continue
+                    jobs.append(job)
+
+        failed = []
+
+        def store_result(job, trades, performance, error=None):
+            # Failed jobs are not stored, so a rerun retries them; results without trades are stored
+            # too, so a rerun does not repeat them.
+            if error is not None:
+                failed.append(job)
+                return
+            if not trades:
+                logger.warning(f"No trades generated for {job['strategy_name']} on {job['symbol']} with timeframe {job['timeframe']}.")
+            result_sink.write(result_record(job, trades, performance))
+
+        # Every source table is fetched once; strategy runs are spread over all CPU cores and each
+        # result is persisted as soon as it finishes
+        await BacktestRunner.run_parallel(jobs, db_handler, max_workers=max_workers,
+                                          on_result=store_result, keep_trades=False)
+        if failed:
+            logger.error(f"{len(failed)} backtest jobs failed and were not stored; rerun to retry them.")
 
     finally:
+        result_sink.close()
         await db_handler.close()
 
-    with open("backtest_results.json", "w") as f:
-        json.dump(all_backtest_results, f, indent=4)
-
-    logger.info("Backtest results saved to backtest_results.json")
+    count = result_sink.export_json("backtest_results.json")
+    logger.info(f"Backtest results saved to backtest_results.json ({count} results from {results_path})")
 
 if __name__ == "__main__":
-    asyncio.run(run_backtest())
\ No newline at end of file
+    asyncio.run(run_backtest())
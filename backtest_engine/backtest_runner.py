@@ -1,5 +1,9 @@
 from backtest_engine.strategy_runner import StrategyRunner
 from backtest_engine.performance_analyzer import PerformanceAnalyzer
+from backtest_engine.parallel_executor import ParallelBacktestExecutor
+from backtest_engine.parameter_sweep import ParameterSweep
+from backtest_engine.walk_forward import WalkForwardOptimizer
+from backtest_engine.data_plan import BacktestDataPlan
 from utils.logger import get_logger  # Import get_logger
 
 logger = get_logger(__name__)  # Get logger for this module
@@ -18,9 +22,12 @@ class BacktestRunner:
         self.performance_analyzer = None
         self.trades = []
 
-    async def run_backtest(self, symbols=None, start_date=None, end_date=None, timeframe='1m', custom_table_name=None):
+    async def run_backtest(self, symbols=None, start_date=None, end_date=None, timeframe='1m', custom_table_name=None,
+                           data_plan=None):
         """
         Runs the backtest for the specified strategy on the given symbols and date range.
+
+        If a fetched `BacktestDataPlan` is given, historical data is taken from it instead of the database.
         """
         if symbols is None:
             symbols = ["NIFTY50"]
@@ -32,6 +39,7 @@ class BacktestRunner:
         slippage = backtest_config.get("slippage", 0.0)
         commission = backtest_config.get("commission", 0.0)
         initial_capital = backtest_config.get("initial_capital", 1000000)
+        allow_short = backtest_config.get("allow_short", False)
 
         if not start_date or not end_date:
             logger.error("Start and end dates for backtesting are not configured.")
@@ -39,23 +47,33 @@ class BacktestRunner:
 
         all_trades = []
         all_performance = {}
+        equity_curves = []
 
         for symbol in symbols:
             logger.info(f"Backtesting strategy '{self.strategy_class.__name__}' on {symbol} from {start_date} to {end_date} ({timeframe})...")
 
-            strategy_runner = StrategyRunner(self.strategy_class, self.strategy_params, self.db_handler, initial_capital=initial_capital)
-            trades, performance = await strategy_runner.run(symbol, start_date, end_date, timeframe, slippage, commission, custom_table_name=custom_table_name)
+            strategy_runner = StrategyRunner(self.strategy_class, self.strategy_params, self.db_handler,
+                                             initial_capital=initial_capital, allow_short=allow_short)
+            historical_data = None
+            if data_plan is not None and custom_table_name:
+                historical_data = data_plan.get_frame(custom_table_name, start_date, end_date, timeframe)
+            trades, performance = await strategy_runner.run(symbol, start_date, end_date, timeframe, slippage, commission,
+                                                            custom_table_name=custom_table_name,
+                                                            historical_data=historical_data)
 
             if trades:
                 all_trades.extend(trades)
                 all_performance[symbol] = performance
+                equity_curves.append(strategy_runner.equity_curve)
                 logger.info(f"Completed backtest for {symbol}. Total trades: {len(trades)}")
             else:
                 logger.warning(f"No trades generated for {self.strategy_class.__name__} on {symbol}.")
 
         if all_trades:
             self.trades = all_trades
-            self.performance_analyzer = PerformanceAnalyzer(self.trades)
+            # Bar-level equity metrics need a single account curve, i.e. a single symbol.
+            equity = equity_curves[0] if len(equity_curves) == 1 else None
+            self.performance_analyzer = PerformanceAnalyzer(self.trades, equity_curve=equity)
             overall_performance = self.performance_analyzer.analyze()
             logger.info(f"Overall Backtesting Performance for '{self.strategy_class.__name__}':\n{overall_performance}")
             for symbol, perf in all_performance.items():
@@ -63,4 +81,116 @@ class BacktestRunner:
         else:
             logger.info("No trades were generated during the backtest.")
 
-        return all_trades, all_performance  # Always return a tuple
\ No newline at end of file
+        return all_trades, all_performance  # Always return a tuple
+
+    @staticmethod
+    async def run_parallel(jobs, db_handler, max_workers=None, data_plan=None, on_result=None, keep_trades=True):
+        """
+        Runs many (strategy, symbol, timeframe) backtest jobs in parallel worker processes.
+
+        See `ParallelBacktestExecutor.run` for the job format and the `on_result` / `keep_trades` options.
+
+        Returns:
+            list: One (job, trades, performance) tuple per job, in the order of `jobs` (performance is
+                  None for failed jobs).
+        """
+        executor = ParallelBacktestExecutor(db_handler, max_workers=max_workers)
+        return await executor.run(jobs, data_plan=data_plan, on_result=on_result, keep_trades=keep_trades)
+
+    async def run_sweep(self, param_grid, symbol, table_name, start_date=None, end_date=None, timeframe='1m',
+                        constraint=None, rank_by="total_profit", batch_size=100, max_workers=1, data_plan=None):
+        """
+        Backtests every combination of `param_grid` for this strategy and returns a ranked results table.
+
+        The data is fetched once and every distinct indicator series is computed once for the whole grid.
+        `self.strategy_params` provides the values of parameters that are not swept.
+
+        Args:
+            param_grid (dict): Parameter name -> values to try (lists, ranges or {start, stop, step}).
+            symbol (str): The trading symbol.
+            table_name (str): The source table (e.g. 'nifty50_1m').
+            start_date (str, optional): Start date; defaults to the backtesting config.
+            end_date (str, optional): End date; defaults to the backtesting config.
+            timeframe (str, optional): The timeframe to backtest. Defaults to '1m'.
+            constraint (callable, optional): Predicate to skip invalid combinations.
+            rank_by (str, optional): Performance metric to rank by. Defaults to 'total_profit'.
+            batch_size (int, optional): Combinations per batch. Defaults to 100.
+            max_workers (int, optional): Worker processes (None = all cores). Defaults to 1.
+            data_plan (BacktestDataPlan, optional): A plan to reuse for the data.
+
+        Returns:
+            pd.DataFrame: Ranked results, one row per parameter combination.
+        """
+        backtest_config = self.db_handler.config.get("backtesting", {})
+        start_date = start_date or backtest_config.get("start_date")
+        end_date = end_date or backtest_config.get("end_date")
+
+        data_plan = data_plan or BacktestDataPlan(self.db_handler)
+        data_plan.add_job(table_name, start_date, end_date, timeframe)
+        await data_plan.fetch()
+        historical_data = data_plan.get_frame(table_name, start_date, end_date, timeframe)
+
+        sweep = ParameterSweep(self.strategy_class, param_grid, base_params=self.strategy_params, constraint=constraint)
+        results = sweep.run(
+            historical_data, symbol,
+            slippage=backtest_config.get("slippage", 0.0),
+            commission=backtest_config.get("commission", 0.0),
+            initial_capital=backtest_config.get("initial_capital", 1000000),
+            allow_short=backtest_config.get("allow_short", False),
+            rank_by=rank_by, batch_size=batch_size, max_workers=max_workers
+        )
+        if not results.empty:
+            logger.info(f"Best parameters for '{self.strategy_class.__name__}' on {symbol} ({timeframe}):\n{results.head(1).to_dict('records')}")
+        return results
+
+    async def run_walk_forward(self, param_grid, symbol, table_name, train_period, test_period, step=None,
+                               anchored=False, start_date=None, end_date=None, timeframe='1m', constraint=None,
+                               rank_by="total_profit", max_workers=None, data_plan=None):
+        """
+        Runs a walk-forward optimization of this strategy: optimize `param_grid` on each training window
+        and evaluate the chosen parameters on the following test window.
+
+        The data is fetched once for the whole range; windows are slices of it and share its indicator series.
+
+        Args:
+            param_grid (dict): Parameter name -> values to try (lists, ranges or {start, stop, step}).
+            symbol (str): The trading symbol.
+            table_name (str): The source table (e.g. 'nifty50_1m').
+            train_period (str): Length of each training window (e.g. '180D').
+            test_period (str): Length of each test window (e.g. '30D').
+            step (str, optional): How far windows roll forward. Defaults to `test_period`.
+            anchored (bool, optional): Use expanding (anchored) training windows. Defaults to False.
+            start_date (str, optional): Start date; defaults to the backtesting config.
+            end_date (str, optional): End date; defaults to the backtesting config.
+            timeframe (str, optional): The timeframe to backtest. Defaults to '1m'.
+            constraint (callable, optional): Predicate to skip invalid combinations.
+            rank_by (str, optional): In-sample metric used to pick the parameters. Defaults to 'total_profit'.
+            max_workers (int, optional): Worker processes (None = all cores).
+            data_plan (BacktestDataPlan, optional): A plan to reuse for the data.
+
+        Returns:
+            pd.DataFrame: One row per window with the chosen parameters and out-of-sample performance.
+        """
+        backtest_config = self.db_handler.config.get("backtesting", {})
+        start_date = start_date or backtest_config.get("start_date")
+        end_date = end_date or backtest_config.get("end_date")
+
+        data_plan = data_plan or BacktestDataPlan(self.db_handler)
+        data_plan.add_job(table_name, start_date, end_date, timeframe)
+        await data_plan.fetch()
+        historical_data = data_plan.get_frame(table_name, start_date, end_date, timeframe)
+
+        optimizer = WalkForwardOptimizer(self.strategy_class, param_grid, base_params=self.strategy_params,
+                                         constraint=constraint, rank_by=rank_by)
+        results = optimizer.run(
+            historical_data, symbol, train_period, test_period, step=step, anchored=anchored,
+            slippage=backtest_config.get("slippage", 0.0),
+            commission=backtest_config.get("commission", 0.0),
+            initial_capital=backtest_config.get("initial_capital", 1000000),
+            allow_short=backtest_config.get("allow_short", False),
+            max_workers=max_workers
+        )
+        if not results.empty and "out_of_sample_total_profit" in results.columns:
+            logger.info(f"Walk-forward out-of-sample profit for '{self.strategy_class.__name__}' on {symbol} "
+                        f"({timeframe}) over {len(results)} windows: {results['out_of_sample_total_profit'].sum()}")
+        return results
@@ -0,0 +1,309 @@
+import asyncio
+import pandas as pd
+from database.parquet_mirror import to_utc
+from database.resample_manager import SESSION_ORIGIN
+from utils.timestamp_utils import to_ist_naive
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Resampling rules for the timeframes derived from 1-minute data
+TIMEFRAME_RULES = {
+    '5m': '5min',
+    '15m': '15min',
+    '1h': '1h',
+    '1d': '24h',  # Fixed width, so pandas applies the 09:15 origin like date_bin('1 day', ...)
+}
+
+# Bars are aligned to the 09:15 session open like the SQL buckets, so a 1h bar covers 09:15-10:14
+BAR_ORIGIN = pd.Timestamp(SESSION_ORIGIN)
+
+OHLCV_AGGREGATION = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+# Rows per chunk when streaming 1-minute data
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def _to_ist(chunk):
+    """
+    Converts a chunk's timestamps to timezone-naive Asia/Kolkata.
+
+    Naive timestamps are IST wall time already (as ingested) and are kept; timestamptz values are
+    converted from their instant.
+    """
+    chunk['timestamp'] = to_ist_naive(chunk['timestamp'])
+    return chunk
+
+
+def _bar_start(timestamp, rule):
+    """Start of the session-aligned bar of a timeframe rule that contains a timestamp."""
+    width = pd.Timedelta(rule)
+    return BAR_ORIGIN + ((timestamp - BAR_ORIGIN) // width) * width
+
+
+async def _query_chunks(db_handler, query, chunk_size):
+    """Yields a query's rows in chunks, or as one columnar frame when `chunk_size` is None."""
+    if chunk_size is None:
+        yield await db_handler.fetch_frame(query)
+    else:
+        async for chunk in db_handler.stream_query(query, chunk_size=chunk_size):
+            yield chunk
+
+
+async def stream_1m_frames(db_handler, table_name, start_date, end_date, schema='fno', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streams raw 1-minute OHLC rows for a table in chunks, with timestamps converted to Asia/Kolkata.
+
+    Database rows are read through a server-side cursor (`DatabaseHandler.stream_query`), so at most
+    one chunk is held in memory. When the handler has a Parquet mirror of the table
+    (`db_handler.parquet_mirror`), rows up to the mirror's watermark are read locally and only newer
+    rows are queried from the database. If that query fails (e.g. the database is down), the
+    mirrored rows are used on their own.
+
+    Args:
+        db_handler (DatabaseHandler): An instance of the database handler.
+        table_name (str): The table to read from (without schema).
+        start_date (str): The start date for historical data.
+        end_date (str): The end date for historical data.
+        schema (str, optional): The schema the table lives in. Defaults to 'fno'.
+        chunk_size (int, optional): Maximum rows per chunk. Defaults to 100000. None reads everything
+                                    as one chunk through the columnar `DatabaseHandler.fetch_frame`.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks with a 'timestamp' column (Asia/Kolkata, timezone-naive) and OHLCV columns.
+    """
+    full_table_name = f"{schema}.{table_name}"
+    mirror = getattr(db_handler, "parquet_mirror", None)
+    watermark = mirror.watermark(table_name, schema) if mirror is not None else None
+
+    if watermark is not None:
+        for chunk in mirror.read_batches(table_name, start_date, end_date, schema, batch_size=chunk_size):
+            yield _to_ist(chunk)
+        if watermark < to_utc(end_date):
+            try:
+                tail_start = max(watermark, to_utc(start_date) - pd.Timedelta(microseconds=1))
+                query = f"SELECT timestamp, open, high, low, close, volume FROM {full_table_name} WHERE timestamp > '{mirror.sql_timestamp(db_handler, tail_start)}' AND timestamp <= '{end_date}' ORDER BY timestamp ASC"
+                async for chunk in _query_chunks(db_handler, query, chunk_size):
+                    yield _to_ist(chunk)
+            except Exception as e:
+                logger.warning(f"Using the Parquet mirror of {full_table_name} up to {watermark} only: {e}")
+    else:
+        query = f"SELECT timestamp, open, high, low, close, volume FROM {full_table_name} WHERE timestamp >= '{start_date}' AND timestamp <= '{end_date}' ORDER BY timestamp ASC"
+        async for chunk in _query_chunks(db_handler, query, chunk_size):
+            yield _to_ist(chunk)
+
+
+async def fetch_1m_frame(db_handler, table_name, start_date, end_date, schema='fno'):
+    """
+    Fetches raw 1-minute OHLC rows for a table and converts the timestamps to Asia/Kolkata.
+
+    The rows are read with `stream_1m_frames` as one chunk: mirrored rows are memory-mapped and
+    database rows are decoded column-wise by `DatabaseHandler.fetch_frame`, so no per-row Python
+    objects are built.
+
+    Args:
+        db_handler (DatabaseHandler): An instance of the database handler.
+        table_name (str): The table to read from (without schema).
+        start_date (str): The start date for historical data.
+        end_date (str): The end date for historical data.
+        schema (str, optional): The schema the table lives in. Defaults to 'fno'.
+
+    Returns:
+        pd.DataFrame: Rows with a 'timestamp' column (Asia/Kolkata, timezone-naive) and OHLCV columns.
+                      Returns an empty DataFrame if no data is found.
+    """
+    chunks = [chunk async for chunk in stream_1m_frames(db_handler, table_name, start_date, end_date, schema, chunk_size=None)]
+    chunks = [chunk for chunk in chunks if not chunk.empty]
+    if not chunks:
+        logger.info(f"No historical data found between {start_date} and {end_date} using table '{schema}.{table_name}'.")
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def resample_timeframe(df, timeframe='1m'):
+    """
+    Derives a timeframe from a raw 1-minute frame returned by `fetch_1m_frame`.
+
+    Bars are aligned to the 09:15 session open (`BAR_ORIGIN`) and only bars with rows are returned,
+    matching the SQL buckets of `database.resample_manager`. The input frame is not modified, so the
+    same 1-minute frame can be resampled to several timeframes.
+
+    Args:
+        df (pd.DataFrame): Raw 1-minute data with a 'timestamp' column.
+        timeframe (str, optional): The target timeframe (e.g., '1m', '5m', '1d'). Defaults to '1m'.
+
+    Returns:
+        pd.DataFrame: OHLCV data indexed by timestamp.
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    if timeframe == '1m':
+        df = df.copy()
+    elif timeframe in TIMEFRAME_RULES:
+        resampler = df.set_index('timestamp').resample(TIMEFRAME_RULES[timeframe], origin=BAR_ORIGIN)
+        df = resampler.agg(OHLCV_AGGREGATION)[resampler.size() > 0]
+    else:
+        df = df.set_index('timestamp')
+        df.index = pd.to_datetime(df.index)
+
+    df.reset_index(inplace=True)
+    df.set_index('timestamp', inplace=True)
+    return df
+
+
+class StreamingResampler:
+    """
+    Resamples a stream of consecutive 1-minute chunks with bounded memory.
+
+    Each chunk is resampled as it arrives; the rows of the last, possibly incomplete bar are held
+    back and prepended to the next chunk, so the concatenated output equals `resample_timeframe`
+    applied to the whole range. Only the open bar is carried between chunks.
+    """
+    def __init__(self, timeframe='1m'):
+        """
+        Initializes the resampler.
+
+        Args:
+            timeframe (str, optional): The target timeframe (e.g., '1m', '5m', '1d'). Defaults to '1m'.
+        """
+        self.timeframe = timeframe
+        self.rule = TIMEFRAME_RULES.get(timeframe)
+        self._pending = None  # Rows of the bar still open at the end of the last chunk
+
+    def update(self, chunk):
+        """
+        Adds the next 1-minute chunk and returns the bars it completes.
+
+        Args:
+            chunk (pd.DataFrame): Raw 1-minute rows with a 'timestamp' column, later than any previous chunk.
+
+        Returns:
+            pd.DataFrame: Completed OHLCV bars indexed by timestamp (possibly empty).
+        """
+        if self.rule is None:
+            return resample_timeframe(chunk, self.timeframe)
+        if self._pending is not None:
+            chunk = pd.concat([self._pending, chunk], ignore_index=True)
+        if chunk.empty:
+            return pd.DataFrame()
+
+        timestamps = pd.to_datetime(chunk['timestamp'])
+        open_bar_start = _bar_start(timestamps.iloc[-1], self.rule)
+        complete = (timestamps < open_bar_start).to_numpy()
+        self._pending = chunk[~complete].reset_index(drop=True)
+        return resample_timeframe(chunk[complete], self.timeframe)
+
+    def flush(self):
+        """
+        Returns the last, still open bar (call once the stream is exhausted).
+        """
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return pd.DataFrame()
+        return resample_timeframe(pending, self.timeframe)
+
+
+async def resample_stream(chunks, timeframe='1m'):
+    """
+    Resamples an async stream of 1-minute chunks (e.g. from `stream_1m_frames`) chunk by chunk.
+
+    Yields:
+        pd.DataFrame: Consecutive non-empty OHLCV frames indexed by timestamp.
+    """
+    resampler = StreamingResampler(timeframe)
+    async for chunk in chunks:
+        bars = resampler.update(chunk)
+        if not bars.empty:
+            yield bars
+    bars = resampler.flush()
+    if not bars.empty:
+        yield bars
+
+
+async def with_warmup(chunks, warmup):
+    """
+    Prefixes every chunk with the last `warmup` rows of the previous one.
+
+    Indicators with a bounded lookback (moving averages, RSI, ATR, ...) can then be computed chunk by
+    chunk: values on the first `warmup` rows of each chunk after the first are context only and
+    should be dropped (their count is yielded alongside the chunk).
+
+    Yields:
+        tuple: (chunk with warmup rows prepended, number of warmup rows).
+    """
+    tail = None
+    async for chunk in chunks:
+        if tail is None or tail.empty:
+            yield chunk, 0
+        else:
+            yield pd.concat([tail, chunk]), len(tail)
+        tail = chunk.iloc[-warmup:] if warmup else None
+
+
+class BacktestDataPlan:
+    """
+    Run-level data plan that fetches every (table, date range) once and resamples it once per timeframe.
+
+    Backtest jobs that read the same 1-minute table over the same range share one database query;
+    every derived timeframe is computed once from the in-memory 1-minute frame and the resulting
+    frames are handed to every strategy. Frames returned by `get_frame` are shared between
+    strategies and must be treated as read-only (`StrategyRunner` copies before applying a strategy).
+    """
+    def __init__(self, db_handler):
+        """
+        Initializes the data plan.
+
+        Args:
+            db_handler (DatabaseHandler): An instance of the database handler.
+        """
+        self.db_handler = db_handler
+        self._timeframes = {}  # (table, start_date, end_date) -> set of timeframes
+        self._raw_frames = {}  # (table, start_date, end_date) -> raw 1-minute frame
+        self._frames = {}  # (table, start_date, end_date, timeframe) -> resampled frame
+
+    def add_job(self, table_name, start_date, end_date, timeframe='1m'):
+        """
+        Registers a (table, date range, timeframe) combination that a backtest will need.
+        """
+        self._timeframes.setdefault((table_name, start_date, end_date), set()).add(timeframe)
+
+    @property
+    def sources(self):
+        """Distinct (table, start_date, end_date) ranges the plan needs to fetch."""
+        return list(self._timeframes)
+
+    async def fetch(self):
+        """
+        Fetches every distinct source range once and derives all registered timeframes from it.
+
+        The source ranges are fetched concurrently; the database pool bounds the actual parallelism.
+        """
+        pending = [source for source in self.sources if source not in self._raw_frames]
+        await asyncio.gather(*(self._fetch_source(source) for source in pending))
+
+    async def _fetch_source(self, source):
+        table_name, start_date, end_date = source
+        logger.info(f"Fetching {table_name} from {start_date} to {end_date} for timeframes {sorted(self._timeframes[source])}")
+        try:
+            self._raw_frames[source] = await fetch_1m_frame(self.db_handler, table_name, start_date, end_date)
+        except Exception as e:
+            logger.error(f"Error fetching historical data from {table_name}: {e}")
+            self._raw_frames[source] = pd.DataFrame()
+        self._resample_source(source)
+
+    def _resample_source(self, source):
+        raw = self._raw_frames[source]
+        for timeframe in self._timeframes[source]:
+            self._frames[source + (timeframe,)] = resample_timeframe(raw, timeframe)
+
+    def get_frame(self, table_name, start_date, end_date, timeframe='1m'):
+        """
+        Returns the prepared frame for a registered job, or None if it was not part of the plan.
+        """
+        key = (table_name, start_date, end_date, timeframe)
+        if key not in self._frames and (table_name, start_date, end_date) in self._raw_frames:
+            self.add_job(table_name, start_date, end_date, timeframe)
+            self._frames[key] = resample_timeframe(self._raw_frames[(table_name, start_date, end_date)], timeframe)
+        return self._frames.get(key)
@@ -0,0 +1,214 @@
+"""
+Timeframe-Aware Data Source Routing for Backtests
+
+Resampling raw 1-minute rows client-side transfers far more rows than a coarse timeframe needs
+(375 per daily bar). `DataRouter` serves a (1-minute table, timeframe) request from the cheapest
+valid source, in this order:
+
+1. 'table'    - a pre-aggregated table (or view / continuous aggregate) of exactly that timeframe
+                maintained by `database.resample_manager`, e.g. `fno.nifty50_1h` (5m/15m/1h);
+2. 'pushdown' - SQL bucketing (`time_bucket` / `date_bin`, see `resample_manager.aggregate_select`)
+                of the coarsest existing table whose bars divide the timeframe, e.g. 1h from the
+                15m table;
+3. 'client'   - streaming the raw 1-minute rows and resampling them with `resample_stream`.
+
+Pushdown needs PostgreSQL / TimescaleDB; other databases always use the client path. SQL buckets
+are aligned to the 09:15 IST session open like the pre-aggregated tables and client-side
+resampling, and naive timestamps are IST wall time on every path, so all three return the same
+bars (`check_paths` verifies this for a range). Every fetch logs the path and source it used.
+"""
+
+import pandas as pd
+from backtest_engine.data_plan import _to_ist, fetch_1m_frame, resample_stream, stream_1m_frames
+from database.resample_manager import TIMEFRAMES as RESAMPLED_TIMEFRAMES, aggregate_select, session_origin
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Bar width in minutes of every timeframe a table can hold, finest first
+TIMEFRAME_MINUTES = {
+    '1m': 1,
+    '5m': 5,
+    '15m': 15,
+    '1h': 60,
+    '1d': 1440,
+}
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# SQL interval of each timeframe for pushdown
+TIMEFRAME_INTERVALS = {
+    '5m': '5 minutes',
+    '15m': '15 minutes',
+    '1h': '1 hour',
+    '1d': '1 day',
+}
+
+
+class DataRouter:
+    """
+    Picks and reads the cheapest source for a timeframe of a 1-minute table.
+    """
+    def __init__(self, db_handler, schema='fno'):
+        """
+        Initializes the router.
+
+        Args:
+            db_handler (DatabaseHandler): An instance of the database handler.
+            schema (str, optional): The schema the tables live in. Defaults to 'fno'.
+        """
+        self.db_handler = db_handler
+        self.schema = schema
+        self._tables = None  # Lower-cased table name -> actual table name
+        self._timezone_aware = {}  # Table -> whether its timestamps are timestamptz
+        self._timescaledb = False
+
+    @property
+    def db_type(self):
+        return getattr(self.db_handler, "db_type", None)
+
+    @property
+    def supports_pushdown(self):
+        return self.db_type == "timescaledb"
+
+    async def _load_catalog(self):
+        """Lists the schema's tables and views (and the timestamp types) once."""
+        if self._tables is not None:
+            return
+        self._tables = {}
+        if self.db_type not in ("timescaledb", "mysql"):
+            return
+        schema_filter = "table_schema = DATABASE()" if self.db_type == "mysql" else f"table_schema = '{self.schema}'"
+        rows = await self.db_handler.execute_query(
+            f"SELECT table_name FROM information_schema.tables WHERE {schema_filter}")
+        self._tables = {row[0].lower(): row[0] for row in rows or []}
+        if self.supports_pushdown:
+            rows = await self.db_handler.execute_query(
+                f"SELECT table_name, data_type FROM information_schema.columns "
+                f"WHERE table_schema = '{self.schema}' AND column_name = 'timestamp'")
+            self._timezone_aware = {row[0]: "with time zone" in row[1] for row in rows or []}
+            rows = await self.db_handler.execute_query(
+                "SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+            self._timescaledb = bool(rows)
+
+    def _sibling(self, table_name, timeframe):
+        """
+        The existing session-aligned table holding `timeframe` bars of the same symbol, or None.
+
+        Only the tables built by `ResampleManager` qualify: the daily `*_1d` tables loaded by
+        `update_tables_1D` hold the broker's day bars stamped in UTC, not 09:15 IST session bars.
+        """
+        base = table_name[:-len('_1m')] if table_name.lower().endswith('_1m') else None
+        if base is None or timeframe not in RESAMPLED_TIMEFRAMES:
+            return None
+        return self._tables.get(f"{base}_{timeframe}".lower())
+
+    async def route(self, table_name, timeframe):
+        """
+        Chooses the source for a timeframe.
+
+        Args:
+            table_name (str): The 1-minute table (without schema), e.g. 'nifty50_1m'.
+            timeframe (str): The requested timeframe (e.g. '5m', '1h', '1d').
+
+        Returns:
+            tuple: (path, source table) with path 'table', 'pushdown' or 'client'.
+        """
+        await self._load_catalog()
+        minutes = TIMEFRAME_MINUTES.get(timeframe)
+        if minutes is None or timeframe == '1m':
+            return 'client', table_name
+
+        exact = self._sibling(table_name, timeframe)
+        if exact is not None:
+            return 'table', exact
+
+        if self.supports_pushdown and timeframe in TIMEFRAME_INTERVALS:
+            finer = [tf for tf, width in TIMEFRAME_MINUTES.items() if width < minutes and minutes % width == 0]
+            for candidate in reversed(finer):
+                source = table_name if candidate == '1m' else self._sibling(table_name, candidate)
+                if source is not None:
+                    return 'pushdown', source
+        return 'client', table_name
+
+    async def fetch(self, table_name, start_date, end_date, timeframe='1m'):
+        """
+        Fetches OHLCV bars of a timeframe through the chosen path.
+
+        Args:
+            table_name (str): The 1-minute table (without schema), e.g. 'nifty50_1m'.
+            start_date (str): The start date for historical data.
+            end_date (str): The end date for historical data.
+            timeframe (str, optional): The requested timeframe. Defaults to '1m'.
+
+        Returns:
+            pd.DataFrame: OHLCV data indexed by timestamp (Asia/Kolkata, timezone-naive).
+        """
+        path, source = await self.route(table_name, timeframe)
+        logger.info(f"📡 {self.schema}.{table_name} {timeframe} from {start_date} to {end_date}: "
+                    f"{path} path via {self.schema}.{source}")
+        return await self._fetch_path(path, source, table_name, start_date, end_date, timeframe)
+
+    async def _fetch_path(self, path, source, table_name, start_date, end_date, timeframe):
+        """Reads the bars of a timeframe through one path."""
+        if path == 'table' or timeframe == '1m':
+            df = await fetch_1m_frame(self.db_handler, source, start_date, end_date, self.schema)
+            return df.set_index('timestamp') if not df.empty else df
+
+        if path == 'pushdown':
+            bucket = f"'{TIMEFRAME_INTERVALS[timeframe]}'::interval"
+            origin = session_origin(self._timezone_aware.get(source, False))
+            condition = f"WHERE timestamp >= '{start_date}' AND timestamp <= '{end_date}'"
+            query = aggregate_select(f"{self.schema}.{source}", bucket, origin, self._timescaledb, condition)
+            df = await self.db_handler.fetch_frame(query)
+            if df.empty:
+                return pd.DataFrame()
+            return _to_ist(df).set_index('timestamp')
+
+        # Resampled chunk by chunk, so the raw 1-minute range is never held in memory at once
+        chunks = stream_1m_frames(self.db_handler, table_name, start_date, end_date, self.schema)
+        bars = [frame async for frame in resample_stream(chunks, timeframe)]
+        return pd.concat(bars) if bars else pd.DataFrame()
+
+    async def check_paths(self, table_name, start_date, end_date, timeframe):
+        """
+        Checks that every available path returns the same bars as client-side resampling.
+
+        Use whole days as the range: the 'table' path filters on bar start times, so a range ending
+        inside a bar keeps that bar whole while the other paths cut it short.
+
+        Args:
+            table_name (str): The 1-minute table (without schema), e.g. 'nifty50_1m'.
+            start_date (str): The start date of the range.
+            end_date (str): The end date of the range.
+            timeframe (str): The timeframe to compare (e.g. '5m', '1h', '1d').
+
+        Returns:
+            dict: Path -> whether its bars equal the client path's ('client' is the reference).
+        """
+        await self._load_catalog()
+        sources = {'client': table_name}
+        exact = self._sibling(table_name, timeframe)
+        if exact is not None:
+            sources['table'] = exact
+        if self.supports_pushdown and timeframe in TIMEFRAME_INTERVALS:
+            sources['pushdown'] = table_name
+
+        expected = await self._fetch_path('client', table_name, table_name, start_date, end_date, timeframe)
+        results = {'client': True}
+        for path, source in sources.items():
+            if path == 'client':
+                continue
+            bars = await self._fetch_path(path, source, table_name, start_date, end_date, timeframe)
+            if bars.empty and expected.empty:
+                results[path] = True
+                continue
+            try:
+                pd.testing.assert_frame_equal(bars[OHLCV_COLUMNS].astype('float64'),
+                                              expected[OHLCV_COLUMNS].astype('float64'), check_freq=False)
+                results[path] = True
+            except (AssertionError, KeyError) as e:
+                logger.warning(f"⚠️ {self.schema}.{table_name} {timeframe}: {path} path via "
+                               f"{self.schema}.{source} differs from client resampling: {e}")
+                results[path] = False
+        return results
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def periods_per_year(index, trading_days=TRADING_DAYS_PER_YEAR):
+    """
+    Estimates how many bars of the given index make up one trading year.
+
+    Intraday data counts the average number of bars per trading day; daily (or coarser) data uses
+    the average spacing between bars in trading days.
+
+    Args:
+        index (pd.DatetimeIndex): Sorted bar timestamps.
+        trading_days (int, optional): Trading days per year. Defaults to 252.
+
+    Returns:
+        float: Bars per year, or `trading_days` if it cannot be estimated.
+    """
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return float(trading_days)
+    days = index.values.astype('datetime64[D]')
+    num_days = int(np.count_nonzero(days[1:] != days[:-1])) + 1
+    if num_days < len(index):
+        return len(index) / num_days * trading_days
+    span_days = (days[-1] - days[0]).astype(np.int64)
+    if span_days <= 0:
+        return float(trading_days)
+    # Calendar spacing -> trading-day spacing (5 trading days per 7 calendar days)
+    spacing = span_days / (len(index) - 1) * 5 / 7
+    return trading_days / max(spacing, 1.0)
+
+
+def drawdown_stats(equity):
+    """
+    Drawdown statistics of an equity curve (or cumulative profit series).
+
+    Args:
+        equity (array-like): Equity after every bar or trade.
+
+    Returns:
+        dict: Numeric metrics:
+            - 'max_drawdown': Largest fall from a running peak, in currency.
+            - 'max_drawdown_pct': Largest fall relative to the running peak (0.1 = 10%); NaN if the
+              peak is not positive.
+            - 'max_drawdown_duration': Longest stretch below a previous peak, in bars.
+            - 'time_to_recovery': Bars from the trough of the maximum drawdown back to its peak;
+              NaN if the curve has not recovered.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) == 0:
+        return {
+            'max_drawdown': 0.0,
+            'max_drawdown_pct': 0.0,
+            'max_drawdown_duration': 0,
+            'time_to_recovery': 0.0,
+        }
+
+    peak = np.fmax.accumulate(equity)
+    drawdown = peak - equity
+    drawdown = np.where(np.isnan(drawdown), 0.0, drawdown)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown_pct = np.where(peak > 0, drawdown / peak, np.nan)
+
+    # Position of the most recent peak for every bar; the distance to it is the time under water.
+    positions = np.arange(len(equity))
+    last_peak = np.maximum.accumulate(np.where(drawdown > 0, 0, positions))
+    underwater = positions - last_peak
+
+    trough = int(np.argmax(drawdown))
+    recovered = np.flatnonzero(equity[trough:] >= peak[trough])
+    time_to_recovery = float(recovered[0]) if len(recovered) else np.nan
+
+    return {
+        'max_drawdown': float(drawdown[trough]),
+        'max_drawdown_pct': float(np.nanmax(drawdown_pct)) if not np.isnan(drawdown_pct).all() else np.nan,
+        'max_drawdown_duration': int(underwater.max()),
+        'time_to_recovery': time_to_recovery,
+    }
+
+
+def bar_returns(equity):
+    """Simple returns between consecutive bars of an equity curve."""
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) < 2:
+        return np.empty(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(equity) / equity[:-1]
+    return returns[np.isfinite(returns)]
+
+
+def risk_ratios(equity, periods_per_year=TRADING_DAYS_PER_YEAR, risk_free_rate=0.0, max_drawdown_pct=None):
+    """
+    Annualized return and risk-adjusted ratios of a bar-level equity curve.
+
+    Args:
+        equity (array-like): Equity after every bar.
+        periods_per_year (float, optional): Bars per year (see `periods_per_year`). Defaults to 252.
+        risk_free_rate (float, optional): Annual risk-free rate. Defaults to 0.0.
+        max_drawdown_pct (float, optional): Precomputed maximum drawdown for the Calmar ratio.
+
+    Returns:
+        dict: 'total_return', 'annualized_return', 'annualized_volatility', 'sharpe_ratio',
+              'sortino_ratio' and 'calmar_ratio'; NaN where a ratio is undefined.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    returns = bar_returns(equity)
+    nan = float('nan')
+    if len(returns) == 0 or not equity[0] > 0:
+        return dict.fromkeys(('total_return', 'annualized_return', 'annualized_volatility',
+                              'sharpe_ratio', 'sortino_ratio', 'calmar_ratio'), nan)
+
+    total_return = equity[-1] / equity[0] - 1
+    annualized_return = (1 + total_return) ** (periods_per_year / len(returns)) - 1 if total_return > -1 else -1.0
+    excess = returns - risk_free_rate / periods_per_year
+    volatility = returns.std(ddof=1) if len(returns) > 1 else nan
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2))
+    if max_drawdown_pct is None:
+        max_drawdown_pct = drawdown_stats(equity)['max_drawdown_pct']
+    annualizer = np.sqrt(periods_per_year)
+
+    return {
+        'total_return': float(total_return),
+        'annualized_return': float(annualized_return),
+        'annualized_volatility': float(volatility * annualizer),
+        'sharpe_ratio': float(excess.mean() / volatility * annualizer) if volatility > 0 else nan,
+        'sortino_ratio': float(excess.mean() / downside * annualizer) if downside > 0 else nan,
+        'calmar_ratio': float(annualized_return / max_drawdown_pct) if max_drawdown_pct > 0 else nan,
+    }
+
+
+def equity_metrics(equity, periods_per_year=TRADING_DAYS_PER_YEAR, risk_free_rate=0.0):
+    """Drawdown statistics and risk ratios of a bar-level equity curve in one dictionary."""
+    drawdowns = drawdown_stats(equity)
+    return dict(drawdowns, **risk_ratios(equity, periods_per_year, risk_free_rate, drawdowns['max_drawdown_pct']))
+
+
+def rolling_metrics(equity, window, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Rolling return, volatility, Sharpe ratio and drawdown of an equity curve.
+
+    Args:
+        equity (pd.Series): Equity after every bar, indexed by timestamp.
+        window (int or str): Rolling window in bars, or a time offset such as '30D'.
+        periods_per_year (float, optional): Bars per year used for annualization. Defaults to 252.
+
+    Returns:
+        pd.DataFrame: Columns 'return', 'volatility', 'sharpe_ratio' and 'drawdown_pct', aligned with `equity`.
+    """
+    equity = pd.Series(equity, dtype=np.float64)
+    returns = equity.pct_change()
+    rolling_returns = returns.rolling(window)
+    mean, std = rolling_returns.mean(), rolling_returns.std()
+    annualizer = np.sqrt(periods_per_year)
+    rolling_peak = equity.rolling(window, min_periods=1).max()
+    return pd.DataFrame({
+        'return': np.expm1(np.log1p(returns).rolling(window).sum()),
+        'volatility': std * annualizer,
+        'sharpe_ratio': (mean / std.where(std > 0)) * annualizer,
+        'drawdown_pct': 1 - equity / rolling_peak,
+    }, index=equity.index)
@@ -0,0 +1,124 @@
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from backtest_engine.data_plan import BacktestDataPlan
+from backtest_engine.strategy_runner import StrategyRunner
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Frames shipped once to every worker process by `_init_worker`, keyed like `BacktestDataPlan` frames
+_worker_frames = {}
+
+
+def _init_worker(frames):
+    """Stores the shared historical data frames in the worker process."""
+    global _worker_frames
+    _worker_frames = frames
+
+
+def _run_job(job, frame_key, settings):
+    """
+    Runs one strategy on one prepared frame inside a worker process.
+
+    Args:
+        job (dict): The backtest job (see `ParallelBacktestExecutor.run`).
+        frame_key (tuple): Key of the job's frame in `_worker_frames`.
+        settings (dict): Backtest settings (slippage, commission, initial_capital, allow_short).
+
+    Returns:
+        tuple: (trades, performance)
+    """
+    strategy_runner = StrategyRunner(job["strategy_class"], job["strategy_params"], None,
+                                     initial_capital=settings["initial_capital"],
+                                     allow_short=settings["allow_short"])
+    return strategy_runner.run_on_data(job["symbol"], _worker_frames.get(frame_key),
+                                       settings["slippage"], settings["commission"])
+
+
+class ParallelBacktestExecutor:
+    """
+    Runs many (strategy, symbol, timeframe) backtests in parallel.
+
+    Historical data for all jobs is fetched concurrently through a `BacktestDataPlan` (one query per
+    source range), then the CPU-bound strategy runs are spread over a process pool. The frames are
+    handed to each worker once when the pool starts instead of being pickled with every job, and
+    results are returned in the order the jobs were given.
+    """
+    def __init__(self, db_handler, max_workers=None):
+        """
+        Initializes the executor.
+
+        Args:
+            db_handler (DatabaseHandler): An instance of the database handler.
+            max_workers (int, optional): Number of worker processes. Defaults to the number of CPU cores.
+        """
+        self.db_handler = db_handler
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def _settings(self):
+        backtest_config = self.db_handler.config.get("backtesting", {})
+        return {
+            "slippage": backtest_config.get("slippage", 0.0),
+            "commission": backtest_config.get("commission", 0.0),
+            "initial_capital": backtest_config.get("initial_capital", 1000000),
+            "allow_short": backtest_config.get("allow_short", False),
+        }
+
+    async def run(self, jobs, data_plan=None, on_result=None, keep_trades=True):
+        """
+        Runs the given backtest jobs.
+
+        Args:
+            jobs (list): Job dictionaries with the keys 'strategy_class', 'strategy_params', 'symbol',
+                         'timeframe', 'table_name', 'start_date' and 'end_date'. Any other keys (e.g. the
+                         strategy name) are passed through untouched.
+            data_plan (BacktestDataPlan, optional): A plan to reuse. A new one is built if omitted.
+            on_result (callable, optional): Called as `on_result(job, trades, performance, error)` as soon as
+                                            each job finishes (in completion order), e.g. to persist it.
+                                            `error` is the exception of a failed job (including one whose
+                                            worker process died) and None otherwise; failed jobs must not
+                                            be treated as completed.
+            keep_trades (bool, optional): Whether the returned results keep the trades. Pass False with
+                                          `on_result` to avoid holding every trade in memory. Defaults to True.
+
+        Returns:
+            list: One (job, trades, performance) tuple per job, in the order of `jobs` (performance is
+                  None for failed jobs).
+        """
+        if not jobs:
+            return []
+
+        data_plan = data_plan or BacktestDataPlan(self.db_handler)
+        frame_keys = []
+        for job in jobs:
+            data_plan.add_job(job["table_name"], job["start_date"], job["end_date"], job["timeframe"])
+            frame_keys.append((job["table_name"], job["start_date"], job["end_date"], job["timeframe"]))
+        await data_plan.fetch()
+
+        frames = {key: data_plan.get_frame(*key) for key in set(frame_keys)}
+        settings = self._settings()
+        max_workers = min(self.max_workers, len(jobs))
+        logger.info(f"Running {len(jobs)} backtest jobs on {max_workers} worker processes")
+
+        loop = asyncio.get_running_loop()
+
+        async def run_one(pool, job, frame_key):
+            error = None
+            try:
+                trades, performance = await loop.run_in_executor(pool, _run_job, self._picklable(job), frame_key, settings)
+            except Exception as e:
+                logger.error(f"Backtest failed for {job['strategy_class'].__name__} on {job['symbol']} ({job['timeframe']}): {e}")
+                trades, performance, error = [], None, e
+            if on_result is not None:
+                on_result(job, trades, performance, error)
+            return job, trades if keep_trades else [], performance
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(frames,)) as pool:
+            return list(await asyncio.gather(*(run_one(pool, job, frame_key)
+                                               for job, frame_key in zip(jobs, frame_keys))))
+
+    @staticmethod
+    def _picklable(job):
+        """Keeps only the job fields a worker needs."""
+        return {key: job[key] for key in ("strategy_class", "strategy_params", "symbol")}
@@ -0,0 +1,182 @@
+import os
+import itertools
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from backtest_engine.strategy_runner import StrategyRunner
+from strategies.indicator_cache import IndicatorCache
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Data and indicator cache of a sweep worker process, set once by `_init_worker`
+_worker_data = None
+_worker_cache = None
+
+
+def _init_worker(historical_data):
+    """Stores the sweep data in the worker process and starts its indicator cache."""
+    global _worker_data, _worker_cache
+    _worker_data = historical_data
+    _worker_cache = IndicatorCache(historical_data)
+
+
+def expand_param_grid(param_grid):
+    """
+    Expands a parameter grid into the list of values to try for every parameter.
+
+    Each value in `param_grid` may be a list/tuple/range of values, a single scalar, or a dictionary
+    with 'start', 'stop' and optional 'step' keys (inclusive of 'stop'), which is convenient in YAML:
+
+        ema_short: {start: 5, stop: 20, step: 1}
+
+    Args:
+        param_grid (dict): Parameter name -> values specification.
+
+    Returns:
+        dict: Parameter name -> list of values.
+    """
+    expanded = {}
+    for name, spec in param_grid.items():
+        if isinstance(spec, dict):
+            start, stop, step = spec["start"], spec["stop"], spec.get("step", 1)
+            values = []
+            value = start
+            while value <= stop:
+                values.append(value)
+                value += step
+            expanded[name] = values
+        elif isinstance(spec, (list, tuple, range)):
+            expanded[name] = list(spec)
+        else:
+            expanded[name] = [spec]
+    return expanded
+
+
+def _evaluate_batch(strategy_class, base_params, combinations, symbol, settings, historical_data=None, cache=None):
+    """
+    Backtests a batch of parameter combinations on the same data and indicator cache.
+
+    Returns:
+        list: One dictionary of parameters and performance metrics per combination.
+    """
+    if historical_data is None:
+        historical_data, cache = _worker_data, _worker_cache
+
+    rows = []
+    for combination in combinations:
+        params = dict(base_params, **combination)
+        strategy_runner = StrategyRunner(strategy_class, params, None,
+                                         initial_capital=settings["initial_capital"],
+                                         allow_short=settings["allow_short"])
+        try:
+            _, performance = strategy_runner.run_on_data(symbol, historical_data, settings["slippage"],
+                                                         settings["commission"], indicator_cache=cache,
+                                                         record_trades=False)
+        except Exception as e:
+            logger.error(f"Sweep run failed for {strategy_class.__name__} with {combination}: {e}")
+            performance = {}
+        rows.append(dict(combination, **performance))
+    return rows
+
+
+class ParameterSweep:
+    """
+    Backtests every combination of a parameter grid and ranks the results.
+
+    Indicators are requested by the strategies through `BaseStrategy.indicator`, so with a shared
+    `IndicatorCache` each distinct series (e.g. EMA(9)) is computed once for the whole grid rather
+    than once per combination. Combinations are evaluated in batches; with several workers each
+    process keeps its own cache and receives the data only once.
+    """
+    def __init__(self, strategy_class, param_grid, base_params=None, constraint=None):
+        """
+        Initializes the sweep.
+
+        Args:
+            strategy_class (type): The class of the trading strategy.
+            param_grid (dict): Parameter name -> values to try (see `expand_param_grid`).
+            base_params (dict, optional): Fixed strategy parameters shared by every combination.
+            constraint (callable, optional): Predicate on a combination dict; combinations for which it
+                                             returns False are skipped (e.g. ema_short < ema_long).
+        """
+        self.strategy_class = strategy_class
+        self.param_grid = expand_param_grid(param_grid)
+        self.base_params = dict(base_params or {})
+        self.constraint = constraint
+
+    def combinations(self):
+        """
+        Returns the parameter combinations of the grid, in grid order.
+
+        Grid order keeps combinations that share leading parameters (and so their indicators) together.
+        """
+        names = list(self.param_grid)
+        combinations = [dict(zip(names, values)) for values in itertools.product(*self.param_grid.values())]
+        if self.constraint is not None:
+            combinations = [combination for combination in combinations if self.constraint(combination)]
+        return combinations
+
+    def run(self, historical_data, symbol, slippage=0.0, commission=0.0, initial_capital=1000000,
+            allow_short=False, rank_by="total_profit", ascending=False, batch_size=100, max_workers=1):
+        """
+        Evaluates all combinations on the given data and returns a ranked results table.
+
+        Args:
+            historical_data (pd.DataFrame): OHLCV data indexed by timestamp.
+            symbol (str): The trading symbol.
+            slippage (float, optional): Fractional slippage per trade. Defaults to 0.0.
+            commission (float, optional): Fractional commission per trade. Defaults to 0.0.
+            initial_capital (float, optional): The initial capital per run. Defaults to 1000000.
+            allow_short (bool, optional): Whether SELL from flat opens a short position. Defaults to False.
+            rank_by (str, optional): Performance column to rank by. Defaults to 'total_profit'.
+            ascending (bool, optional): Sort order of `rank_by`. Defaults to False (best first).
+            batch_size (int, optional): Combinations per batch. Defaults to 100.
+            max_workers (int, optional): Worker processes; None uses all CPU cores. Defaults to 1 (in-process).
+
+        Returns:
+            pd.DataFrame: One row per combination with its parameters and performance metrics,
+                          sorted by `rank_by` with a 'rank' column starting at 1.
+        """
+        combinations = self.combinations()
+        if not combinations or historical_data is None or historical_data.empty:
+            return pd.DataFrame()
+
+        settings = {
+            "slippage": slippage,
+            "commission": commission,
+            "initial_capital": initial_capital,
+            "allow_short": allow_short,
+        }
+        batches = [combinations[i:i + batch_size] for i in range(0, len(combinations), batch_size)]
+        max_workers = min(max_workers or os.cpu_count() or 1, len(batches))
+        logger.info(f"Sweeping {len(combinations)} parameter combinations of {self.strategy_class.__name__} "
+                    f"in {len(batches)} batches on {max_workers} worker(s)")
+
+        rows = []
+        if max_workers <= 1:
+            cache = IndicatorCache(historical_data)
+            for batch in batches:
+                rows.extend(_evaluate_batch(self.strategy_class, self.base_params, batch, symbol, settings,
+                                            historical_data, cache))
+            logger.info(f"Computed {cache.misses} distinct indicator series for {len(combinations)} combinations")
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(historical_data,)) as pool:
+                futures = [
+                    pool.submit(_evaluate_batch, self.strategy_class, self.base_params, batch, symbol, settings)
+                    for batch in batches
+                ]
+                for future in futures:
+                    rows.extend(future.result())
+
+        return self.rank(pd.DataFrame(rows), rank_by, ascending)
+
+    @staticmethod
+    def rank(results, rank_by="total_profit", ascending=False):
+        """Sorts a results table by a performance column and adds a 1-based 'rank' column."""
+        if results.empty or rank_by not in results.columns:
+            return results
+        results = results.sort_values(rank_by, ascending=ascending, na_position="last", kind="stable")
+        results = results.reset_index(drop=True)
+        results.insert(0, "rank", range(1, len(results) + 1))
+        return results
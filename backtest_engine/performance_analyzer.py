@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from backtest_engine import metrics
 from utils.logger import get_logger  # Import get_logger
 
 logger = get_logger(__name__)  # Get logger for this module
@@ -7,15 +8,27 @@ logger = get_logger(__name__)  # Get logger for this module
 class PerformanceAnalyzer:
     """
     Analyzes the performance of a trading strategy based on executed trades.
+
+    All metrics are returned as numbers (NaN where undefined) so results of many runs can be compared
+    and aggregated directly. When a bar-level equity curve is given, drawdown and risk-adjusted metrics
+    (Sharpe, Sortino, Calmar) are computed on it; otherwise drawdowns are measured on the cumulative
+    trade profit.
     """
-    def __init__(self, trades):
+    def __init__(self, trades, equity_curve=None, periods_per_year=None):
         """
         Initializes the PerformanceAnalyzer.
 
         Args:
             trades (list): A list of trade dictionaries.
+            equity_curve (pd.Series, optional): Account equity after every bar, indexed by timestamp.
+            periods_per_year (float, optional): Bars per year for annualization. Estimated from the
+                                                equity curve's index if omitted.
         """
         self.trades_df = pd.DataFrame(trades)
+        self.equity_curve = equity_curve
+        self.periods_per_year = periods_per_year
+        if self.periods_per_year is None and equity_curve is not None:
+            self.periods_per_year = metrics.periods_per_year(equity_curve.index)
         if not self.trades_df.empty:
             self.trades_df['cumulative_profit'] = self.trades_df['profit'].cumsum()
             self.trades_df['win'] = np.where(self.trades_df['profit'] > 0, 1, 0)
@@ -25,104 +38,113 @@ class PerformanceAnalyzer:
 
     def analyze(self):
         """
-        Performs the performance analysis and returns a dictionary of metrics.
+        Performs the performance analysis and returns a dictionary of numeric metrics.
         """
         if self.trades_df.empty:
             return {"error": "No trades to analyze."}
 
-        print("Trades DataFrame:")
-        print(self.trades_df)
-
-        print("Profit values:")
-        print(self.trades_df['profit'])
-
-        print("Cumulative Profit values:")
-        print(self.trades_df['cumulative_profit'])
+        profit = self.trades_df['profit'].to_numpy(dtype=np.float64)
+        cumulative_profit = self.trades_df['cumulative_profit'].to_numpy(dtype=np.float64)
 
         # 1. Performance Metrics
-        total_trades = len(self.trades_df)
-        winning_trades = self.trades_df['win'].sum()
-        losing_trades = self.trades_df['loss'].sum()
-        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-        total_profit = self.trades_df['profit'].sum()
-        average_profit = self.trades_df['profit'].mean()
-        cumulative_returns = self.trades_df['profit'].cumsum()
-        final_cumulative_profit = self.trades_df['cumulative_profit'].iloc[-1] if not self.trades_df.empty else 0
+        total_trades = len(profit)
+        winning_trades = int(self.trades_df['win'].sum())
+        losing_trades = int(self.trades_df['loss'].sum())
+        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0.0
+        total_profit = float(profit.sum())
+        average_profit = float(profit.mean())
+        final_cumulative_profit = float(cumulative_profit[-1])
 
         # 2. Risk Metrics
-        max_drawdown = self._calculate_max_drawdown(cumulative_returns)
-        average_loss = self.trades_df[self.trades_df['profit'] < 0]['profit'].mean()
-        std_dev_returns = self.trades_df['profit'].std()
-        sharpe_ratio = (average_profit / std_dev_returns) if std_dev_returns != 0 else np.inf #Assuming risk free rate is 0
+        max_drawdown = self._calculate_max_drawdown(cumulative_profit)
+        losses = profit[profit < 0]
+        average_loss = float(losses.mean()) if len(losses) else np.nan
+        std_dev_returns = float(profit.std(ddof=1)) if total_trades > 1 else np.nan
+        sharpe_ratio = (average_profit / std_dev_returns) if std_dev_returns > 0 else np.nan  # Per trade, risk free rate 0
 
         # 3. Trade-Specific Metrics
-        max_profit = self.trades_df['profit'].max()
-        max_loss = self.trades_df['profit'].min()
-        profit_factor = -average_profit / average_loss if average_loss != 0 else np.inf
-        average_holding_time = self.trades_df['holding_period'].mean() if 'holding_period' in self.trades_df.columns else None
+        max_profit = float(profit.max())
+        max_loss = float(profit.min())
+        profit_factor = -average_profit / average_loss if average_loss < 0 else np.nan
+        average_holding_time = self._average_holding_seconds()
 
         # 4. Efficiency Metrics
-        average_trade_duration = self.trades_df['holding_period'].mean() if 'holding_period' in self.trades_df.columns else None
         trades_per_day = self._calculate_trades_per_day()
 
         # 5. Stability and Consistency Metrics
-        consistency_ratio = (winning_trades / losing_trades) if losing_trades != 0 else np.inf
-        profit_loss_ratio = abs(average_profit / average_loss) if average_loss != 0 else np.inf
+        consistency_ratio = (winning_trades / losing_trades) if losing_trades != 0 else np.nan
+        profit_loss_ratio = abs(average_profit / average_loss) if average_loss < 0 else np.nan
 
         # 6. Statistical Metrics
-        skewness = self.trades_df['profit'].skew()
-        kurtosis = self.trades_df['profit'].kurtosis()
+        skewness = float(self.trades_df['profit'].skew())
+        kurtosis = float(self.trades_df['profit'].kurtosis())
 
         results = {
             "total_trades": total_trades,
             "winning_trades": winning_trades,
             "losing_trades": losing_trades,
-            "win_rate": f"{win_rate:.2f}%",
-            "total_profit": f"{total_profit:.2f}",
-            "average_profit": f"{average_profit:.2f}",
-            "final_cumulative_profit": f"{final_cumulative_profit:.2f}",
-            "max_drawdown": f"{max_drawdown:.2f}",
-            "average_loss": f"{average_loss:.2f}",
-            "std_dev_returns": f"{std_dev_returns:.2f}",
-            "sharpe_ratio": f"{sharpe_ratio:.2f}",
-            "max_profit": f"{max_profit:.2f}",
-            "max_loss": f"{max_loss:.2f}",
-            "profit_factor": f"{profit_factor:.2f}",
-            "average_holding_time": str(average_holding_time),
-            "average_trade_duration": str(average_trade_duration),
+            "win_rate": win_rate,
+            "total_profit": total_profit,
+            "average_profit": average_profit,
+            "final_cumulative_profit": final_cumulative_profit,
+            "max_drawdown": max_drawdown,
+            "average_loss": average_loss,
+            "std_dev_returns": std_dev_returns,
+            "sharpe_ratio": sharpe_ratio,
+            "max_profit": max_profit,
+            "max_loss": max_loss,
+            "profit_factor": profit_factor,
+            "average_holding_time": average_holding_time,
+            "average_trade_duration": average_holding_time,
             "trades_per_day": trades_per_day,
-            "consistency_ratio": f"{consistency_ratio:.2f}",
-            "profit_loss_ratio": f"{profit_loss_ratio:.2f}",
-            "skewness": f"{skewness:.2f}",
-            "kurtosis": f"{kurtosis:.2f}"
+            "consistency_ratio": consistency_ratio,
+            "profit_loss_ratio": profit_loss_ratio,
+            "skewness": skewness,
+            "kurtosis": kurtosis
         }
+
+        # 7. Equity Curve Metrics (bar level)
+        if self.equity_curve is not None and len(self.equity_curve):
+            for key, value in metrics.equity_metrics(self.equity_curve.to_numpy(dtype=np.float64), self.periods_per_year).items():
+                results[f"equity_{key}"] = value
         return results
 
+    def rolling(self, window):
+        """
+        Rolling return, volatility, Sharpe ratio and drawdown of the equity curve.
+
+        Args:
+            window (int or str): Rolling window in bars, or a time offset such as '30D'.
+
+        Returns:
+            pd.DataFrame: Rolling metrics aligned with the equity curve (empty without an equity curve).
+        """
+        if self.equity_curve is None:
+            return pd.DataFrame()
+        return metrics.rolling_metrics(self.equity_curve, window, self.periods_per_year)
+
     def _calculate_max_drawdown(self, cumulative_returns):
         """Calculates the maximum drawdown of the cumulative returns."""
-        if cumulative_returns.empty:
-            return 0.0
-        peak = cumulative_returns.iloc[0]
-        max_drawdown = 0
-        for value in cumulative_returns:
-            if value > peak:
-                peak = value
-            drawdown = (peak - value)
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-        return max_drawdown
+        return metrics.drawdown_stats(cumulative_returns)['max_drawdown']
+
+    def _average_holding_seconds(self):
+        """Average holding period in seconds, or NaN without entry/exit times."""
+        if 'holding_period' not in self.trades_df.columns:
+            return np.nan
+        return float(self.trades_df['holding_period'].dt.total_seconds().mean())
 
     def _calculate_trades_per_day(self):
         """Calculates the average number of trades per day."""
         if self.trades_df.empty or 'entry_time' not in self.trades_df.columns:
-            return "N/A"
+            return np.nan
         try:
           first_trade_date = pd.to_datetime(self.trades_df['entry_time'].min()).date()
           last_trade_date = pd.to_datetime(self.trades_df['entry_time'].max()).date()
           num_days = (last_trade_date - first_trade_date).days + 1
           if num_days <= 0:
-            return "N/A"
+            return np.nan
           return len(self.trades_df) / num_days
         except Exception as e:
             logger.error(f"Error calculating trades per day: {e}")
-            return "N/A"
\ No newline at end of file
+            return np.nan
+
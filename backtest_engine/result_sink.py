@@ -0,0 +1,180 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger  # Import get_logger
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library is used without it
+    orjson = None
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Fields identifying one backtest result: a changed window or parameter is a different result
+RESULT_KEY_FIELDS = ("strategy", "symbol", "timeframe", "start_date", "end_date", "params_hash")
+
+
+def _to_builtin(value):
+    """JSON fallback for NumPy and pandas values."""
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def params_hash(params):
+    """
+    A stable hash of strategy (and risk) parameters, independent of the key order.
+
+    Args:
+        params (dict): The parameters a backtest ran with.
+
+    Returns:
+        str: 16 hex digits of the SHA-256 of the canonical JSON.
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def dumps(record):
+    """Serializes a record to one line of JSON bytes (without the newline)."""
+    if orjson is not None:
+        return orjson.dumps(record, default=_to_builtin,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(record, default=_to_builtin, separators=(",", ":")).encode()
+
+
+def loads(line):
+    """Parses one line of JSON."""
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+class JsonlResultSink:
+    """
+    Append-only, crash-safe store of backtest results, one JSON object per line.
+
+    Each result (keyed by `RESULT_KEY_FIELDS`) is written and fsynced as soon as it finishes, so a
+    crash loses at most the run in progress and memory does not grow with the number of trades. A
+    partially written last line (from a crash mid-write) is dropped when the sink is opened, and
+    `completed_keys()` lets a rerun skip combinations that are already stored.
+    """
+    def __init__(self, path="backtest_results.jsonl", fsync=True):
+        """
+        Initializes the sink.
+
+        Args:
+            path (str, optional): The JSONL file to append to. Defaults to 'backtest_results.jsonl'.
+            fsync (bool, optional): Whether to fsync after every result. Defaults to True.
+        """
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self._recover()
+
+    def _recover(self):
+        """Truncates a trailing partial line left by an interrupted write."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b"\n":
+                return
+            # Walk back to the last complete line.
+            position = f.seek(0, os.SEEK_END)
+            while position > 0:
+                step = min(65536, position)
+                f.seek(position - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            f.truncate(max(position, 0))
+        logger.warning(f"Dropped an incomplete result at the end of {self.path}.")
+
+    @staticmethod
+    def result_key(record):
+        """The key of a result record (the values of `RESULT_KEY_FIELDS`)."""
+        return tuple(record.get(field) for field in RESULT_KEY_FIELDS)
+
+    def read(self):
+        """
+        Iterates over the stored result records, one at a time.
+
+        Yields:
+            dict: A result record.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield loads(line)
+
+    def completed_keys(self):
+        """Returns the set of result keys already stored."""
+        return {self.result_key(record) for record in self.read()}
+
+    def write(self, record):
+        """
+        Appends one result record and makes it durable.
+
+        Args:
+            record (dict): The result, with the `RESULT_KEY_FIELDS` keys.
+        """
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(dumps(record) + b"\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Closes the underlying file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def export_json(self, path="backtest_results.json", skip_empty=True):
+        """
+        Writes the stored results as one JSON array (the format the dashboards read).
+
+        Records are streamed one at a time, so the whole result set is never held in memory.
+
+        Args:
+            path (str, optional): The JSON file to write. Defaults to 'backtest_results.json'.
+            skip_empty (bool, optional): Leave out results without trades. Defaults to True.
+
+        Returns:
+            int: The number of results written.
+        """
+        count = 0
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(b"[")
+            for record in self.read():
+                if skip_empty and not record.get("trades"):
+                    continue
+                f.write(b",\n" if count else b"\n")
+                f.write(dumps(record))
+                count += 1
+            f.write(b"\n]\n")
+        os.replace(temporary_path, path)
+        return count
@@ -1,6 +1,9 @@
+import numpy as np
 import pandas as pd
 from trade_utils import timeframe_converter as converter
-from trade_utils.data_resampler import convert_1min_to_timeframe
+from backtest_engine.data_router import DataRouter
+from backtest_engine.trade_engine import compute_trade_arrays, settle_trades, trade_records, match_round_trips, equity_curve
+from backtest_engine.metrics import equity_metrics, periods_per_year
 from utils.logger import get_logger  # Import get_logger
 
 logger = get_logger(__name__)  # Get logger for this module
@@ -11,7 +14,7 @@ class StrategyRunner:
     Runs a given trading strategy on historical data and generates trades.
     """
 
-    def __init__(self, strategy_class, strategy_params, db_handler, initial_capital=1000000):
+    def __init__(self, strategy_class, strategy_params, db_handler, initial_capital=1000000, allow_short=False):
         """
         Initializes the StrategyRunner.
 
@@ -20,14 +23,19 @@ class StrategyRunner:
             strategy_params (dict): Parameters for the strategy.
             db_handler (DatabaseHandler): An instance of the database handler.
             initial_capital (float, optional): The initial capital for the backtest. Defaults to 1000000.
+            allow_short (bool, optional): Whether a SELL from flat opens a short position when matching
+                                          round-trips. Defaults to False.
         """
         self.strategy_class = strategy_class
         self.strategy_params = strategy_params
         self.db_handler = db_handler
+        self.data_router = DataRouter(db_handler)
         self.initial_capital = initial_capital
+        self.allow_short = allow_short
         self.current_capital = initial_capital
         self.trades = []
         self.positions = {}  # To track open positions
+        self.equity_curve = None  # Account equity after every bar of the last run
         self.strategy_instance = None
 
     async def _fetch_historical_data(self, symbol, start_date, end_date, timeframe='1m', custom_table_name=None):
@@ -53,48 +61,8 @@ class StrategyRunner:
                     logger.warning(f"No table mapping found for symbol '{symbol}' and timeframe '{timeframe}'.")
                     return pd.DataFrame()
 
-            # Prepend the schema name to the table name
-            full_table_name = f"fno.{table_name}"
-
-            query = f"SELECT timestamp, open, high, low, close, volume FROM {full_table_name} WHERE timestamp >= '{start_date}' AND timestamp <= '{end_date}' ORDER BY timestamp ASC"
-            # print(query)
-            data = await self.db_handler.execute_query(query)
-            if data:
-                df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-
-                # Convert the timestamp column to Asia/Kolkata
-                if 'timestamp' in df.columns:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'],
-                                                     utc=True)  # ensure that pandas knows that the column is in UTC.
-                    df['timestamp'] = df['timestamp'].dt.tz_convert('Asia/Kolkata')
-                    df['timestamp'] = df['timestamp'].dt.tz_localize(None)
-                else:
-                    logger.warning("Timestamp column not found in DataFrame.")
-
-                if timeframe == '1m':
-                    df = df
-                elif timeframe == '5m':
-                    df = convert_1min_to_timeframe(df, '5T')
-                elif timeframe == '15m':
-                    df = convert_1min_to_timeframe(df, '15T')
-                elif timeframe == '1h':
-                    df = convert_1min_to_timeframe(df, '1H')
-                elif timeframe == '1d':
-                    df = convert_1min_to_timeframe(df, '1D')
-                else:
-                    df.set_index('timestamp', inplace=True)
-                    df.index = pd.to_datetime(df.index)
-
-                df.reset_index(inplace=True)
-                df.set_index('timestamp', inplace=True)
-                # print(df.columns)
-                # print(df.shape)
-
-                return df
-            else:
-                logger.info(
-                    f"No historical data found for {symbol} between {start_date} and {end_date} using table '{full_table_name}'.")
-                return pd.DataFrame()
+            # Served from a pre-aggregated table, SQL bucketing or client-side resampling, whichever is cheapest
+            return await self.data_router.fetch(table_name, start_date, end_date, timeframe)
         except Exception as e:
             logger.error(f"Error fetching historical data for {symbol}: {e}")
             return pd.DataFrame()
@@ -126,48 +94,52 @@ class StrategyRunner:
         }
         return trade
 
-    def _analyze_performance(self):
-        if not self.trades:
+    def _analyze_performance(self, trade_arrays=None):
+        """
+        Computes realised profit per round-trip and summary statistics for the generated trades.
+
+        Args:
+            trade_arrays (dict, optional): Arrays from `compute_trade_arrays` for this run's trades.
+                                           Built from `self.trades` if omitted.
+
+        Returns:
+            dict: Performance metrics for the trades of this run, or an empty dict if there were none.
+        """
+        if trade_arrays is None:
+            if not self.trades:
+                return {}
+            df = pd.DataFrame(self.trades)
+            symbols = df['symbol'].to_numpy()
+            trade_arrays = {
+                'is_buy': (df['action'] == 'BUY').to_numpy(),
+                'prices': df['price'].to_numpy(),
+                'quantities': df['quantity'].to_numpy(),
+                'commissions': df['commission'].to_numpy()
+            }
+        else:
+            symbols = None  # A single run only trades one symbol
+
+        if len(trade_arrays['prices']) == 0:
             return {}
 
-        df = pd.DataFrame(self.trades)
-        df['trade_value'] = df['price'] * df['quantity']
-        df['profit'] = 0.0
-        position = 0
-        entry_price = 0
-
-        for index, row in df.iterrows():
-            if row['action'] == 'BUY' and position == 0:
-                position = row['quantity']
-                entry_price = row['price']
-            elif row['action'] == 'SELL' and position > 0 and row['symbol'] == df.iloc[0]['symbol']:
-                profit_per_unit = row['price'] - entry_price
-                df.loc[index, 'profit'] = profit_per_unit * position - row['commission']
-                position = 0
-                entry_price = 0
-            elif row['action'] == 'SELL' and position < 0 and row['symbol'] == df.iloc[0]['symbol']:
-                profit_per_unit = entry_price - row['price']
-                df.loc[index, 'profit'] = profit_per_unit * abs(position) - row['commission']
-                position = 0
-                entry_price = 0
-            elif row['action'] == 'BUY' and position < 0 and row['symbol'] == df.iloc[0]['symbol']:
-                profit_per_unit = entry_price - row['price']
-                df.loc[index, 'profit'] = profit_per_unit * abs(position) - row['commission']
-                position = 0
-                entry_price = 0
-            elif row['action'] == 'BUY' and position == 0:
-                position = row['quantity']
-                entry_price = row['price']
-
-        total_profit = df['profit'].sum()
-        num_trades = len(df)
-        winning_trades = len(df[df['profit'] > 0])
-        losing_trades = len(df[df['profit'] < 0])
+        profit = match_round_trips(
+            symbols,
+            trade_arrays['is_buy'],
+            trade_arrays['prices'],
+            trade_arrays['quantities'],
+            trade_arrays['commissions'],
+            allow_short=self.allow_short
+        )
+
+        total_profit = profit.sum()
+        num_trades = len(profit)
+        winning_trades = int((profit > 0).sum())
+        losing_trades = int((profit < 0).sum())
 
         win_rate = (winning_trades / num_trades) * 100 if num_trades > 0 else 0
-        avg_profit = df['profit'].mean()
-        max_profit = df['profit'].max()
-        max_loss = df['profit'].min()
+        avg_profit = profit.mean()
+        max_profit = profit.max()
+        max_loss = profit.min()
 
         performance = {
             'total_profit': total_profit,
@@ -183,48 +155,70 @@ class StrategyRunner:
         return performance
 
     async def run(self, symbol, start_date, end_date, timeframe='1m', slippage=0.0, commission=0.0,
-                  custom_table_name=None):
+                  custom_table_name=None, historical_data=None):
         """
         Fetches historical data and runs the strategy to generate trades for a single symbol.
+
+        If `historical_data` is given (e.g. from a `BacktestDataPlan`), it is used instead of querying the database.
         """
-        historical_data = await self._fetch_historical_data(symbol, start_date, end_date, timeframe, custom_table_name)
-        # print(historical_data.head())
-        # print(historical_data.shape)
-        # print(historical_data.columns)
-        # print(timeframe)
+        if historical_data is None:
+            historical_data = await self._fetch_historical_data(symbol, start_date, end_date, timeframe, custom_table_name)
 
-        if historical_data.empty:
+        return self.run_on_data(symbol, historical_data, slippage, commission)
+
+    def run_on_data(self, symbol, historical_data, slippage=0.0, commission=0.0, indicator_cache=None,
+                    record_trades=True):
+        """
+        Runs the strategy on already loaded historical data and generates trades for a single symbol.
+
+        Args:
+            symbol (str): The trading symbol.
+            historical_data (pd.DataFrame): OHLCV data indexed by timestamp. It is not modified.
+            slippage (float, optional): Fractional slippage per trade. Defaults to 0.0.
+            commission (float, optional): Fractional commission per trade. Defaults to 0.0.
+            indicator_cache (IndicatorCache, optional): Indicator results shared with other runs on the same data.
+            record_trades (bool, optional): Whether to build the trade dictionaries. Sweeps that only need
+                                            the performance metrics pass False. Defaults to True.
+
+        The performance includes drawdown and annualized risk metrics of the bar-level equity curve,
+        which is kept in `self.equity_curve`.
+
+        Returns:
+            tuple: (trades, performance)
+        """
+        if historical_data is None or historical_data.empty:
             return [], {}
 
         self.strategy_instance = self.strategy_class(historical_data.copy(), self.strategy_params)
+        if indicator_cache is not None:
+            self.strategy_instance.indicator_cache = indicator_cache
         if hasattr(self.strategy_instance, 'initialize'):
             self.strategy_instance.initialize(self.initial_capital)
 
         self.trades = []
         self.current_capital = self.initial_capital
         self.positions = {}
+        self.equity_curve = None
 
         # Apply the strategy to generate signals
         self.strategy_instance.apply_strategy()
         signals = self.strategy_instance.signals
 
         # Generate trades from signals
-        for index, row in signals.iterrows():
-            signal = row['signal']
-            current_data = historical_data.loc[index]
-            if signal:
-                trade = self._execute_trade(symbol, index, current_data, 'BUY' if signal == 1 else 'SELL', slippage,
-                                            commission)
-                if trade:
-                    self.trades.append(trade)
-                    # Update capital and positions based on the trade (Simplified for basic backtesting)
-                    if trade['action'] == 'BUY':
-                        self.positions[symbol] = self.positions.get(symbol, 0) + trade['quantity']
-                        self.current_capital -= (trade['price'] * trade['quantity']) + trade['commission']
-                    elif trade['action'] == 'SELL':
-                        self.positions[symbol] = self.positions.get(symbol, 0) - trade['quantity']
-                        self.current_capital += (trade['price'] * trade['quantity']) - trade['commission']
-                    logger.info(f"Executed trade: {trade}")
-
-        performance = self._analyze_performance()
+        trade_arrays = compute_trade_arrays(signals, historical_data, slippage, commission)
+        if len(trade_arrays['rows']):
+            net_position, self.current_capital = settle_trades(trade_arrays, self.initial_capital)
+            self.positions[symbol] = net_position
+            if record_trades:
+                self.trades = trade_records(symbol, signals.index, trade_arrays)
+            logger.info(f"Executed {len(trade_arrays['rows'])} trades for {symbol}. Final capital: {self.current_capital:.2f}")
+
+        performance = self._analyze_performance(trade_arrays)
+        if performance:
+            close = historical_data['close']
+            if not close.index.equals(signals.index):
+                close = close.reindex(signals.index)
+            equity = equity_curve(trade_arrays, close.to_numpy(dtype=np.float64), self.initial_capital)
+            self.equity_curve = pd.Series(equity, index=signals.index, name='equity')
+            performance.update(equity_metrics(equity, periods_per_year(signals.index)))
         return self.trades, performance
@@ -0,0 +1,200 @@
+import numpy as np
+
+
+def compute_trade_arrays(signals, historical_data, slippage=0.0, commission=0.0, quantity=1):
+    """
+    Converts a strategy's signal column into arrays describing the simulated trades.
+
+    Every non-zero signal becomes a trade: 1 is a BUY and any other non-zero value a SELL.
+
+    Args:
+        signals (pd.DataFrame): Strategy signals with a 'signal' column, indexed like `historical_data`.
+        historical_data (pd.DataFrame): Market data with a 'close' column.
+        slippage (float, optional): Fractional slippage applied to the close price. Defaults to 0.0.
+        commission (float, optional): Fractional commission on the trade value. Defaults to 0.0.
+        quantity (int, optional): Quantity traded per signal. Defaults to 1.
+
+    Returns:
+        dict: Arrays 'rows' (positions of the trades in `signals`), 'is_buy', 'prices', 'quantities'
+              and 'commissions', one element per trade.
+    """
+    signal_values = signals['signal'].to_numpy()
+    rows = np.flatnonzero(signal_values != 0)
+
+    close = historical_data['close']
+    if not close.index.equals(signals.index):
+        close = close.reindex(signals.index)
+    close = close.to_numpy(dtype=np.float64)[rows]
+
+    is_buy = signal_values[rows] == 1
+    prices = np.where(is_buy, close + (close * slippage), close - (close * slippage))
+    quantities = np.full(len(prices), quantity)
+    commissions = prices * quantities * commission
+    return {
+        'rows': rows,
+        'is_buy': is_buy,
+        'prices': prices,
+        'quantities': quantities,
+        'commissions': commissions
+    }
+
+
+def settle_trades(trade_arrays, initial_capital=0.0):
+    """
+    Computes the net position and the capital after all trades.
+
+    Cash leaves on BUY and comes back on SELL; the flows are accumulated in trade order starting
+    from the initial capital, so the result is identical to updating the balance one trade at a time.
+
+    Returns:
+        tuple: (net_position, final_capital)
+    """
+    is_buy, quantities = trade_arrays['is_buy'], trade_arrays['quantities']
+    trade_values = trade_arrays['prices'] * quantities
+    commissions = trade_arrays['commissions']
+    cash_flows = np.where(is_buy, -(trade_values + commissions), trade_values - commissions)
+    final_capital = np.cumsum(np.concatenate(([initial_capital], cash_flows)))[-1]
+    net_position = int(np.where(is_buy, quantities, -quantities).sum())
+    return net_position, float(final_capital)
+
+
+def equity_curve(trade_arrays, close, initial_capital=0.0):
+    """
+    Marks the running cash and position to market on every bar.
+
+    Args:
+        trade_arrays (dict): Arrays returned by `compute_trade_arrays`.
+        close (array-like): Close prices of every bar the trade rows refer to.
+        initial_capital (float, optional): Cash before the first trade. Defaults to 0.0.
+
+    Returns:
+        np.ndarray: Account equity (cash + position value at the close) after every bar.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    is_buy, quantities, rows = trade_arrays['is_buy'], trade_arrays['quantities'], trade_arrays['rows']
+    trade_values = trade_arrays['prices'] * quantities
+    commissions = trade_arrays['commissions']
+
+    cash_flows = np.zeros(len(close))
+    position_changes = np.zeros(len(close))
+    cash_flows[rows] = np.where(is_buy, -(trade_values + commissions), trade_values - commissions)
+    position_changes[rows] = np.where(is_buy, quantities, -quantities)
+    cash = initial_capital + np.cumsum(cash_flows)
+    position = np.cumsum(position_changes)
+    # Flat bars contribute no market value even where the close is missing.
+    market_value = np.where(position != 0, position * close, 0.0)
+    return cash + market_value
+
+
+def trade_records(symbol, timestamps, trade_arrays):
+    """
+    Materialises trade arrays into trade dictionaries.
+
+    Args:
+        symbol (str): The trading symbol the trades belong to.
+        timestamps (pd.Index): The index of the signals the trade rows refer to.
+        trade_arrays (dict): Arrays returned by `compute_trade_arrays`.
+
+    Returns:
+        list: Trade dictionaries with the same keys as `StrategyRunner._execute_trade`.
+    """
+    actions = np.where(trade_arrays['is_buy'], 'BUY', 'SELL')
+    return [
+        {
+            'symbol': symbol,
+            'timestamp': timestamp,
+            'action': action,
+            'price': price,
+            'quantity': qty,
+            'commission': fee,
+            'profit': 0.0
+        }
+        for timestamp, action, price, qty, fee in zip(
+            timestamps[trade_arrays['rows']], actions.tolist(), trade_arrays['prices'].tolist(),
+            trade_arrays['quantities'].tolist(), trade_arrays['commissions'].tolist()
+        )
+    ]
+
+
+def match_round_trips(symbols, is_buy, prices, quantities, commissions, allow_short=False):
+    """
+    Computes realised profit per trade by pairing entries with exits in a single array pass.
+
+    Trades are processed per symbol in their original order: from flat a BUY opens a long position
+    (and, when `allow_short` is True, a SELL opens a short one); an open position is closed by the
+    first opposite trade; further trades in the direction of the open position are ignored.
+
+    Consecutive trades with the same action form a run, and only run boundaries can close a
+    position, so the state machine reduces to one flag per run ("does this run start with a close").
+    Without shorts, runs simply alternate between opening and closing. With shorts, the trade after a
+    close opens again, so a run of two or more trades both closes and re-opens and the next run always
+    closes; otherwise runs alternate. Both cases are resolved with cumulative array operations.
+
+    Args:
+        symbols (array-like): Symbol of each trade, or None when all trades belong to one symbol.
+        is_buy (array-like): True for BUY trades, False for SELL trades.
+        prices (array-like): Execution price of each trade.
+        quantities (array-like): Quantity of each trade.
+        commissions (array-like): Commission of each trade, charged on the closing trade.
+        allow_short (bool, optional): Whether a SELL from flat opens a short position. Defaults to False.
+
+    Returns:
+        np.ndarray: Profit per trade (non-zero only on trades that close a position).
+    """
+    is_buy = np.asarray(is_buy, dtype=bool)
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    commissions = np.asarray(commissions, dtype=np.float64)
+    profit = np.zeros(len(prices))
+    if len(prices) == 0:
+        return profit
+
+    # Group trades by symbol while keeping each symbol's trades in their original order.
+    if symbols is None:
+        symbol_codes = np.zeros(len(prices), dtype=np.intp)
+    else:
+        symbol_codes = np.unique(np.asarray(symbols), return_inverse=True)[1].ravel()
+    order = np.argsort(symbol_codes, kind='stable')
+    codes = symbol_codes[order]
+    buys = is_buy[order]
+
+    symbol_start = np.ones(len(order), dtype=bool)
+    symbol_start[1:] = codes[1:] != codes[:-1]
+    run_start = symbol_start.copy()
+    run_start[1:] |= buys[1:] != buys[:-1]
+
+    # Runs are numbered globally; `first_run` marks the first run of every symbol.
+    run_rows = np.flatnonzero(run_start)
+    run_lengths = np.diff(np.append(run_rows, len(order)))
+    run_buys = buys[run_rows]
+    first_run = symbol_start[run_rows]
+    run_index = np.arange(len(run_rows))
+
+    if allow_short:
+        # A symbol's first run opens (anchored one run before it) and a run of two or more trades
+        # makes the following run a closing one (anchored on that run); in between, runs alternate.
+        anchor = np.full(len(run_rows), -len(run_rows) - 2)
+        reopening = np.flatnonzero(run_lengths[:-1] >= 2) + 1
+        anchor[reopening] = reopening
+        anchor[first_run] = run_index[first_run] - 1
+        anchor = np.maximum.accumulate(anchor)
+        is_close = (run_index - anchor) % 2 == 0
+        # The position closed by run j was opened at the first trade of run j - 1, or at its second
+        # trade when run j - 1 itself started with a close.
+        exit_runs = np.flatnonzero(is_close)
+        entry_rows = run_rows[exit_runs - 1] + is_close[exit_runs - 1]
+    else:
+        # Only BUY runs open, so a symbol's leading SELL run is skipped and runs then alternate.
+        run_id_of_first = np.maximum.accumulate(np.where(first_run, run_index, 0))
+        leading_sell = (~run_buys[first_run]).astype(int)[np.cumsum(first_run) - 1]
+        ordinal = run_index - run_id_of_first - leading_sell
+        exit_runs = np.flatnonzero((ordinal > 0) & (ordinal % 2 == 1))
+        entry_rows = run_rows[exit_runs - 1]
+
+    exit_rows = order[run_rows[exit_runs]]
+    entry_rows = order[entry_rows]
+
+    direction = np.where(is_buy[entry_rows], 1.0, -1.0)
+    profit_per_unit = (prices[exit_rows] - prices[entry_rows]) * direction
+    profit[exit_rows] = profit_per_unit * quantities[entry_rows] - commissions[exit_rows]
+    return profit
@@ -0,0 +1,191 @@
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from backtest_engine.parameter_sweep import ParameterSweep, _evaluate_batch
+from strategies.indicator_cache import IndicatorCache
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Full data set and its indicator cache in a walk-forward worker process, set once by `_init_worker`
+_worker_data = None
+_worker_cache = None
+
+
+def _init_worker(historical_data):
+    """Stores the full data set in the worker process and starts its indicator cache."""
+    global _worker_data, _worker_cache
+    _worker_data = historical_data
+    _worker_cache = IndicatorCache(historical_data)
+
+
+def walk_forward_windows(index, train_period, test_period, step=None, anchored=False):
+    """
+    Splits a time index into consecutive in-sample / out-of-sample windows.
+
+    Args:
+        index (pd.DatetimeIndex): Sorted timestamps of the data.
+        train_period (str or pd.Timedelta): Length of each training window (e.g. '180D').
+        test_period (str or pd.Timedelta): Length of each test window (e.g. '30D').
+        step (str or pd.Timedelta, optional): How far windows roll forward. Defaults to `test_period`.
+        anchored (bool, optional): If True, every training window starts at the beginning of the data
+                                   (expanding window); otherwise it rolls with the test window.
+
+    Returns:
+        list: One dictionary per window with 'window', 'train' and 'test' row slices and their
+              'train_start', 'train_end', 'test_start' and 'test_end' timestamps.
+    """
+    train_period = pd.Timedelta(train_period)
+    test_period = pd.Timedelta(test_period)
+    step = pd.Timedelta(step) if step is not None else test_period
+    if len(index) == 0:
+        return []
+
+    windows = []
+    first = index[0]
+    train_start = first
+    test_start = first + train_period
+    while test_start <= index[-1]:
+        test_end = test_start + test_period
+        train_rows = slice(index.searchsorted(first if anchored else train_start), index.searchsorted(test_start))
+        test_rows = slice(train_rows.stop, index.searchsorted(test_end))
+        if train_rows.stop > train_rows.start and test_rows.stop > test_rows.start:
+            windows.append({
+                "window": len(windows),
+                "train": train_rows,
+                "test": test_rows,
+                "train_start": index[train_rows.start],
+                "train_end": index[train_rows.stop - 1],
+                "test_start": index[test_rows.start],
+                "test_end": index[test_rows.stop - 1],
+            })
+        train_start += step
+        test_start += step
+    return windows
+
+
+def _evaluate_window(strategy_class, base_params, combinations, symbol, settings, window, rank_by, ascending,
+                     historical_data=None, cache=None):
+    """
+    Optimizes the parameters on a window's training rows and evaluates the best set on its test rows.
+
+    Indicators come from a cache over the full data set, so every window reuses the same series and the
+    test window sees indicators warmed up on the preceding history (they only look backwards).
+
+    Returns:
+        dict: The window's dates, best parameters, in-sample metric and out-of-sample performance.
+    """
+    if historical_data is None:
+        historical_data, cache = _worker_data, _worker_cache
+
+    train_data = historical_data.iloc[window["train"]]
+    test_data = historical_data.iloc[window["test"]]
+
+    in_sample = ParameterSweep.rank(
+        pd.DataFrame(_evaluate_batch(strategy_class, base_params, combinations, symbol, settings, train_data, cache)),
+        rank_by, ascending
+    )
+    result = {key: window[key] for key in ("window", "train_start", "train_end", "test_start", "test_end")}
+    if in_sample.empty or rank_by not in in_sample.columns or pd.isna(in_sample.loc[0, rank_by]):
+        logger.warning(f"No in-sample result for walk-forward window {window['window']}.")
+        return result
+
+    best_params = {name: in_sample.loc[0, name] for name in combinations[0]}
+    best_params = {name: value.item() if hasattr(value, "item") else value for name, value in best_params.items()}
+    out_of_sample = _evaluate_batch(strategy_class, base_params, [best_params], symbol, settings, test_data, cache)[0]
+
+    result["params"] = best_params
+    result[f"in_sample_{rank_by}"] = in_sample.loc[0, rank_by]
+    for key, value in out_of_sample.items():
+        if key not in best_params:
+            result[f"out_of_sample_{key}"] = value
+    return result
+
+
+class WalkForwardOptimizer:
+    """
+    Walk-forward optimization: optimize on each training window, evaluate on the following test window.
+
+    Windows either roll (fixed-length training window) or are anchored at the start of the data
+    (expanding training window). The data is loaded once and every window is a slice of it; the
+    indicator series are computed once on the full data and reused by all windows. Windows are
+    evaluated in parallel worker processes, each receiving the data once.
+    """
+    def __init__(self, strategy_class, param_grid, base_params=None, constraint=None, rank_by="total_profit",
+                 ascending=False):
+        """
+        Initializes the optimizer.
+
+        Args:
+            strategy_class (type): The class of the trading strategy.
+            param_grid (dict): Parameter name -> values to try (see `expand_param_grid`).
+            base_params (dict, optional): Fixed strategy parameters shared by every combination.
+            constraint (callable, optional): Predicate to skip invalid combinations.
+            rank_by (str, optional): In-sample metric used to pick the parameters. Defaults to 'total_profit'.
+            ascending (bool, optional): Whether lower `rank_by` is better. Defaults to False.
+        """
+        self.strategy_class = strategy_class
+        self.sweep = ParameterSweep(strategy_class, param_grid, base_params=base_params, constraint=constraint)
+        self.rank_by = rank_by
+        self.ascending = ascending
+
+    def run(self, historical_data, symbol, train_period, test_period, step=None, anchored=False, slippage=0.0,
+            commission=0.0, initial_capital=1000000, allow_short=False, max_workers=None):
+        """
+        Runs the walk-forward optimization.
+
+        Args:
+            historical_data (pd.DataFrame): OHLCV data indexed by timestamp, covering all windows.
+            symbol (str): The trading symbol.
+            train_period (str or pd.Timedelta): Length of each training window (e.g. '180D').
+            test_period (str or pd.Timedelta): Length of each test window (e.g. '30D').
+            step (str or pd.Timedelta, optional): How far windows roll forward. Defaults to `test_period`.
+            anchored (bool, optional): Use expanding (anchored) training windows. Defaults to False.
+            slippage (float, optional): Fractional slippage per trade. Defaults to 0.0.
+            commission (float, optional): Fractional commission per trade. Defaults to 0.0.
+            initial_capital (float, optional): The initial capital per run. Defaults to 1000000.
+            allow_short (bool, optional): Whether SELL from flat opens a short position. Defaults to False.
+            max_workers (int, optional): Worker processes; None uses all CPU cores, 1 runs in-process.
+
+        Returns:
+            pd.DataFrame: One row per window with the chosen parameters, the in-sample metric and the
+                          out-of-sample performance (columns prefixed with 'out_of_sample_').
+        """
+        combinations = self.sweep.combinations()
+        if not combinations or historical_data is None or historical_data.empty:
+            return pd.DataFrame()
+
+        windows = walk_forward_windows(historical_data.index, train_period, test_period, step, anchored)
+        if not windows:
+            logger.warning("The data is too short for a single walk-forward window.")
+            return pd.DataFrame()
+
+        settings = {
+            "slippage": slippage,
+            "commission": commission,
+            "initial_capital": initial_capital,
+            "allow_short": allow_short,
+        }
+        strategy_class, base_params = self.strategy_class, self.sweep.base_params
+        max_workers = min(max_workers or os.cpu_count() or 1, len(windows))
+        logger.info(f"Walk-forward over {len(windows)} {'anchored' if anchored else 'rolling'} windows with "
+                    f"{len(combinations)} parameter combinations on {max_workers} worker(s)")
+
+        if max_workers <= 1:
+            cache = IndicatorCache(historical_data)
+            results = [
+                _evaluate_window(strategy_class, base_params, combinations, symbol, settings, window,
+                                 self.rank_by, self.ascending, historical_data, cache)
+                for window in windows
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(historical_data,)) as pool:
+                futures = [
+                    pool.submit(_evaluate_window, strategy_class, base_params, combinations, symbol, settings,
+                                window, self.rank_by, self.ascending)
+                    for window in windows
+                ]
+                results = [future.result() for future in futures]
+
+        return pd.DataFrame(results)
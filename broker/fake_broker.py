@@ -0,0 +1,83 @@
+"""
+Local stand-in for the Fyers history API, for testing ingestion without network access.
+
+`FakeHistoryBroker.history()` accepts the same request dict as `FyersBroker.history()` and returns
+synthetic candles for the market session (09:15-15:30 IST, weekdays) in the Fyers response format.
+It simulates request latency, enforces the per-request window limits and a requests-per-second
+limit (answering with a Fyers-style error, like the real API), and counts the requests it served.
+
+Example:
+    from broker.fake_broker import FakeHistoryBroker
+    from data_ingestion.history_downloader import download_history
+
+    broker = FakeHistoryBroker(latency=0.2)
+    download_history(broker, conn, jobs)
+"""
+
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+# Per-request window limits of the Fyers history API, in days
+_MAX_DAYS = {"1D": 366, "D": 366}
+_INTRADAY_MAX_DAYS = 100
+
+
+class FakeHistoryBroker:
+    """Synthetic, rate-limited implementation of `history()`."""
+
+    def __init__(self, latency=0.1, requests_per_second=10, seed=0):
+        """
+        Args:
+            latency (float, optional): Seconds each request takes. Defaults to 0.1.
+            requests_per_second (int, optional): Requests accepted per second. Defaults to 10.
+            seed (int, optional): Seed of the synthetic prices. Defaults to 0.
+        """
+        self.latency = latency
+        self.requests_per_second = requests_per_second
+        self.seed = seed
+        self.requests = 0
+        self.rejected = 0
+        self._recent = []
+        self._lock = threading.Lock()
+
+    def _admit(self):
+        with self._lock:
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            if len(self._recent) >= self.requests_per_second:
+                self.rejected += 1
+                return False
+            self._recent.append(now)
+            self.requests += 1
+            return True
+
+    def history(self, data):
+        if not self._admit():
+            return {"s": "error", "code": 429, "message": "request limit reached"}
+        time.sleep(self.latency)
+
+        resolution = str(data["resolution"]).upper()
+        start, end = pd.Timestamp(data["range_from"]), pd.Timestamp(data["range_to"])
+        if (end - start).days + 1 > _MAX_DAYS.get(resolution, _INTRADAY_MAX_DAYS):
+            return {"s": "error", "code": -50, "message": "Invalid input: date range too large"}
+
+        if resolution in _MAX_DAYS:
+            index = pd.date_range(start, end, freq="D", tz="Asia/Kolkata")
+        else:
+            index = pd.date_range(start + pd.Timedelta("09:15:00"), end + pd.Timedelta("15:29:00"),
+                                  freq=f"{int(resolution)}min", tz="Asia/Kolkata")
+            minutes = index.hour * 60 + index.minute
+            index = index[(minutes >= 555) & (minutes < 930)]
+        index = index[index.dayofweek < 5]
+        if len(index) == 0:
+            return {"s": "no_data", "candles": []}
+
+        epochs = index.tz_convert("UTC").tz_localize(None).astype("datetime64[s]").astype(np.int64)
+        rng = np.random.default_rng((self.seed, int(epochs[0])))
+        close = 20000 + np.cumsum(rng.normal(0, 5, len(index)))
+        spread = np.abs(rng.normal(0, 3, len(index)))
+        candles = np.column_stack([epochs, close, close + spread, close - spread, close,
+                                   rng.integers(0, 1000, len(index))])
+        return {"s": "ok", "candles": candles.tolist()}
@@ -7,6 +7,7 @@ from typing import Any
 import pandas as pd
 from pathlib import Path
 from datetime import datetime, timedelta
+from utils.timestamp_utils import epoch_to_ist
 
 # Configure logging
 logging.basicConfig(
@@ -183,7 +184,7 @@ class Utility:
                 raise ValueError("Response does not contain 'candles' key")
 
             df = pd.DataFrame(response['candles'], columns=["epoch", "open", "high", "low", "close", "volume"])
-            df['timestamp'] = pd.to_datetime(df['epoch'], unit='s', utc=True).dt.tz_convert("Asia/Kolkata").dt.tz_localize(None)
+            df['timestamp'] = epoch_to_ist(df['epoch'])
             df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
             df['volume'] = df['volume'].fillna(0)
             df.drop_duplicates(inplace=True)
@@ -3,6 +3,7 @@ from dash import dcc, html, Input, Output, dash_table
 import pandas as pd
 import json
 import plotly.graph_objs as go
+from utils.timestamp_utils import to_ist_naive
 
 # Load Backtest Results from JSON
 def load_backtest_results(filepath="backtest_results.json"):
@@ -143,7 +144,7 @@ def update_graphs(selected_strategy, selected_symbol, selected_timeframe):
         result = next((r for r in backtest_results if r["strategy"] == selected_strategy and r["symbol"] == selected_symbol and r["timeframe"] == selected_timeframe), None)
         if result and result["trades"]:
             df = pd.DataFrame(result["trades"])
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
+            df["timestamp"] = to_ist_naive(df["timestamp"])
             df = df.sort_values(by="timestamp")
             df["cumulative_profit"] = df["profit"].cumsum()
 
@@ -0,0 +1,132 @@
+"""
+Trading-Calendar-Aware Gap Detection for 1-Minute OHLC Tables
+
+The expected bars of a range are the session grid of `utils.trading_calendar.TradingCalendar`
+(weekdays minus exchange holidays, 09:15-15:29 IST), built as one NumPy array. The stored
+timestamps of the range are streamed out of the database as int64 microseconds with a single
+COPY, and the anti-join is a vectorized `np.isin`. Missing bars are merged into contiguous
+ranges, and those into session-date windows a history request can fetch:
+
+    missing = find_missing_bars(conn, "fno.nifty50_1m", "2024-01-01", "2024-12-31", calendar)
+    gaps = gaps_to_ranges(missing)                   # [(first missing bar, last missing bar), ...]
+    windows = gap_date_windows(gaps, calendar)       # [('2024-03-04', '2024-03-06'), ...]
+"""
+
+import io
+import numpy as np
+import pandas as pd
+from database import watermark_catalog
+from utils.timestamp_utils import IST_OFFSET_SECONDS
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+
+def stored_timestamps(conn, table, start, end):
+    """
+    Reads a table's timestamps in [start, end] as IST wall time.
+
+    Args:
+        conn: An open psycopg2 connection.
+        table (str): The qualified table.
+        start, end (str or datetime): The range, IST wall time.
+
+    Returns:
+        np.ndarray: Sorted datetime64[us] timestamps.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(watermark_catalog.timestamp_type_query(), (table,))
+        timezone_aware = "with time zone" in cursor.fetchone()[0]
+        # Naive tables hold IST wall time already; timestamptz tables are shifted from UTC
+        shift = IST_OFFSET_SECONDS if timezone_aware else 0
+        bound = "(%s::timestamp - interval '5 hours 30 minutes') AT TIME ZONE 'UTC'" if timezone_aware else "%s::timestamp"
+        query = cursor.mogrify(
+            f"SELECT ((extract(epoch FROM timestamp) + {shift}) * 1000000)::int8 FROM {table} "
+            f"WHERE timestamp >= {bound} AND timestamp <= {bound} ORDER BY timestamp",
+            (str(pd.Timestamp(start)), str(pd.Timestamp(end))),
+        ).decode()
+        buffer = io.StringIO()
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT", buffer)
+    conn.commit()
+    return np.array(buffer.getvalue().split(), dtype=np.int64).astype("datetime64[us]")
+
+
+def find_missing_bars(conn, table, start, end, calendar, freq="1min"):
+    """
+    Bars the trading calendar expects in [start, end] that the table does not have.
+
+    Returns:
+        np.ndarray: Sorted datetime64[ns] bar starts (IST wall time).
+    """
+    grid = calendar.minute_grid(start, end, freq)
+    stored = stored_timestamps(conn, table, start, end).astype("datetime64[ns]")
+    return grid[~np.isin(grid, stored, assume_unique=True)]
+
+
+def gaps_to_ranges(missing, freq="1min"):
+    """
+    Merges missing bar starts into contiguous ranges.
+
+    Returns:
+        list: (first, last) pd.Timestamp pairs, both inclusive.
+    """
+    if len(missing) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(missing) != pd.Timedelta(freq).to_timedelta64())
+    firsts = missing[np.concatenate(([0], breaks + 1))]
+    lasts = missing[np.concatenate((breaks, [len(missing) - 1]))]
+    return [(pd.Timestamp(first), pd.Timestamp(last)) for first, last in zip(firsts, lasts)]
+
+
+def gap_date_windows(ranges, calendar):
+    """
+    Merges gap ranges into windows of consecutive trading sessions, for history requests.
+
+    Returns:
+        list: (range_from, range_to) 'YYYY-MM-DD' pairs, both inclusive.
+    """
+    if not ranges:
+        return []
+    first_day, last_day = ranges[0][0].normalize(), ranges[-1][1].normalize()
+    sessions = calendar.sessions(first_day, last_day)
+    touched = np.zeros(len(sessions), dtype=bool)
+    for first, last in ranges:
+        touched[sessions.searchsorted(first.normalize()):sessions.searchsorted(last.normalize(), "right")] = True
+
+    positions = np.flatnonzero(touched)
+    breaks = np.flatnonzero(np.diff(positions) != 1)
+    firsts = positions[np.concatenate(([0], breaks + 1))]
+    lasts = positions[np.concatenate((breaks, [len(positions) - 1]))]
+    return [(sessions[first].strftime("%Y-%m-%d"), sessions[last].strftime("%Y-%m-%d"))
+            for first, last in zip(firsts, lasts)]
+
+
+def detect_gaps(conn, table, calendar, start=None, end=None, freq="1min"):
+    """
+    Finds the missing bars of a table as contiguous ranges.
+
+    Args:
+        conn: An open psycopg2 connection.
+        table (str): The qualified table.
+        calendar (TradingCalendar): The exchange calendar.
+        start (str or datetime, optional): Defaults to the table's first timestamp (ingestion catalog).
+        end (str or datetime, optional): Defaults to the last completed bar (now, IST).
+        freq (str, optional): Bar width. Defaults to '1min'.
+
+    Returns:
+        list: (first, last) pd.Timestamp pairs of missing bars (IST wall time).
+    """
+    if start is None:
+        watermarks = watermark_catalog.get_watermarks(conn, tables=[table]) or \
+            watermark_catalog.seed_watermarks(conn, [table])
+        if table not in watermarks:
+            logger.warning(f"⚠️ {table} is empty; nothing to check.")
+            return []
+        start = watermarks[table]["first_timestamp"]
+    if end is None:
+        end = (pd.Timestamp.now(tz="Asia/Kolkata").tz_localize(None) - pd.Timedelta(freq)).floor(freq)
+
+    missing = find_missing_bars(conn, table, start, end, calendar, freq)
+    ranges = gaps_to_ranges(missing, freq)
+    logger.info(f"🔍 {table}: {len(missing)} missing bars in {len(ranges)} gaps between {start} and {end}.")
+    return ranges
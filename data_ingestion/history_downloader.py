@@ -0,0 +1,259 @@
+"""
+Concurrent, Rate-Limited Broker History Downloader
+
+Catching up OHLC tables used to request one day at a time, one symbol after another, blocking on
+every HTTP call. `HistoryDownloader` instead:
+
+- splits every (table, symbol, date range) job into the largest windows the resolution allows per
+  history request (`MAX_WINDOW_DAYS`),
+- runs the requests concurrently in worker threads (the broker SDKs are synchronous), under
+  token-bucket limits matched to the Fyers API (`FYERS_RATE_LIMITS`), retrying rate-limited and
+  failed requests with backoff,
+- pipelines every fetched window through a bounded queue into the `BulkWriter` of its table, so
+  writing overlaps with downloading and memory stays bounded. Rows are validated while loading
+  (`data_ingestion.ohlc_validator`); invalid ones are quarantined instead of written.
+
+Any object with a Fyers-style `history(data)` method works as the broker, e.g.
+`broker.fake_broker.FakeHistoryBroker` for local testing.
+"""
+
+import time
+import asyncio
+import pandas as pd
+from database.bulk_writer import BulkWriter
+from data_ingestion.ohlc_validator import OHLCValidator
+from utils.timestamp_utils import epoch_to_ist, epoch_to_utc
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Fyers history API limits: 10 requests per second and 200 per minute
+FYERS_RATE_LIMITS = [(10, 1.0), (200, 60.0)]
+
+# Largest date range (in days) one Fyers history request accepts per resolution
+MAX_WINDOW_DAYS = {
+    "D": 366,
+    "1D": 366,
+    "5S": 30, "10S": 30, "15S": 30, "30S": 30, "45S": 30,
+}
+INTRADAY_MAX_WINDOW_DAYS = 100  # Minute resolutions ("1", "5", "60", ...)
+
+CANDLE_COLUMNS = ["epoc", "open", "high", "low", "close", "volume"]
+
+
+class TokenBucket:
+    """
+    Async token bucket allowing `capacity` requests per `period` seconds.
+
+    The bucket refills continuously and holds at most `burst` tokens. With the default burst of 1,
+    requests are spaced evenly, so no window of `period` seconds ever sees more than `capacity`
+    requests (a full initial burst could exceed the broker's sliding-window limit).
+    """
+    def __init__(self, capacity, period, burst=1):
+        self.rate = capacity / period
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """
+    Combines several token buckets (e.g. per second and per minute); a request takes one token from each.
+    """
+    def __init__(self, limits=None):
+        """
+        Args:
+            limits (list, optional): (requests, period in seconds) pairs. Defaults to the Fyers limits.
+        """
+        self.buckets = [TokenBucket(capacity, period) for capacity, period in (limits or FYERS_RATE_LIMITS)]
+
+    async def acquire(self):
+        for bucket in self.buckets:
+            await bucket.acquire()
+
+
+def history_windows(start_date, end_date, resolution):
+    """
+    Splits an inclusive date range into the largest windows one history request allows.
+
+    Args:
+        start_date (str or date): First date to fetch.
+        end_date (str or date): Last date to fetch (inclusive).
+        resolution (str): Broker resolution ('1', '5', '1D', ...).
+
+    Returns:
+        list: (range_from, range_to) pairs of 'YYYY-MM-DD' strings, both inclusive.
+    """
+    days = MAX_WINDOW_DAYS.get(resolution.upper(), INTRADAY_MAX_WINDOW_DAYS)
+    start, end = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+    windows = []
+    while start <= end:
+        window_end = min(start + pd.Timedelta(days=days - 1), end)
+        windows.append((start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d")))
+        start = window_end + pd.Timedelta(days=1)
+    return windows
+
+
+def candles_to_frame(candles, to_ist=False):
+    """
+    Converts Fyers candles ([epoch, open, high, low, close, volume]) to an OHLC DataFrame.
+
+    Args:
+        candles (list): The 'candles' of a history response.
+        to_ist (bool, optional): Store Asia/Kolkata wall time instead of UTC (both timezone-naive),
+                                 as the 1-minute tables do. Defaults to False.
+
+    Returns:
+        pd.DataFrame: Rows with 'timestamp' and OHLCV columns, sorted and de-duplicated.
+    """
+    df = pd.DataFrame(candles, columns=CANDLE_COLUMNS)
+    df["timestamp"] = epoch_to_ist(df["epoc"]) if to_ist else epoch_to_utc(df["epoc"])
+    df = df[["timestamp", "open", "high", "low", "close", "volume"]]
+    return df.drop_duplicates("timestamp").sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+class HistoryDownloader:
+    """
+    Downloads broker history for many jobs concurrently and bulk-writes it as it arrives.
+
+    A job is a dict with:
+        table (str): Target table, e.g. 'fno.nifty50_1m'.
+        symbol (str): Broker symbol.
+        resolution (str): Broker resolution ('1', '1D', ...).
+        start (str): First date to fetch; end (str): last date (inclusive).
+        to_ist (bool, optional): Store Asia/Kolkata wall time (see `candles_to_frame`).
+        transform (callable, optional): Applied to each fetched DataFrame before writing.
+    """
+    def __init__(self, broker, conn, rate_limiter=None, max_concurrency=8, retries=3, queue_size=16):
+        """
+        Initializes the downloader.
+
+        Args:
+            broker: An object with a Fyers-style `history(data)` method.
+            conn: A psycopg2 connection the fetched rows are written through.
+            rate_limiter (RateLimiter, optional): Request limiter. Defaults to the Fyers limits.
+            max_concurrency (int, optional): Requests in flight at once. Defaults to 8.
+            retries (int, optional): Retries per failed or rate-limited request. Defaults to 3.
+            queue_size (int, optional): Fetched windows buffered ahead of the writer. Defaults to 16.
+        """
+        self.broker = broker
+        self.conn = conn
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.queue_size = queue_size
+        self.writers = {}
+        self.requests = 0
+        self.failed = []
+
+    async def _fetch(self, job, range_from, range_to):
+        """Fetches one window, retrying errors with exponential backoff; returns candles or None."""
+        data = {
+            "symbol": job["symbol"],
+            "resolution": job["resolution"],
+            "date_format": "1",
+            "range_from": range_from,
+            "range_to": range_to,
+            "cont_flag": "1",
+        }
+        for attempt in range(self.retries + 1):
+            await self.rate_limiter.acquire()
+            self.requests += 1
+            try:
+                response = await asyncio.to_thread(self.broker.history, data=data)
+            except Exception as e:
+                response = {"s": "error", "message": str(e)}
+            if "candles" in response:
+                return response["candles"]
+            if response.get("s") == "no_data":
+                return []
+            if attempt < self.retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        logger.warning(f"⚠️ History request failed for {job['symbol']} {range_from}..{range_to}: {response}")
+        self.failed.append((job["table"], range_from, range_to))
+        return None
+
+    async def _fetch_window(self, job, window, semaphore, queue):
+        async with semaphore:
+            candles = await self._fetch(job, *window)
+        if candles:
+            df = candles_to_frame(candles, job.get("to_ist", False))
+            if job.get("transform"):
+                df = job["transform"](df)
+            await queue.put((job["table"], df))
+
+    async def _write(self, queue):
+        """Consumes fetched windows and writes them; runs until it receives None."""
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            table, df = item
+            try:
+                if table not in self.writers:
+                    self.writers[table] = BulkWriter(table, validator=OHLCValidator.for_table(table))
+                await asyncio.to_thread(self.writers[table].write, self.conn, df)
+            except Exception as e:
+                logger.error(f"❌ Error inserting data into {table}: {e}")
+                self.failed.append((table, str(df["timestamp"].min()), str(df["timestamp"].max())))
+
+    async def download(self, jobs):
+        """
+        Runs all jobs.
+
+        Args:
+            jobs (list): Job dicts (see the class docstring).
+
+        Returns:
+            dict: Table -> number of new rows written.
+        """
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        writer_task = asyncio.create_task(self._write(queue))
+
+        fetches = [
+            self._fetch_window(job, window, semaphore, queue)
+            for job in jobs
+            for window in history_windows(job["start"], job["end"], job["resolution"])
+        ]
+        fetching = asyncio.gather(*fetches)
+        try:
+            await asyncio.wait({fetching, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+            if writer_task.done():
+                # The writer died: stop the fetchers, which would otherwise block on the full queue
+                fetching.cancel()
+                await asyncio.gather(fetching, return_exceptions=True)
+                writer_task.result()  # Re-raises the writer's error
+            await fetching
+        finally:
+            if not writer_task.done():
+                await queue.put(None)
+                await writer_task
+
+        elapsed = time.perf_counter() - started
+        rows = sum(writer.rows_written for writer in self.writers.values())
+        logger.info(f"✅ Downloaded {rows} rows with {self.requests} requests in {elapsed:.1f}s "
+                    f"({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+        return {table: writer.rows_inserted for table, writer in self.writers.items()}
+
+
+def download_history(broker, conn, jobs, **kwargs):
+    """
+    Synchronous entry point: runs `HistoryDownloader(broker, conn, **kwargs).download(jobs)`.
+    """
+    downloader = HistoryDownloader(broker, conn, **kwargs)
+    return asyncio.run(downloader.download(jobs)), downloader.failed
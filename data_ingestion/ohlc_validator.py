@@ -0,0 +1,168 @@
+"""
+Vectorized OHLC Row Validation
+
+`OHLCValidator.check()` flags every row of a frame with a bit mask of the problems found, using
+whole-column NumPy operations:
+
+- INVALID_RANGE   high < low, or open / close outside [low, high]
+- NON_POSITIVE    a zero, negative or missing price
+- SPIKE           close-to-close move or bar range above `spike_threshold` (a fraction)
+- DUPLICATE       the same timestamp as an earlier row
+- OUT_OF_ORDER    a timestamp earlier than the previous row's
+- OFF_SESSION     an intraday bar outside the trading sessions (`utils.trading_calendar`)
+
+Rows with a flag in `QUARANTINE_FLAGS` are unusable and are kept out of the table; spikes and
+out-of-order rows are plausible data and are only flagged. Off-session bars are only flagged too:
+the calendar does not know special sessions (Saturday sessions, Muhurat trading on holidays), so
+real bars can fall outside it. Both are recorded in
+`ohlc_anomalies` (`database/migrations/006_ohlc_anomalies.sql`).
+
+`BulkWriter(table, validator=OHLCValidator.for_table(table))` validates inline while loading, and
+`data_ingestion/update/validate_data.py` validates stored rows past each table's watermark.
+"""
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+from database.watermark_catalog import read_migration
+from utils.trading_calendar import TradingCalendar
+from utils.timestamp_utils import to_ist_naive
+
+INVALID_RANGE = 1
+NON_POSITIVE = 2
+SPIKE = 4
+DUPLICATE = 8
+OUT_OF_ORDER = 16
+OFF_SESSION = 32
+
+FLAG_NAMES = {
+    INVALID_RANGE: "invalid_range",
+    NON_POSITIVE: "non_positive",
+    SPIKE: "spike",
+    DUPLICATE: "duplicate",
+    OUT_OF_ORDER: "out_of_order",
+    OFF_SESSION: "off_session",
+}
+QUARANTINE_FLAGS = INVALID_RANGE | NON_POSITIVE | DUPLICATE
+
+ANOMALY_TABLE = "public.ohlc_anomalies"
+ANOMALY_MIGRATION = "006_ohlc_anomalies.sql"
+ANOMALY_COLUMNS = ["table_name", "timestamp", "open", "high", "low", "close", "volume", "reasons", "quarantined"]
+_RECORD = (f"INSERT INTO {ANOMALY_TABLE} ({', '.join(ANOMALY_COLUMNS)}) VALUES {{values}} "
+           f"ON CONFLICT (table_name, timestamp) DO UPDATE SET reasons = EXCLUDED.reasons, "
+           f"quarantined = EXCLUDED.quarantined, detected_at = now()")
+
+
+def describe(reasons):
+    """Names of the flags set in a bit mask."""
+    return [name for flag, name in FLAG_NAMES.items() if reasons & flag]
+
+
+class OHLCValidator:
+    """
+    Vectorized row checks for OHLC frames.
+    """
+    def __init__(self, calendar=None, spike_threshold=0.05, check_session=True):
+        """
+        Args:
+            calendar (TradingCalendar, optional): Session calendar. Defaults to NSE.
+            spike_threshold (float, optional): Largest plausible move within / between bars. Defaults to 0.05.
+            check_session (bool, optional): Flag bars outside the sessions (intraday tables only).
+                                            Defaults to True.
+        """
+        self.calendar = calendar or (TradingCalendar.from_config() if check_session else None)
+        self.spike_threshold = spike_threshold
+        self.check_session = check_session
+
+    @classmethod
+    def for_table(cls, table, **kwargs):
+        """A validator for a table; session checks apply to the 1-minute tables only."""
+        return cls(check_session=table.lower().endswith("_1m"), **kwargs)
+
+    def check(self, df, previous=None):
+        """
+        Flags the rows of a frame.
+
+        Args:
+            df (pd.DataFrame): Rows with 'timestamp' and OHLC columns, in load / storage order.
+            previous (tuple, optional): (timestamp, close) of the row before the frame, so checks
+                                        continue across chunks.
+
+        Returns:
+            np.ndarray: int32 bit mask per row (0 = valid).
+        """
+        rows = len(df)
+        flags = np.zeros(rows, dtype=np.int32)
+        if rows == 0:
+            return flags
+
+        o, h, l, c = (df[name].to_numpy(dtype=np.float64, na_value=np.nan) for name in ("open", "high", "low", "close"))
+        flags[(h < l) | (o < l) | (o > h) | (c < l) | (c > h)] |= INVALID_RANGE
+        with np.errstate(invalid="ignore"):
+            prices = np.column_stack((o, h, l, c))
+            flags[~(prices > 0).all(axis=1)] |= NON_POSITIVE
+
+            previous_close = np.concatenate(([np.nan if previous is None else previous[1]], c[:-1]))
+            move = np.abs(c / previous_close - 1)
+            bar_range = (h - l) / l
+            flags[(move > self.spike_threshold) | (bar_range > self.spike_threshold)] |= SPIKE
+
+        timestamps = to_ist_naive(pd.Series(df["timestamp"]).reset_index(drop=True))
+        values = timestamps.to_numpy(dtype="datetime64[ns]")
+        previous_timestamp = np.datetime64("NaT", "ns") if previous is None else \
+            to_ist_naive(pd.Series([previous[0]])).to_numpy(dtype="datetime64[ns]")[0]
+        before = np.concatenate(([previous_timestamp], values[:-1]))
+        flags[values < before] |= OUT_OF_ORDER
+        flags[timestamps.duplicated().to_numpy() | (values == previous_timestamp)] |= DUPLICATE
+
+        if self.check_session:
+            flags[~self.calendar.in_session(values)] |= OFF_SESSION
+        return flags
+
+    @staticmethod
+    def quarantined(flags):
+        """Mask of the rows to keep out of the table."""
+        return (flags & QUARANTINE_FLAGS) != 0
+
+    @staticmethod
+    def anomaly_records(table, df, flags, quarantined):
+        """
+        Rows for `ohlc_anomalies` (timestamps of timezone-aware frames in UTC).
+
+        Args:
+            quarantined (np.ndarray or bool): Whether each flagged row is withheld from the table.
+        """
+        flagged = flags != 0
+        if not flagged.any():
+            return []
+        rows = df[flagged]
+        timestamps = pd.to_datetime(rows["timestamp"])
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_convert(None)
+        volume = rows["volume"] if "volume" in rows else pd.Series(0, index=rows.index)
+        quarantined = np.broadcast_to(quarantined, flags.shape)[flagged]
+        records = {}
+        for timestamp, prices, size, reasons, withheld in zip(
+                timestamps, rows[["open", "high", "low", "close"]].itertuples(index=False), volume,
+                flags[flagged], quarantined):
+            if timestamp in records:  # Duplicates: one record per timestamp with all reasons
+                reasons |= records[timestamp][7]
+            records[timestamp] = (table, timestamp.to_pydatetime(),
+                                  *(None if pd.isna(value) else float(value) for value in prices),
+                                  None if pd.isna(size) else int(size), int(reasons), bool(withheld))
+        return list(records.values())
+
+    @staticmethod
+    def record(cursor, records):
+        """Writes anomaly records through a psycopg2 cursor (in the caller's transaction)."""
+        if records:
+            cursor.execute(read_migration(ANOMALY_MIGRATION))
+            execute_values(cursor, _RECORD.format(values="%s"), records)
+
+    @staticmethod
+    async def record_async(conn, records):
+        """Writes anomaly records through an asyncpg connection (in the caller's transaction)."""
+        if records:
+            await conn.execute(read_migration(ANOMALY_MIGRATION))
+            placeholders = ", ".join(f"${i + 1}" for i in range(len(ANOMALY_COLUMNS)))
+            await conn.executemany(_RECORD.format(values=f"({placeholders})"), records)
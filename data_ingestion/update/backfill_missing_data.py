@@ -1,81 +1,119 @@
 """
 🔹 update/backfill_missing_data.py (Fill Missing Data in TimescaleDB)
 This script finds missing timestamps and fills gaps using historical data from an API or another source.
+
+Missing bars are found against the NSE/BSE session calendar (`data_ingestion.gap_detector`), so
+nights, weekends and holidays are never reported. The gaps of all tables are merged into
+session-date windows, downloaded concurrently under the broker rate limits and bulk-written
+(`data_ingestion.history_downloader`). The backfilled ranges are then re-copied into the Parquet
+mirror and dropped from the segment cache (`sync_parquet_mirror.refresh_ranges`).
+
+Usage:
+    python -m data_ingestion.update.backfill_missing_data                       # every fno.*_1m table
+    python -m data_ingestion.update.backfill_missing_data fno.nifty50_1m --since 2024-01-01
 """
 
-import psycopg2
-from datetime import datetime, timedelta
-
-# Database connection config
-TIMESCALE_CONFIG = {
-    "host": "your_host",
-    "port": "your_port",
-    "dbname": "your_database",
-    "user": "your_user",
-    "password": "your_password"
-}
-
-
-def get_last_record_timestamp():
-    """Fetch the last stored timestamp from the database."""
-    query = "SELECT MAX(timestamp) FROM nifty50.nifty50_1m;"
-    try:
-        conn = psycopg2.connect(**TIMESCALE_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute(query)
-        last_timestamp = cursor.fetchone()[0]
-        cursor.close()
-        conn.close()
-        return last_timestamp
-    except psycopg2.Error as e:
-        print(f"❌ TimescaleDB Error: {e}")
-        return None
-
-
-def backfill_missing_data(fetch_data_func):
+import argparse
+import asyncio
+import yaml
+from utils.config_loader import load_config
+from broker.broker_factory import BrokerFactory
+from utils.trading_calendar import TradingCalendar
+from database.timescale_handler import TimescaleDBHandler
+from database.watermark_catalog import get_watermarks, seed_watermarks
+from data_ingestion.gap_detector import detect_gaps, gap_date_windows
+from data_ingestion.history_downloader import download_history
+from data_ingestion.update.sync_parquet_mirror import refresh_ranges
+
+
+def get_last_record_timestamp(table="fno.nifty50_1m"):
+    """Fetch the last stored timestamp of a table from the ingestion catalog."""
+    with TimescaleDBHandler() as handler:
+        watermarks = get_watermarks(handler.conn, tables=[table]) or seed_watermarks(handler.conn, [table])
+    return watermarks[table]["last_timestamp"] if table in watermarks else None
+
+
+def _fyers_symbols():
+    """Table base name (e.g. 'nifty50') -> Fyers symbol, from config.yaml."""
+    with open(load_config(), "r") as file:
+        config = yaml.safe_load(file)
+    return {name.lower(): symbol for name, symbol in config['trading_symbols']['fyers'].items()}
+
+
+def backfill_missing_data(broker=None, tables=None, since=None, until=None, exchange="NSE", symbols=None):
     """
     Backfills missing 1-minute OHLC data.
-    `fetch_data_func` should be a function that retrieves missing data from an API.
+
+    Args:
+        broker (optional): An object with a Fyers-style `history()`. Defaults to the configured broker.
+        tables (list, optional): Qualified 1-minute tables. Defaults to every fno.*_1m table in the catalog.
+        since (str, optional): First date to check. Defaults to each table's first timestamp.
+        until (str, optional): Last timestamp to check. Defaults to the last completed minute.
+        exchange (str, optional): Calendar to check against. Defaults to 'NSE'.
+        symbols (dict, optional): Table -> broker symbol. Defaults to the Fyers symbols of config.yaml.
+
+    Returns:
+        dict: Table -> number of rows inserted.
     """
-    last_timestamp = get_last_record_timestamp()
-    if last_timestamp is None:
-        print("⚠️ No data found in the database. Full ingestion needed.")
-        return
+    calendar = TradingCalendar.from_config(exchange)
+    symbols = symbols or {}
+    fyers_symbols = None
 
-    current_time = datetime.utcnow()
+    with TimescaleDBHandler() as handler:
+        tables = tables or list(get_watermarks(handler.conn, schema='fno', suffix='_1m'))
 
-    # Generate missing timestamps
-    missing_timestamps = []
-    while last_timestamp < current_time - timedelta(minutes=1):
-        last_timestamp += timedelta(minutes=1)
-        missing_timestamps.append(last_timestamp)
+        jobs = []
+        for table in tables:
+            gaps = detect_gaps(handler.conn, table, calendar, since, until)
+            if not gaps:
+                print(f"✅ No missing data detected in {table}.")
+                continue
 
-    if not missing_timestamps:
-        print("✅ No missing data detected.")
-        return
+            symbol = symbols.get(table)
+            if symbol is None:
+                fyers_symbols = fyers_symbols or _fyers_symbols()
+                symbol = fyers_symbols.get(table.split(".")[-1].rsplit("_", 1)[0].lower())
+            if symbol is None:
+                print(f'⚠️ No broker symbol for "{table}"; skipping {len(gaps)} gaps.')
+                continue
 
-    print(f"⚠️ Missing {len(missing_timestamps)} records. Fetching data...")
+            windows = gap_date_windows(gaps, calendar)
+            print(f"⚠️ {table}: {len(gaps)} gaps, fetching {len(windows)} date windows...")
+            jobs += [{
+                "table": table,
+                "symbol": symbol,
+                "resolution": "1",
+                "start": range_from,
+                "end": range_to,
+                "to_ist": True,
+            } for range_from, range_to in windows]
 
-    # Fetch missing OHLC data from an API
-    missing_data = fetch_data_func(missing_timestamps)
+        if not jobs:
+            return {}
+
+        broker = broker or BrokerFactory.get_broker()
+        inserted, failed = download_history(broker, handler.conn, jobs)
+
+    backfilled = {}
+    for job in jobs:
+        if inserted.get(job["table"]):
+            first, last = backfilled.get(job["table"], (job["start"], job["end"]))
+            backfilled[job["table"]] = (min(first, job["start"]), max(last, job["end"]))
+    if backfilled:
+        asyncio.run(refresh_ranges(backfilled))
+
+    for table, rows in inserted.items():
+        print(f"✅ Backfilled {rows} missing records into {table}.")
+    for table, range_from, range_to in failed:
+        print(f"❌ Could not backfill {table} for {range_from} - {range_to}; rerun to retry.")
+    return inserted
 
-    # Insert missing data
-    insert_query = """
-        INSERT INTO nifty50.nifty50_1m (timestamp, open, high, low, close, volume)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON CONFLICT (timestamp) DO NOTHING;
-    """
 
-    try:
-        conn = psycopg2.connect(**TIMESCALE_CONFIG)
-        cursor = conn.cursor()
-        cursor.executemany(insert_query, missing_data)
-        conn.commit()
-        print(f"✅ Backfilled {len(missing_data)} missing records.")
-        cursor.close()
-        conn.close()
-    except psycopg2.Error as e:
-        print(f"❌ TimescaleDB Error: {e}")
-
-# Example usage (pass a function that fetches missing data)
-# backfill_missing_data(your_fetch_function)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill missing 1-minute bars from the broker.")
+    parser.add_argument("tables", nargs="*")
+    parser.add_argument("--since", help="First date to check (default: each table's first timestamp)")
+    parser.add_argument("--until", help="Last timestamp to check (default: now)")
+    parser.add_argument("--exchange", default="NSE")
+    args = parser.parse_args()
+    backfill_missing_data(tables=args.tables or None, since=args.since, until=args.until, exchange=args.exchange)
@@ -1,49 +1,33 @@
 """
 🔹 update/resample_data.py (Resample 1-Minute Data to Higher Intervals)
 Converts 1m data into 5m, 15m, 1h intervals.
+
+Only the buckets touched since the last run are rebuilt, aligned to the 09:15 IST session open
+(see `database.resample_manager`), so a nightly refresh costs seconds regardless of history length.
+
+Usage:
+    python -m data_ingestion.update.resample_data                  # every fno.*_1m table
+    python -m data_ingestion.update.resample_data fno.nifty50_1m
 """
 
-import psycopg2
-
-# Database connection config
-TIMESCALE_CONFIG = {
-    "host": "your_host",
-    "port": "your_port",
-    "dbname": "your_database",
-    "user": "your_user",
-    "password": "your_password"
-}
-
-def resample_ohlc(interval="5m"):
-    """Resample 1m OHLC data into 5m, 15m, or 1h intervals."""
-    interval_map = {"5m": "5 minutes", "15m": "15 minutes", "1h": "1 hour"}
-    if interval not in interval_map:
-        print("❌ Invalid interval. Choose '5m', '15m', or '1h'.")
-        return
-
-    query = f"""
-    INSERT INTO nifty50.nifty50_{interval} (timestamp, open, high, low, close, volume)
-    SELECT time_bucket('{interval_map[interval]}', timestamp) AS timestamp,
-           first(open, timestamp) AS open,
-           MAX(high) AS high,
-           MIN(low) AS low,
-           last(close, timestamp) AS close,
-           SUM(volume) AS volume
-    FROM nifty50.nifty50_1m
-    GROUP BY timestamp
-    ORDER BY timestamp;
-    """
-
-    try:
-        conn = psycopg2.connect(**TIMESCALE_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute(query)
-        conn.commit()
-        print(f"✅ Resampled data to {interval}.")
-        cursor.close()
-        conn.close()
-    except psycopg2.Error as e:
-        print(f"❌ TimescaleDB Error: {e}")
-
-# Example usage
-# resample_ohlc("5m")
+import sys
+from database.timescale_handler import TimescaleDBHandler
+from database.resample_manager import ResampleManager
+
+
+def resample_ohlc(tables=None, schema="fno"):
+    """Refresh the 5m, 15m and 1h tables of the given (or all) 1m tables."""
+    with TimescaleDBHandler() as handler:
+        manager = ResampleManager(handler.conn)
+        if tables:
+            results = {table: manager.refresh(table) for table in tables}
+        else:
+            results = manager.refresh_all(schema)
+
+    for source, written in results.items():
+        for target, bars in written.items():
+            print(f"✅ Resampled {source} -> {target}: {bars} bars rebuilt.")
+
+
+if __name__ == "__main__":
+    resample_ohlc(sys.argv[1:])
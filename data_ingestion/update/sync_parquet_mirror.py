@@ -0,0 +1,78 @@
+"""
+🔹 update/sync_parquet_mirror.py (Sync the Local Parquet Mirror)
+Copies new rows of the 1-minute OHLC tables into the local Parquet mirror used by the backtests.
+
+`refresh_ranges` is called after rows were added or deleted in the past (backfills, quarantined
+rows): it re-copies the affected months of the mirror and drops the affected days from the
+segment cache (`database.segment_cache`), which would otherwise keep serving the old rows.
+
+Usage:
+    python -m data_ingestion.update.sync_parquet_mirror nifty50_1m sensex_1m
+"""
+
+import sys
+import yaml
+import asyncio
+import pandas as pd
+from dotenv import load_dotenv
+from utils.env_loader import load_env
+from utils.config_loader import load_config
+from database.handler import DatabaseHandler
+from database.parquet_mirror import ParquetMirror
+from utils.logger import setup_logging, get_logger
+
+load_dotenv(load_env())
+setup_logging()
+logger = get_logger(__name__)
+
+DEFAULT_TABLES = ["nifty50_1m", "sensex_1m"]
+DEFAULT_MIRROR_PATH = "data/parquet"
+
+
+def _open_handler():
+    """The configured database handler and its Parquet mirror."""
+    with open(load_config(), "r") as file:
+        config = yaml.safe_load(file)
+
+    db_type = config.get("database", {}).get("type", "timescaledb")
+    db_config = config.get("database", {}).get(db_type, {})
+    db_handler = DatabaseHandler(db_config)
+    return db_handler, db_handler.parquet_mirror or ParquetMirror(DEFAULT_MIRROR_PATH)
+
+
+async def sync_tables(tables, schema="fno"):
+    """Syncs the given tables from the configured database into the Parquet mirror."""
+    db_handler, mirror = _open_handler()
+    try:
+        for table in tables:
+            await mirror.sync(db_handler, table, schema)
+    finally:
+        await db_handler.close()
+
+
+async def refresh_ranges(ranges):
+    """
+    Re-copies changed ranges into the Parquet mirror and drops them from the segment cache.
+
+    Args:
+        ranges (dict): Qualified table -> (first, last) changed timestamp or date, in the catalog's
+                       form. Both ends are widened by a day, so IST session dates also cover the
+                       UTC days of timestamptz tables.
+    """
+    db_handler, mirror = _open_handler()
+    try:
+        for table, (first, last) in ranges.items():
+            schema, table_name = table.split(".", 1)
+            start, end = pd.Timestamp(first) - pd.Timedelta(days=1), pd.Timestamp(last) + pd.Timedelta(days=1)
+            await mirror.resync(db_handler, table_name, start, end, schema)
+            try:
+                for cached_name in (table, table_name):
+                    await db_handler.invalidate_cached_days(cached_name, start, end)
+            except Exception as e:
+                logger.warning(f"Could not drop cached days of {table} from {start} to {end}: {e}")
+    finally:
+        await db_handler.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(sync_tables(sys.argv[1:] or DEFAULT_TABLES))
@@ -1,42 +1,174 @@
 """
 🔹 update/validate_data.py (Check for Inconsistent Data)
-Ensures high > low and open/close within high-low.
+Checks stored OHLC rows with the vectorized checks of `data_ingestion.ohlc_validator`: high/low
+range, zero or negative prices, spikes, duplicate and out-of-order timestamps and off-session bars.
+
+Only rows past each table's `last_validated` watermark (ingestion catalog, see
+`database.watermark_catalog`) are read, streamed in chunks through a server-side cursor, and the
+tables are validated in parallel with one connection each. Rows loaded through a `BulkWriter` with
+a validator are checked inline and advance the watermark themselves, so this only has to catch up
+on rows loaded some other way. Findings are recorded in `ohlc_anomalies`; with `--quarantine`,
+rows that can never be valid (see `QUARANTINE_FLAGS`) are also deleted, and the affected ranges
+are re-copied into the Parquet mirror and dropped from the segment cache.
+
+Usage:
+    python -m data_ingestion.update.validate_data                      # every OHLC table of fno
+    python -m data_ingestion.update.validate_data fno.nifty50_1m --quarantine
 """
 
-import psycopg2
-
-# Database connection config
-TIMESCALE_CONFIG = {
-    "host": "your_host",
-    "port": "your_port",
-    "dbname": "your_database",
-    "user": "your_user",
-    "password": "your_password"
-}
-
-def validate_ohlc_data():
-    """Check for OHLC violations in TimescaleDB."""
-    query = """
-    SELECT * FROM nifty50.nifty50_1m
-    WHERE high <= low OR open < low OR open > high OR close < low OR close > high;
+import time
+import asyncio
+import argparse
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from database.timescale_handler import TimescaleDBHandler
+from database.watermark_catalog import (CATALOG_TABLE, get_watermarks, mark_validated, seed_watermarks,
+                                        timestamp_type_query, watermark_expression)
+from data_ingestion.ohlc_validator import OHLCValidator, QUARANTINE_FLAGS
+from data_ingestion.update.sync_parquet_mirror import refresh_ranges
+
+CHUNK_ROWS = 100_000
+COLUMNS = ["ctid", "timestamp", "open", "high", "low", "close", "volume"]
+
+
+def _catalog_timestamp(value):
+    """A stored timestamp in the catalog's form (timestamptz as UTC, naive as is)."""
+    value = pd.Timestamp(value)
+    return value.tz_convert(None).to_pydatetime() if value.tz is not None else value.to_pydatetime()
+
+
+def _quarantine(cursor, table, timestamp_type, rows):
+    """Deletes rows by (timestamp, ctid) and takes them out of the table's catalog row."""
+    column = watermark_expression(timestamp_type).format("timestamp")
+    cursor.execute(
+        f"WITH deleted AS (DELETE FROM {table} WHERE (timestamp, ctid) IN "
+        f"(SELECT * FROM unnest(%s::{timestamp_type}[], %s::tid[])) RETURNING {column} AS timestamp) "
+        f"UPDATE {CATALOG_TABLE} SET row_count = row_count - (SELECT count(*) FROM deleted), "
+        f"dirty_from = LEAST(dirty_from, (SELECT min(timestamp) FROM deleted)), "
+        f"dirty_to = GREATEST(dirty_to, (SELECT max(timestamp) FROM deleted)), updated_at = now() "
+        f"WHERE table_name = %s",
+        (list(rows["timestamp"].dt.to_pydatetime()), list(rows["ctid"]), table),
+    )
+
+
+def validate_table(table, quarantine=False, chunk_rows=CHUNK_ROWS):
+    """
+    Validates the rows of a table past its last validated timestamp.
+
+    Args:
+        table (str): The qualified table, e.g. 'fno.nifty50_1m'.
+        quarantine (bool, optional): Delete rows with a flag in `QUARANTINE_FLAGS`. Defaults to False.
+        chunk_rows (int, optional): Rows per chunk. Defaults to 100,000.
+
+    Returns:
+        dict: 'checked', 'flagged' and 'quarantined' row counts, and the 'quarantined_range' (first,
+              last) of the deleted timestamps, or None.
+    """
+    validator = OHLCValidator.for_table(table)
+    result = {"checked": 0, "flagged": 0, "quarantined": 0, "quarantined_range": None}
+    with TimescaleDBHandler() as handler:
+        conn = handler.conn
+        watermarks = get_watermarks(conn, tables=[table]) or seed_watermarks(conn, [table])
+        since = watermarks[table]["last_validated"] if table in watermarks else None
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(timestamp_type_query(), (table,))
+                timestamp_type = cursor.fetchone()[0]
+                bound = "(%s::timestamp AT TIME ZONE 'UTC')" if "with time zone" in timestamp_type else "%s::timestamp"
+                condition, params, previous = "", (), None
+                if since is not None:
+                    condition, params = f"WHERE timestamp > {bound}", (since,)
+                    # The last validated row carries the spike / duplicate checks across runs
+                    cursor.execute(f"SELECT timestamp, close FROM {table} WHERE timestamp <= {bound} "
+                                   f"ORDER BY timestamp DESC LIMIT 1", (since,))
+                    previous = cursor.fetchone()
+
+            last = None
+            with conn.cursor(name=f"validate_{table.replace('.', '_')}") as stream, conn.cursor() as cursor:
+                stream.itersize = chunk_rows
+                stream.execute(f"SELECT {', '.join(COLUMNS)} FROM {table} {condition} ORDER BY timestamp", params)
+                while True:
+                    rows = stream.fetchmany(chunk_rows)
+                    if not rows:
+                        break
+                    df = pd.DataFrame(rows, columns=COLUMNS)
+                    flags = validator.check(df, previous)
+                    withheld = validator.quarantined(flags) if quarantine else False
+                    validator.record(cursor, validator.anomaly_records(table, df, flags, withheld))
+                    if quarantine and withheld.any():
+                        _quarantine(cursor, table, timestamp_type, df[withheld])
+                        result["quarantined"] += int(withheld.sum())
+                        deleted = df["timestamp"][withheld]  # Rows are read in timestamp order
+                        first = result["quarantined_range"][0] if result["quarantined_range"] else deleted.iloc[0]
+                        result["quarantined_range"] = (first, deleted.iloc[-1])
+                    result["checked"] += len(df)
+                    result["flagged"] += int((flags != 0).sum())
+                    previous = (df["timestamp"].iloc[-1], df["close"].iloc[-1])
+                    last = df["timestamp"].iloc[-1]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if last is not None:
+            mark_validated(conn, table, _catalog_timestamp(last))
+    return result
+
+
+def validate_ohlc_data(tables=None, schema="fno", quarantine=False, workers=4):
     """
-    try:
-        conn = psycopg2.connect(**TIMESCALE_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute(query)
-        invalid_rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        if invalid_rows:
-            print(f"⚠️ Found {len(invalid_rows)} invalid OHLC records.")
-            return invalid_rows
+    Validates several tables concurrently, each from its last validated timestamp.
+
+    Args:
+        tables (list, optional): Qualified tables. Defaults to every OHLC table of the schema.
+        schema (str, optional): Schema to list tables from. Defaults to 'fno'.
+        quarantine (bool, optional): Delete rows that can never be valid. Defaults to False.
+        workers (int, optional): Tables validated at once. Defaults to 4.
+
+    Returns:
+        dict: Table -> result of `validate_table` (failed tables are left out).
+    """
+    started = time.perf_counter()
+    if not tables:
+        with TimescaleDBHandler() as handler:
+            rows = handler.execute_query(
+                "SELECT table_schema || '.' || table_name FROM information_schema.columns "
+                "WHERE table_schema = %s AND column_name = 'close' ORDER BY table_name", (schema,))
+            tables = [row[0] for row in rows]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(validate_table, table, quarantine): table for table in tables}
+        for future in as_completed(futures):
+            table = futures[future]
+            try:
+                results[table] = future.result()
+            except Exception as e:
+                print(f"❌ Validation of {table} failed: {e}")
+
+    quarantined = {table: result["quarantined_range"] for table, result in results.items() if result["quarantined_range"]}
+    if quarantined:
+        asyncio.run(refresh_ranges(quarantined))
+
+    for table, result in sorted(results.items()):
+        if result["flagged"]:
+            print(f"⚠️ {table}: {result['flagged']} of {result['checked']} new rows flagged, "
+                  f"{result['quarantined']} quarantined.")
         else:
-            print("✅ Data is consistent.")
-            return []
-    except psycopg2.Error as e:
-        print(f"❌ TimescaleDB Error: {e}")
-        return []
-
-# Example usage
-# invalid_data = validate_ohlc_data()
+            print(f"✅ {table}: {result['checked']} new rows are consistent.")
+    elapsed = time.perf_counter() - started
+    checked = sum(result["checked"] for result in results.values())
+    print(f"⏱️ Validated {checked} rows of {len(results)} tables in {elapsed:.1f}s.")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate new OHLC rows past each table's watermark.")
+    parser.add_argument("tables", nargs="*")
+    parser.add_argument("--schema", default="fno")
+    parser.add_argument("--quarantine", action="store_true",
+                        help=f"Delete rows that can never be valid (flags {QUARANTINE_FLAGS})")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    validate_ohlc_data(args.tables or None, args.schema, args.quarantine, args.workers)
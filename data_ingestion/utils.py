@@ -46,11 +46,11 @@ You can import and use these modules in your main algorithmic trading script:
 
 
 # data_ingestion/utils.py
-from datetime import datetime
-import pytz
+from datetime import datetime, timedelta
+from utils.timestamp_utils import IST_OFFSET_SECONDS
 
 def convert_utc_to_ist(timestamp):
     """Convert UTC timestamp to IST."""
     utc_time = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-    ist_time = utc_time.astimezone(pytz.timezone("Asia/Kolkata"))
+    ist_time = utc_time + timedelta(seconds=IST_OFFSET_SECONDS)
     return ist_time.strftime("%Y-%m-%d %H:%M:%S")
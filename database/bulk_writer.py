@@ -0,0 +1,310 @@
+"""
+COPY-Protocol Bulk Writer for TimescaleDB / PostgreSQL
+
+Row-by-row `INSERT ... VALUES` through `executemany` costs one statement execution per row. The
+bulk writer instead loads rows into a temporary staging table with a binary COPY and merges them
+with one set-based statement:
+
+    CREATE TEMP TABLE stage (...) ON COMMIT DROP;
+    COPY stage FROM STDIN (FORMAT binary);
+    INSERT INTO target (...) SELECT ... FROM stage ON CONFLICT DO NOTHING;
+
+all in one transaction, so rows that already exist are skipped and a failed load leaves the target
+untouched. DataFrames, dicts of NumPy arrays and 2-D NumPy arrays are packed into the COPY payload
+with NumPy (`database.binary_copy.encode_copy_binary`), without a Python object per value.
+
+Every load also advances the table's row in the ingestion catalog (`database.watermark_catalog`) in
+the same statement, so watermarks and row counts never disagree with the data:
+
+    WITH inserted AS (INSERT INTO target ... ON CONFLICT DO NOTHING RETURNING timestamp),
+         batch AS (SELECT min(timestamp) AS lo, max(timestamp) AS hi, count(*) AS n FROM inserted)
+    INSERT INTO ingestion_metadata ... SELECT ... FROM batch ON CONFLICT (table_name) DO UPDATE ...
+
+`write()` works on a psycopg2 connection (the update scripts), `write_async()` on an asyncpg
+connection or pool, and `write_records_async()` loads arbitrary Python records through asyncpg's
+`copy_records_to_table` (used by `DatabaseHandler.batch_insert`).
+"""
+
+import io
+import time
+import numpy as np
+import pandas as pd
+from database.binary_copy import OHLC_KINDS, encode_copy_binary
+from database import watermark_catalog
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Staging column types per column kind
+STAGING_TYPES = {
+    'float': 'float8',
+    'int': 'int8',
+}
+
+
+class BulkWriter:
+    """
+    Loads rows into a table via COPY into a staging table and INSERT ... ON CONFLICT DO NOTHING.
+
+    Attributes:
+        rows_written (int): Rows loaded into the staging table.
+        rows_inserted (int): Rows actually added to the target (new rows only).
+        rows_quarantined (int): Rows the validator kept out of the target.
+        seconds (float): Total time spent in writes.
+    """
+    def __init__(self, table, kinds=None, batch_rows=500000, catalog=True, validator=None):
+        """
+        Initializes the writer.
+
+        Args:
+            table (str): The target table (e.g. 'fno.nifty50_1m').
+            kinds (dict, optional): Column name -> kind ('float', 'int' or 'timestamp') of the columns
+                                    to write. Defaults to the OHLC columns.
+            batch_rows (int, optional): Rows per COPY payload, to bound memory. Defaults to 500000.
+            catalog (bool, optional): Maintain the table's row in the ingestion catalog. Requires a
+                                      'timestamp' column. Defaults to True.
+            validator (optional): Validates DataFrame rows while loading, e.g.
+                                  `data_ingestion.ohlc_validator.OHLCValidator`. Quarantined rows are
+                                  not written; every flagged row is recorded in the same transaction.
+        """
+        self.table = table
+        self.kinds = kinds or OHLC_KINDS
+        self.batch_rows = batch_rows
+        self.staging_table = "_stage_" + table.replace(".", "_")
+        self.rows_written = 0
+        self.rows_inserted = 0
+        self.seconds = 0.0
+        self.catalog = catalog
+        self._watermark_column = None  # 'timestamp' converted for the catalog; set on first write
+        self.validator = validator
+        self.rows_quarantined = 0
+
+    @property
+    def rows_per_second(self):
+        """Average write throughput so far."""
+        return self.rows_written / self.seconds if self.seconds else 0.0
+
+    def _columns(self, data):
+        """
+        Normalizes the input to a dict of NumPy columns.
+
+        Timezone-aware timestamps are converted to UTC (and staged as timestamptz); naive
+        timestamps are written as they are (and staged as timestamp).
+
+        Returns:
+            tuple: (columns, aware) where `aware` tells whether the timestamps are timezone-aware.
+        """
+        if isinstance(data, np.ndarray) and data.ndim == 2:
+            data = dict(zip(self.kinds, data.T))
+        elif not isinstance(data, (pd.DataFrame, dict)):
+            data = pd.DataFrame(list(data), columns=list(self.kinds))
+
+        columns, aware = {}, False
+        for name, kind in self.kinds.items():
+            values = data[name]
+            if kind == 'timestamp':
+                values = pd.to_datetime(values if isinstance(values, pd.Series) else pd.Series(values))
+                if values.dt.tz is not None:
+                    aware = True
+                    values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+                values = values.to_numpy()
+            columns[name] = np.asarray(values)
+        return columns, aware
+
+    def _tracks_catalog(self, columns=None):
+        return self.catalog and "timestamp" in (columns or self.kinds)
+
+    def _prepare(self, cursor):
+        """Creates the catalog and looks up the target's timestamp type (psycopg2 cursor), once."""
+        if self._watermark_column is None:
+            cursor.execute(watermark_catalog.catalog_ddl())
+            cursor.execute(watermark_catalog.timestamp_type_query(), (self.table,))
+            self._watermark_column = watermark_catalog.watermark_expression(cursor.fetchone()[0]).format("timestamp")
+
+    async def _prepare_async(self, conn):
+        """Like `_prepare`, on an asyncpg connection."""
+        if self._watermark_column is None:
+            await conn.execute(watermark_catalog.catalog_ddl())
+            timestamp_type = await conn.fetchval(watermark_catalog.timestamp_type_query("$1"), self.table)
+            self._watermark_column = watermark_catalog.watermark_expression(timestamp_type).format("timestamp")
+
+    def _merge(self, names, placeholder):
+        """
+        The merge statement: a plain INSERT ... ON CONFLICT DO NOTHING, or, when the catalog is
+        maintained, the same INSERT in a CTE feeding the catalog upsert that returns the new row count.
+        """
+        insert = f"INSERT INTO {self.table} ({names}) SELECT {names} FROM {self.staging_table} ON CONFLICT DO NOTHING"
+        if self._watermark_column is None:
+            return insert
+        column = self._watermark_column
+        return (f"WITH inserted AS ({insert} RETURNING timestamp), "
+                f"batch AS (SELECT min({column}) AS lo, max({column}) AS hi, count(*) AS n FROM inserted), "
+                f"catalog AS ({watermark_catalog.watermark_upsert('batch', placeholder, self.validator is not None)}) "
+                f"SELECT n FROM batch")
+
+    def _statements(self, aware, like_target=False, columns=None, placeholder="%s"):
+        """The staging DDL, COPY and merge statements."""
+        names = ", ".join(columns or self.kinds)
+        if like_target:
+            create = f"CREATE TEMP TABLE {self.staging_table} (LIKE {self.table} INCLUDING DEFAULTS) ON COMMIT DROP"
+        else:
+            timestamp_type = "timestamptz" if aware else "timestamp"
+            definitions = ", ".join(
+                f"{name} {STAGING_TYPES.get(kind, timestamp_type)}" for name, kind in self.kinds.items()
+            )
+            create = f"CREATE TEMP TABLE {self.staging_table} ({definitions}) ON COMMIT DROP"
+        copy = f"COPY {self.staging_table} ({names}) FROM STDIN (FORMAT binary)"
+        return create, copy, self._merge(names, placeholder)
+
+    def _validate(self, data):
+        """
+        Runs the validator over the rows.
+
+        Returns:
+            tuple: (rows to write, anomaly records to store).
+        """
+        if self.validator is None:
+            return data, []
+        if isinstance(data, np.ndarray) and data.ndim == 2:
+            data = pd.DataFrame(data, columns=list(self.kinds))
+        elif not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame(data if isinstance(data, dict) else list(data), columns=list(self.kinds))
+        flags = self.validator.check(data)
+        quarantined = self.validator.quarantined(flags)
+        records = self.validator.anomaly_records(self.table, data, flags, quarantined)
+        if quarantined.any():
+            self.rows_quarantined += int(quarantined.sum())
+            logger.warning(f"⚠️ Quarantined {int(quarantined.sum())} invalid rows of {self.table}")
+        return data[~quarantined], records
+
+    def _payloads(self, columns):
+        """Binary COPY payloads of at most `batch_rows` rows each."""
+        rows = len(next(iter(columns.values())))
+        for start in range(0, rows, self.batch_rows):
+            batch = {name: values[start:start + self.batch_rows] for name, values in columns.items()}
+            yield encode_copy_binary(batch, self.kinds)
+
+    def _record(self, rows, inserted, started):
+        elapsed = time.perf_counter() - started
+        self.rows_written += rows
+        self.rows_inserted += inserted
+        self.seconds += elapsed
+        rate = rows / elapsed if elapsed else 0.0
+        logger.info(f"✅ Bulk loaded {rows} rows into {self.table} ({inserted} new) at {rate:,.0f} rows/s")
+        return inserted
+
+    def write(self, conn, data):
+        """
+        Writes rows through a psycopg2 connection and commits.
+
+        Args:
+            conn: An open psycopg2 connection.
+            data (pd.DataFrame, dict or np.ndarray): The rows, with (at least) the writer's columns.
+
+        Returns:
+            int: The number of new rows inserted.
+        """
+        started = time.perf_counter()
+        data, anomalies = self._validate(data)
+        columns, aware = self._columns(data)
+        rows = len(next(iter(columns.values())))
+        if rows == 0 and not anomalies:
+            return 0
+        try:
+            with conn.cursor() as cursor:
+                if anomalies:
+                    self.validator.record(cursor, anomalies)
+                inserted = 0
+                if rows:
+                    if self._tracks_catalog():
+                        self._prepare(cursor)
+                    create, copy, merge = self._statements(aware)
+                    cursor.execute(create)
+                    for payload in self._payloads(columns):
+                        cursor.copy_expert(copy, io.BytesIO(payload))
+                    if self._watermark_column is None:
+                        cursor.execute(merge)
+                        inserted = cursor.rowcount
+                    else:
+                        cursor.execute(merge, (self.table,))
+                        inserted = cursor.fetchone()[0]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return self._record(rows, inserted, started)
+
+    async def write_async(self, conn, data):
+        """
+        Writes rows through an asyncpg connection (or pool) in one transaction.
+
+        Args:
+            conn: An asyncpg connection or pool.
+            data (pd.DataFrame, dict or np.ndarray): The rows, with (at least) the writer's columns.
+
+        Returns:
+            int: The number of new rows inserted.
+        """
+        if hasattr(conn, "acquire"):
+            async with conn.acquire() as connection:
+                return await self.write_async(connection, data)
+
+        started = time.perf_counter()
+        data, anomalies = self._validate(data)
+        columns, aware = self._columns(data)
+        rows = len(next(iter(columns.values())))
+        if rows == 0 and not anomalies:
+            return 0
+        async with conn.transaction():
+            if anomalies:
+                await self.validator.record_async(conn, anomalies)
+            inserted = 0
+            if rows:
+                if self._tracks_catalog():
+                    await self._prepare_async(conn)
+                create, _, merge = self._statements(aware, placeholder="$1")
+                await conn.execute(create)
+                for payload in self._payloads(columns):
+                    await conn.copy_to_table(self.staging_table, source=io.BytesIO(payload),
+                                             columns=list(self.kinds), format='binary')
+                inserted = await self._execute_merge_async(conn, merge)
+        return self._record(rows, inserted, started)
+
+    async def write_records_async(self, conn, records, columns=None):
+        """
+        Writes Python records through asyncpg's `copy_records_to_table`.
+
+        The staging table copies the target's column types, so any column type asyncpg can encode
+        is supported.
+
+        Args:
+            conn: An asyncpg connection or pool.
+            records (list): Tuples in column order.
+            columns (list, optional): The record columns. Defaults to the writer's columns.
+
+        Returns:
+            int: The number of new rows inserted.
+        """
+        if hasattr(conn, "acquire"):
+            async with conn.acquire() as connection:
+                return await self.write_records_async(connection, records, columns)
+        if not records:
+            return 0
+
+        started = time.perf_counter()
+        columns = list(columns or self.kinds)
+        async with conn.transaction():
+            if self._tracks_catalog(columns):
+                await self._prepare_async(conn)
+            create, _, merge = self._statements(aware=False, like_target=True, columns=columns, placeholder="$1")
+            await conn.execute(create)
+            await conn.copy_records_to_table(self.staging_table, records=records, columns=columns)
+            inserted = await self._execute_merge_async(conn, merge)
+        return self._record(len(records), inserted, started)
+
+    async def _execute_merge_async(self, conn, merge):
+        """Runs the merge statement on asyncpg; returns the number of new rows."""
+        if self._watermark_column is None:
+            status = await conn.execute(merge)
+            return int(status.split()[-1])
+        return await conn.fetchval(merge, self.table)
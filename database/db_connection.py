@@ -6,8 +6,8 @@ import psycopg2
 import sqlalchemy
 import influxdb_client
 from dotenv import load_dotenv
-from psycopg2 import pool
 from influxdb_client.client.write_api import SYNCHRONOUS
+from database.pool_manager import get_pool_manager
 
 # Load environment variables
 load_dotenv()
@@ -16,6 +16,10 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 
+# SQLAlchemy engines by URL, shared by all connectors of the process
+_engines = {}
+
+
 class DatabaseConnector:
     """Handles connections to MySQL, TimescaleDB, and InfluxDB."""
 
@@ -40,17 +44,17 @@ class DatabaseConnector:
         self.influx_org = os.getenv("INFLUXDB_ORG", "my-org")
         self.influx_bucket = os.getenv("INFLUXDB_BUCKET", "trading")
 
-        # Connection pools
+        # Connection pools (TimescaleDB: the process-wide pool of database.pool_manager)
         self.ts_pool = None
 
     def get_mysql_engine(self):
-        """Return a SQLAlchemy engine for MySQL."""
+        """Return the SQLAlchemy engine for MySQL (one per process; engines pool their connections)."""
+        url = f"mysql+pymysql://{self.mysql_user}:{self.mysql_password}@{self.mysql_host}:{self.mysql_port}/{self.mysql_db}"
         try:
-            engine = sqlalchemy.create_engine(
-                f"mysql+pymysql://{self.mysql_user}:{self.mysql_password}@{self.mysql_host}:{self.mysql_port}/{self.mysql_db}"
-            )
-            logging.info("✅ MySQL connection established successfully!")
-            return engine
+            if url not in _engines:
+                _engines[url] = sqlalchemy.create_engine(url, pool_pre_ping=True)
+                logging.info("✅ MySQL connection established successfully!")
+            return _engines[url]
         except Exception as e:
             logging.error(f"❌ MySQL connection error: {e}")
             return None
@@ -73,34 +77,32 @@ class DatabaseConnector:
             return None
 
     def get_timescale_connection(self):
-        """Return a PostgreSQL connection for TimescaleDB."""
+        """Borrow a PostgreSQL connection for TimescaleDB; give it back with `release_timescale_connection`."""
+        ts_pool = self.get_timescale_pool()
+        if not ts_pool:
+            return None
         try:
-            connection = psycopg2.connect(
-                host=self.ts_host,
-                port=self.ts_port,
-                user=self.ts_user,
-                password=self.ts_password,
-                database=self.ts_db
-            )
-            logging.info("✅ Connected to TimescaleDB.")
-            return connection
-        except Exception as e:
+            return ts_pool.getconn()
+        except (psycopg2.Error, TimeoutError) as e:
             logging.error(f"❌ TimescaleDB connection error: {e}")
             return None
 
+    def release_timescale_connection(self, connection):
+        """Return a connection from `get_timescale_connection` to the pool."""
+        self.get_timescale_pool().putconn(connection)
+
     def get_timescale_pool(self):
-        """Return a connection pool for TimescaleDB."""
+        """Return the shared TimescaleDB connection pool (`getconn()` / `putconn()` like psycopg2's pools)."""
         if not self.ts_pool:
             try:
-                self.ts_pool = pool.SimpleConnectionPool(
-                    1, 10,  # Min & Max connections
+                self.ts_pool = get_pool_manager().sync_pool(
+                    "timescaledb",
                     host=self.ts_host,
                     port=self.ts_port,
                     user=self.ts_user,
                     password=self.ts_password,
                     database=self.ts_db
                 )
-                logging.info("✅ TimescaleDB connection pool created.")
             except Exception as e:
                 logging.error(f"❌ Failed to create TimescaleDB connection pool: {e}")
                 self.ts_pool = None
@@ -128,10 +130,8 @@ class DatabaseConnector:
         return None
 
     def close_connections(self):
-        """Close all database connections."""
-        if self.ts_pool:
-            self.ts_pool.closeall()
-            logging.info("🔌 TimescaleDB connection pool closed.")
+        """Drop this connector's reference to the shared pool (the pool manager closes it at exit)."""
+        self.ts_pool = None
 
     def __del__(self):
         self.close_connections()
@@ -152,7 +152,7 @@ if __name__ == "__main__":
     # TimescaleDB
     timescale_conn = db_connector.get_timescale_connection()
     if timescale_conn:
-        timescale_conn.close()
+        db_connector.release_timescale_connection(timescale_conn)
 
     # InfluxDB
     influx_client = db_connector.get_influxdb_client()
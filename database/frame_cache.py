@@ -0,0 +1,198 @@
+"""
+Binary DataFrame Cache for Redis
+
+DataFrames are stored in Redis as compressed Arrow IPC streams instead of JSON text. Arrow keeps the
+column dtypes, the index (including timezone-aware timestamp indexes) and the column order, so a
+cached frame comes back identical to the one that was stored, and decoding is a near zero-copy read.
+
+`FrameCache` wraps a Redis client created with `decode_responses=False` and keeps hit/miss and
+serialization statistics.
+"""
+
+import time
+import pyarrow as pa
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+
+def encode_frame(df, compression="zstd"):
+    """
+    Serializes a DataFrame (or an Arrow table) to a compressed Arrow IPC stream.
+
+    Args:
+        df (pd.DataFrame or pa.Table): The frame to serialize; a DataFrame's index is preserved.
+        compression (str, optional): IPC buffer compression ('zstd', 'lz4' or None). Defaults to 'zstd'.
+
+    Returns:
+        bytes: The serialized frame.
+    """
+    table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_frame(data, as_arrow=False):
+    """
+    Deserializes a DataFrame written by `encode_frame`.
+
+    Args:
+        data (bytes): The serialized frame.
+        as_arrow (bool, optional): Return the Arrow table instead of converting it to pandas, e.g. to
+                                   concatenate many small frames before a single conversion. Defaults to False.
+
+    Returns:
+        pd.DataFrame or pa.Table: The frame with its original dtypes and index.
+    """
+    with pa.ipc.open_stream(pa.py_buffer(data)) as reader:
+        table = reader.read_all()
+    return table if as_arrow else table.to_pandas()
+
+
+class FrameCache:
+    """
+    Stores DataFrames in Redis as compressed Arrow IPC and tracks cache statistics.
+
+    Attributes:
+        hits (int): Lookups that found a frame.
+        misses (int): Lookups that found nothing.
+        errors (int): Failed Redis operations or undecodable entries (treated as misses).
+        encode_seconds (float): Total time spent serializing frames.
+        decode_seconds (float): Total time spent deserializing frames.
+        bytes_written (int): Total size of the stored frames.
+        bytes_read (int): Total size of the frames read.
+        writes (int): Frames stored.
+    """
+    def __init__(self, redis_client, prefix="frame:", compression="zstd"):
+        """
+        Initializes the cache.
+
+        Args:
+            redis_client: An async Redis client created with `decode_responses=False`.
+            prefix (str, optional): Prefix of the Redis keys. Defaults to 'frame:'.
+            compression (str, optional): IPC buffer compression. Defaults to 'zstd'.
+        """
+        self.redis = redis_client
+        self.prefix = prefix
+        self.compression = compression
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.encode_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.writes = 0
+
+    def _decode(self, data, as_arrow=False):
+        start = time.perf_counter()
+        try:
+            df = decode_frame(data, as_arrow)
+        except (pa.ArrowInvalid, OSError) as e:
+            self.errors += 1
+            logger.warning(f"Discarding an undecodable cache entry: {e}")
+            return None
+        self.decode_seconds += time.perf_counter() - start
+        self.bytes_read += len(data)
+        return df
+
+    def _encode(self, df):
+        start = time.perf_counter()
+        data = encode_frame(df, self.compression)
+        self.encode_seconds += time.perf_counter() - start
+        self.bytes_written += len(data)
+        self.writes += 1
+        return data
+
+    async def get(self, key):
+        """
+        Returns the cached frame for a key, or None on a miss.
+        """
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys, as_arrow=False):
+        """
+        Returns the cached frames for several keys in one round-trip (None for each miss).
+
+        With `as_arrow`, Arrow tables are returned instead of DataFrames.
+        """
+        if not keys:
+            return []
+        try:
+            values = await self.redis.mget([self.prefix + key for key in keys])
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis read failed: {e}")
+            values = [None] * len(keys)
+
+        frames = []
+        for value in values:
+            df = self._decode(value, as_arrow) if value is not None else None
+            if df is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            frames.append(df)
+        return frames
+
+    async def set(self, key, df, expire=None):
+        """
+        Stores a frame; `expire` is a TTL in seconds (None keeps it until evicted).
+        """
+        await self.set_many({key: df}, expire)
+
+    async def set_many(self, frames, expire=None):
+        """
+        Stores several frames in one pipelined round-trip.
+
+        Args:
+            frames (dict): Key -> DataFrame.
+            expire (int, optional): TTL in seconds for every entry; None keeps them until evicted.
+        """
+        if not frames:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, df in frames.items():
+                    pipe.set(self.prefix + key, self._encode(df), ex=expire)
+                await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis write failed: {e}")
+
+    async def delete_many(self, keys):
+        """
+        Removes several entries in one round-trip (missing keys are ignored).
+        """
+        if not keys:
+            return
+        try:
+            await self.redis.delete(*[self.prefix + key for key in keys])
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis delete failed: {e}")
+
+    def stats(self):
+        """
+        Returns the cache statistics.
+
+        Returns:
+            dict: Counters plus the hit rate and the average encode/decode time per frame in milliseconds.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "writes": self.writes,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "encode_seconds": self.encode_seconds,
+            "decode_seconds": self.decode_seconds,
+            "avg_encode_ms": self.encode_seconds * 1000 / self.writes if self.writes else 0.0,
+            "avg_decode_ms": self.decode_seconds * 1000 / self.hits if self.hits else 0.0,
+        }
@@ -10,6 +10,12 @@ import redis.asyncio as redis
 from dotenv import load_dotenv
 from utils.env_loader import load_env
 from influxdb_client.client.write_api import SYNCHRONOUS
+from database.parquet_mirror import ParquetMirror
+from database.frame_cache import FrameCache
+from database.segment_cache import DaySegmentCache
+from database.binary_copy import CopyBinaryDecoder, OHLC_KINDS, copy_query
+from database.bulk_writer import BulkWriter
+from database.pool_manager import get_pool_manager
 
 # Load environment variables
 load_dotenv(load_env())
@@ -31,29 +37,36 @@ class DatabaseHandler:
         self.pool = None
         self.client = None
         self.redis = None
+        self.frame_cache = None  # Binary (Arrow IPC) DataFrame cache on a second, non-decoding Redis client
+        self.segment_cache = None  # Per-day OHLC blocks used to assemble SQL range queries
+        self._timezone_aware = {}  # Table -> whether its timestamp column is timestamptz
         self._initialization_task = None
+        # Optional local Parquet copy of the OHLC tables, read by the backtests before the database
+        self.parquet_mirror = ParquetMirror(db_config["parquet_mirror"]) if db_config.get("parquet_mirror") else None
 
     async def _initialize_database(self):
+        # Async pools are shared with the other handlers on this event loop (`database.pool_manager`);
+        # sizes and timeouts come from the DB_POOL_* variables or a `pool:` section of db_config
         if self.db_type == "mysql" and self.pool is None:
-            self.pool = await aiomysql.create_pool(
+            self.pool = await get_pool_manager().async_pool(
+                "mysql",
+                settings=self.config.get("pool"),
                 host=os.getenv("MYSQL_HOST"),
+                port=os.getenv("MYSQL_PORT"),
                 user=os.getenv("MYSQL_USER"),
                 password=os.getenv("MYSQL_PASSWORD"),
-                db=os.getenv("MYSQL_DATABASE"),
-                minsize=1,
-                maxsize=5
+                database=os.getenv("MYSQL_DATABASE"),
             )
-            logger.info("✅ MySQL async connection pool initialized.")
         elif self.db_type == "timescaledb" and self.pool is None:
-            self.pool = await asyncpg.create_pool(
+            self.pool = await get_pool_manager().async_pool(
+                "timescaledb",
+                settings=self.config.get("pool"),
                 host=os.getenv("TIMESCALEDB_HOST"),
+                port=os.getenv("TIMESCALEDB_PORT"),
                 user=os.getenv("TIMESCALEDB_USER"),
                 password=os.getenv("TIMESCALEDB_PASSWORD"),
                 database=os.getenv("TIMESCALEDB_DATABASE"),
-                min_size=1,
-                max_size=5
             )
-            logger.info("✅ TimescaleDB async connection pool initialized.")
         elif self.db_type == "influxdb" and self.client is None:
             self.client = influxdb_client.InfluxDBClient(
                 url=os.getenv("INFLUXDB_URL"),
@@ -72,6 +85,9 @@ class DatabaseHandler:
     async def _init_redis(self):
         if self.redis is None:
             self.redis = await redis.from_url(os.getenv("REDIS_URL"), decode_responses=True)
+            self.frame_cache = FrameCache(await redis.from_url(os.getenv("REDIS_URL"), decode_responses=False),
+                                          prefix="ohlc:arrow:")
+            self.segment_cache = DaySegmentCache(FrameCache(self.frame_cache.redis, prefix="ohlc:ist-day:"))
             logger.info("✅ Redis cache initialized.")
 
     async def execute_query(self, query, params=None):
@@ -93,6 +109,79 @@ class DatabaseHandler:
             return []
         return None
 
+    async def fetch_frame(self, query, params=None, kinds=None):
+        """
+        Runs a SELECT and returns the result as a DataFrame of NumPy columns.
+
+        On TimescaleDB the query is wrapped in a binary COPY with float8 casts and decoded straight
+        into NumPy arrays (`database.binary_copy`), without building a Record per row. The query is
+        described first, since the binary format does not tell timestamp from timestamptz columns.
+        Other databases go through `execute_query`.
+
+        Args:
+            query (str): The SELECT to run.
+            params (tuple, optional): Query parameters.
+            kinds (dict, optional): Column name -> kind ('float', 'int' or 'timestamp') of the
+                                    selected columns, in order. Defaults to the OHLC columns.
+
+        Returns:
+            pd.DataFrame: The rows; on TimescaleDB timestamptz columns are UTC-aware and timestamp
+                          columns naive, as stored.
+        """
+        kinds = kinds or OHLC_KINDS
+        await self._ensure_initialized()
+        if self.db_type == "timescaledb":
+            async with self.pool.acquire() as conn:
+                attributes = (await conn.prepare(query)).get_attributes()
+                naive = [name for name, attribute in zip(kinds, attributes) if attribute.type.name == 'timestamp']
+                decoder = CopyBinaryDecoder(kinds, naive)
+                await conn.copy_from_query(copy_query(query, kinds), *(params or ()), output=decoder.feed, format='binary')
+            return decoder.close()
+
+        df = pd.DataFrame(await self.execute_query(query, params) or [], columns=list(kinds))
+        for name, kind in kinds.items():
+            if kind == 'float':
+                df[name] = df[name].astype('float64')
+        return df
+
+    async def stream_query(self, query, params=None, chunk_size=50000):
+        """
+        Runs a query and yields its rows as DataFrames of at most `chunk_size` rows.
+
+        Rows are read through a server-side cursor (an asyncpg cursor inside a transaction, or a MySQL
+        SSCursor), so only one chunk is held in memory at a time instead of the whole result.
+
+        Args:
+            query (str): The SQL query.
+            params (tuple, optional): Query parameters.
+            chunk_size (int, optional): Rows per chunk. Defaults to 50000.
+
+        Yields:
+            pd.DataFrame: The next chunk of rows, with the query's column names.
+        """
+        await self._ensure_initialized()
+        if self.db_type == "timescaledb":
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():  # asyncpg cursors only live inside a transaction
+                    cursor = await conn.cursor(query, *(params or ()))
+                    while True:
+                        rows = await cursor.fetch(chunk_size)
+                        if not rows:
+                            break
+                        yield pd.DataFrame(rows, columns=list(rows[0].keys()))
+        elif self.db_type == "mysql":
+            async with self.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.SSCursor) as cursor:
+                    await cursor.execute(query, params or ())
+                    columns = [column[0] for column in cursor.description]
+                    while True:
+                        rows = await cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield pd.DataFrame(list(rows), columns=columns)
+        else:
+            raise ValueError(f"Streaming queries are not supported for db_type: {self.db_type}")
+
     async def _execute_mysql_query(self, conn, query, params):
         async with conn.cursor() as cursor:
             await cursor.execute(query, params or ())
@@ -106,15 +195,30 @@ class DatabaseHandler:
                 logger.info(f"✅ Query executed: {query}")
 
     async def batch_insert(self, table, data):
+        """
+        Inserts a list of row dicts via COPY into a staging table (rows that already exist are skipped).
+        """
         await self._ensure_initialized()
         if not data:
             return
-        columns = data[0].keys()
-        values_str = ", ".join([f"(${i + 1})" for i in range(len(columns))])
-        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values_str}"
-        async with self.pool.acquire() as conn:
-            await conn.executemany(query, [tuple(d.values()) for d in data])
-            logger.info(f"✅ Batch inserted {len(data)} rows into {table}")
+        columns = list(data[0].keys())
+        writer = BulkWriter(table)
+        await writer.write_records_async(self.pool, [tuple(d[column] for column in columns) for d in data], columns)
+
+    async def bulk_write(self, table, data, kinds=None):
+        """
+        Bulk-loads a DataFrame / NumPy columns with a binary COPY (see `database.bulk_writer`).
+
+        Args:
+            table (str): The target table.
+            data (pd.DataFrame, dict or np.ndarray): The rows.
+            kinds (dict, optional): Column name -> kind of the columns to write. Defaults to OHLC.
+
+        Returns:
+            int: The number of new rows inserted.
+        """
+        await self._ensure_initialized()
+        return await BulkWriter(table, kinds).write_async(self.pool, data)
 
     async def fetch_historical_data(self, symbol, start_time, end_time, timeframe='1m', custom_table_name=None):
         """Fetch historical OHLC data from the database."""
@@ -126,48 +230,24 @@ class DatabaseHandler:
         await self._ensure_initialized()
 
         try:
+            await self._init_redis()
+
+            if self.db_type in ("timescaledb", "mysql"):
+                # Assembled from per-day cached blocks; only uncached days hit the database
+                df = await self.segment_cache.get_range(
+                    table, start_time, end_time, lambda ranges: self._fetch_ranges(table, ranges))
+                if df.empty:
+                    return pd.DataFrame()
+                return df.set_index('timestamp')  # Naive IST, like `DataRouter.fetch`
+
             # Check cache first
             cache_key = f"{table}:{start_time}:{end_time}"
-            await self._init_redis()
-            cached_data = await self.redis.get(cache_key)
-            if cached_data:
+            cached_data = await self.frame_cache.get(cache_key)
+            if cached_data is not None:
                 logger.info(f"✅ Retrieved data from cache for {table}")
-                return pd.read_json(cached_data)
-
-            # Build query based on database type
-            if self.db_type == "timescaledb":
-                query = f"""
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM {table}
-                    WHERE timestamp >= $1 AND timestamp <= $2
-                    ORDER BY timestamp ASC
-                """
-                params = (start_time, end_time)
-                data = await self.execute_query(query, params)
-                if data:
-                    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                    df.set_index('timestamp', inplace=True)
-                    await self.redis.set(cache_key, df.to_json(), ex=300)
-                    return df
-                return pd.DataFrame()
-
-            elif self.db_type == "mysql":
-                query = f"""
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM {table}
-                    WHERE timestamp >= %s AND timestamp <= %s
-                    ORDER BY timestamp ASC
-                """
-                params = (start_time, end_time)
-                data = await self.execute_query(query, params)
-                if data:
-                    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                    df.set_index('timestamp', inplace=True)
-                    await self.redis.set(cache_key, df.to_json(), ex=300)
-                    return df
-                return pd.DataFrame()
+                return cached_data
 
-            elif self.db_type == "influxdb":
+            if self.db_type == "influxdb":
                 query_api = self.client.query_api()
                 query = f'''
                     from(bucket: "{self.config.get('bucket', 'default')}")
@@ -180,7 +260,7 @@ class DatabaseHandler:
                     df = tables[0].records
                     df = pd.DataFrame.from_records(df, columns=['_time', 'open', 'high', 'low', 'close', 'volume'])
                     df = df.rename(columns={'_time': 'timestamp'}).set_index('timestamp')
-                    await self.redis.set(cache_key, df.to_json(), ex=300)
+                    await self.frame_cache.set(cache_key, df, expire=300)
                     return df
                 return pd.DataFrame()
 
@@ -191,6 +271,48 @@ class DatabaseHandler:
             logger.error(f"Error fetching historical data: {str(e)}")
             return pd.DataFrame()
 
+    async def invalidate_cached_days(self, table, start_time, end_time):
+        """
+        Drops the cached day blocks of a table overlapping a range, e.g. after a backfill.
+
+        Returns:
+            int: The number of days dropped.
+        """
+        await self._init_redis()
+        return await self.segment_cache.invalidate(table, start_time, end_time)
+
+    async def _is_timezone_aware(self, table):
+        """Whether a table's timestamp column is timestamptz (looked up once per table)."""
+        if table not in self._timezone_aware:
+            rows = await self.execute_query(
+                "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+                "WHERE attrelid = $1::regclass AND attname = 'timestamp'", (table,))
+            self._timezone_aware[table] = bool(rows) and "with time zone" in rows[0][0]
+        return self._timezone_aware[table]
+
+    async def _fetch_ranges(self, table, ranges):
+        """
+        Fetches the OHLC rows of several [start, end) naive IST time ranges of a table in one query.
+
+        The bounds are bound in the column's own type: as IST wall time for naive columns (as
+        ingested) and as IST instants for timestamptz columns.
+        """
+        if self.db_type == "timescaledb":
+            timezone_aware = await self._is_timezone_aware(table)
+            conditions = [f"(timestamp >= ${2 * i + 1} AND timestamp < ${2 * i + 2})" for i in range(len(ranges))]
+            params = [(bound.tz_localize('Asia/Kolkata') if timezone_aware else bound).to_pydatetime()
+                      for time_range in ranges for bound in time_range]
+        else:
+            conditions = ["(timestamp >= %s AND timestamp < %s)"] * len(ranges)
+            params = [bound.to_pydatetime() for time_range in ranges for bound in time_range]
+        query = f"""
+            SELECT timestamp, open, high, low, close, volume
+            FROM {table}
+            WHERE {' OR '.join(conditions)}
+            ORDER BY timestamp ASC
+        """
+        return await self.fetch_frame(query, params)
+
     def get_table_name(self, symbol, timeframe):
         """
         This method is no longer directly used for fetching historical data
@@ -200,15 +322,22 @@ class DatabaseHandler:
 
     async def close(self):
         if self.pool:
-            await self.pool.close()
-            logger.info("🔌 Database connection pool closed.")
+            await get_pool_manager().release_async(self.pool)
+            self.pool = None
         if self.redis:
             await self.redis.close()
-            logger.info("🔌 Redis cache closed.")
+            await self.frame_cache.redis.close()
+            logger.info(f"🔌 Redis cache closed. Cache stats: {self.cache_stats()}")
         if self.client:
             self.client.close()
             logger.info("🔌 InfluxDB client closed.")
 
+    def cache_stats(self):
+        """Hit/miss and serialization statistics of the DataFrame caches (empty before first use)."""
+        if self.frame_cache is None:
+            return {}
+        return {**self.frame_cache.stats(), "segments": self.segment_cache.stats()}
+
     async def cache_get(self, key):
         await self._init_redis()
         return await self.redis.get(key)
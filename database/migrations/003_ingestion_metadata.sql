@@ -0,0 +1,15 @@
+-- Ingestion metadata: one row per OHLC table with its high-water mark, row count and the last
+-- validated timestamp. Maintained by database.bulk_writer.BulkWriter in the same transaction as
+-- every load, so update scripts read all watermarks with one query (database.watermark_catalog).
+--
+-- Timestamps are stored without time zone, as the table stores them: naive tables keep their
+-- wall-clock values, timestamptz tables are recorded in UTC.
+
+CREATE TABLE IF NOT EXISTS public.ingestion_metadata (
+    table_name          TEXT PRIMARY KEY,
+    first_timestamp     TIMESTAMP,
+    last_timestamp      TIMESTAMP,
+    row_count           BIGINT NOT NULL DEFAULT 0,
+    last_validated      TIMESTAMP,
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT now()
+);
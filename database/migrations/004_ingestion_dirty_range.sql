@@ -0,0 +1,15 @@
+-- Range of timestamps loaded into a table since its resampled tables were last refreshed.
+-- Widened by database.bulk_writer.BulkWriter with every load and cleared by
+-- database.resample_manager.ResampleManager after it rebuilt the affected buckets.
+-- ALTER TABLE takes an exclusive lock even when the columns exist, so it only runs when needed.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = 'public' AND table_name = 'ingestion_metadata'
+                     AND column_name = 'dirty_to') THEN
+        ALTER TABLE public.ingestion_metadata
+            ADD COLUMN IF NOT EXISTS dirty_from TIMESTAMP,
+            ADD COLUMN IF NOT EXISTS dirty_to TIMESTAMP;
+    END IF;
+END $$;
@@ -0,0 +1,11 @@
+-- Resampled (5m/15m/1h) tables maintained by database.resample_manager.ResampleManager.
+-- A table without a row here has never been built and is rebuilt from the whole source table.
+
+CREATE TABLE IF NOT EXISTS public.resample_state (
+    target_table        TEXT PRIMARY KEY,
+    source_table        TEXT NOT NULL,
+    bucket              INTERVAL NOT NULL,
+    refreshed_from      TIMESTAMP,
+    refreshed_to        TIMESTAMP,
+    refreshed_at        TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,18 @@
+-- Rows flagged by data_ingestion.ohlc_validator, inline during ingestion (database.bulk_writer)
+-- or by the validation engine (data_ingestion/update/validate_data.py).
+-- `reasons` is a bit mask of the validator's flags; `quarantined` rows were kept out of (or removed
+-- from) the table, the others were only flagged and are still stored there.
+
+CREATE TABLE IF NOT EXISTS public.ohlc_anomalies (
+    table_name          TEXT NOT NULL,
+    timestamp           TIMESTAMP NOT NULL,
+    open                DOUBLE PRECISION,
+    high                DOUBLE PRECISION,
+    low                 DOUBLE PRECISION,
+    close               DOUBLE PRECISION,
+    volume              BIGINT,
+    reasons             INTEGER NOT NULL,
+    quarantined         BOOLEAN NOT NULL DEFAULT FALSE,
+    detected_at         TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (table_name, timestamp)
+);
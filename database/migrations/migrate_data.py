@@ -1,15 +1,40 @@
+"""
+🔹 migrations/migrate_data.py (Migrate OHLC Tables from MySQL to TimescaleDB)
+
+Each table is split into timestamp-keyed chunks (`--chunk`, 7 days by default) between its first
+and last MySQL timestamp. Chunks are read with a streaming (server-side) MySQL cursor and written to
+TimescaleDB with a binary COPY through `BulkWriter` (rows that already exist are skipped), by a pool
+of worker threads shared by all tables, so several tables migrate concurrently.
+
+Every finished chunk is recorded in a checkpoint file (`checkpoints/<schema>.<table>.json`); a rerun
+skips the recorded chunks, so an interrupted migration resumes where it stopped.
+
+Usage:
+    python -m database.migrations.migrate_data sensex_1m nifty50_1m --workers 4
+    python -m database.migrations.migrate_data sensex_1m --reset   # ignore existing checkpoints
+"""
+
 import os
+import json
+import time
+import argparse
+import threading
 import pymysql
+import pymysql.cursors
 import psycopg2
+import pandas as pd
 from tqdm import tqdm
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.env_loader import load_env
+from database.bulk_writer import BulkWriter
 
 # Load database credentials from .env
-load_dotenv('../../config/.env')
+load_dotenv(load_env())
 
 MYSQL_CONFIG = {
     "host": os.getenv("MYSQL_HOST"),
-    "port": int(os.getenv("MYSQL_PORT")),
+    "port": int(os.getenv("MYSQL_PORT", 3306)),
     "user": os.getenv("MYSQL_USER"),
     "password": os.getenv("MYSQL_PASSWORD"),
     "database": os.getenv("MYSQL_DATABASE"),
@@ -17,7 +42,7 @@ MYSQL_CONFIG = {
 
 TIMESCALE_CONFIG = {
     "host": os.getenv("TIMESCALEDB_HOST"),
-    "port": int(os.getenv("TIMESCALEDB_PORT")),
+    "port": int(os.getenv("TIMESCALEDB_PORT", 5432)),
     "user": os.getenv("TIMESCALEDB_USER"),
     "password": os.getenv("TIMESCALEDB_PASSWORD"),
     "database": os.getenv("TIMESCALEDB_DATABASE"),
@@ -25,54 +50,136 @@ TIMESCALE_CONFIG = {
 
 TABLE_NAME = 'sensex_1mbb'
 SCHEMA_NAME = 'fno'
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints")
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+FETCH_SIZE = 50000  # Rows per fetchmany() from the streaming cursor
+
+_connections = threading.local()  # One MySQL and one TimescaleDB connection per worker thread
+
+
+class MigrationCheckpoint:
+    """
+    Set of migrated chunks of one table, persisted atomically after every chunk.
+    """
+    def __init__(self, schema, table, reset=False):
+        self.path = os.path.join(CHECKPOINT_DIR, f"{schema}.{table}.json")
+        self._lock = threading.Lock()
+        self.done = {}
+        if not reset and os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.done = json.load(f)["chunks"]
+
+    def is_done(self, chunk_start):
+        return chunk_start.isoformat() in self.done
 
+    def mark_done(self, chunk_start, rows):
+        with self._lock:
+            self.done[chunk_start.isoformat()] = rows
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+            temporary_path = f"{self.path}.tmp"
+            with open(temporary_path, "w") as f:
+                json.dump({"chunks": self.done}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary_path, self.path)
 
-def fetch_mysql_data():
-    """Fetch all data from MySQL nifty50_1m table."""
-    try:
-        mysql_conn = pymysql.connect(**MYSQL_CONFIG)
-        cursor = mysql_conn.cursor()
-        query = F"SELECT timestamp, open, high, low, close, volume FROM {TABLE_NAME} ORDER BY timestamp ASC;"
-        cursor.execute(query)
-        data = cursor.fetchall()
-        cursor.close()
-        mysql_conn.close()
-        print(f"✅ Fetched {len(data)} records from MySQL {TABLE_NAME}.")
-        return data
-    except pymysql.Error as e:
-        print(f"❌ MySQL Error: {e}")
+
+def _mysql():
+    if getattr(_connections, "mysql", None) is None:
+        _connections.mysql = pymysql.connect(**MYSQL_CONFIG)
+    return _connections.mysql
+
+
+def _timescale():
+    if getattr(_connections, "timescale", None) is None:
+        _connections.timescale = psycopg2.connect(**TIMESCALE_CONFIG)
+    return _connections.timescale
+
+
+def plan_chunks(table, chunk="7D"):
+    """
+    Splits a MySQL table into [start, end) timestamp windows covering all of its rows.
+
+    Returns:
+        list: (start, end) pairs of pd.Timestamp.
+    """
+    with _mysql().cursor() as cursor:
+        cursor.execute(f"SELECT MIN(timestamp), MAX(timestamp) FROM {table}")
+        first, last = cursor.fetchone()
+    if first is None:
         return []
+    starts = pd.date_range(pd.Timestamp(first).floor("D"), pd.Timestamp(last), freq=chunk)
+    return [(start, start + pd.Timedelta(chunk)) for start in starts]
+
+
+def migrate_chunk(schema, table, chunk_start, chunk_end, checkpoint):
+    """
+    Streams one timestamp window from MySQL and COPYs it into TimescaleDB.
 
+    Returns:
+        tuple: (rows read, rows inserted).
+    """
+    writer = BulkWriter(f"{schema}.{table}")
+    query = (f"SELECT {', '.join(COLUMNS)} FROM {table} "
+             f"WHERE timestamp >= %s AND timestamp < %s ORDER BY timestamp ASC")
+    rows = inserted = 0
+    with _mysql().cursor(pymysql.cursors.SSCursor) as cursor:
+        cursor.execute(query, (chunk_start.to_pydatetime(), chunk_end.to_pydatetime()))
+        while True:
+            batch = cursor.fetchmany(FETCH_SIZE)
+            if not batch:
+                break
+            df = pd.DataFrame(list(batch), columns=COLUMNS)
+            inserted += writer.write(_timescale(), df)
+            rows += len(df)
+    checkpoint.mark_done(chunk_start, rows)
+    return rows, inserted
 
-def insert_into_timescale(data):
-    """Insert data into TimescaleDB nifty50_1m table."""
-    try:
-        timescale_conn = psycopg2.connect(**TIMESCALE_CONFIG)
-        cursor = timescale_conn.cursor()
 
-        insert_query = F"""
-            INSERT INTO {SCHEMA_NAME}.{TABLE_NAME} (timestamp, open, high, low, close, volume)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (timestamp) DO NOTHING;
-        """
+def migrate_tables(tables, schema=SCHEMA_NAME, chunk="7D", workers=4, reset=False):
+    """
+    Migrates several tables concurrently, chunk by chunk, resuming from their checkpoints.
+    """
+    started = time.perf_counter()
+    checkpoints = {table: MigrationCheckpoint(schema, table, reset) for table in tables}
+    jobs = []
+    for table in tables:
+        chunks = plan_chunks(table, chunk)
+        pending = [(start, end) for start, end in chunks if not checkpoints[table].is_done(start)]
+        print(f"📋 {table}: {len(chunks)} chunks, {len(chunks) - len(pending)} already migrated.")
+        jobs += [(table, start, end) for start, end in pending]
 
-        for row in tqdm(data, desc="📥 Migrating Data", unit="rows"):
-            cursor.execute(insert_query, row)
+    totals = {table: [0, 0] for table in tables}
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(migrate_chunk, schema, table, start, end, checkpoints[table]): (table, start)
+                   for table, start, end in jobs}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="📥 Migrating Data", unit="chunk"):
+            table, start = futures[future]
+            try:
+                rows, inserted = future.result()
+                totals[table][0] += rows
+                totals[table][1] += inserted
+            except Exception as e:
+                failed.append((table, start))
+                print(f"❌ {table} chunk starting {start} failed: {e}")
 
-        timescale_conn.commit()
-        cursor.close()
-        timescale_conn.close()
-        print("✅ Data migration to TimescaleDB completed!")
-    except psycopg2.Error as e:
-        print(f"❌ TimescaleDB Error: {e}")
+    elapsed = time.perf_counter() - started
+    for table, (rows, inserted) in totals.items():
+        print(f"✅ {schema}.{table}: {rows} rows read, {inserted} new rows written.")
+    read = sum(rows for rows, _ in totals.values())
+    print(f"⏱️ Migrated {read} rows in {elapsed:.1f}s ({read / elapsed if elapsed else 0:,.0f} rows/s).")
+    if failed:
+        print(f"⚠️ {len(failed)} chunks failed; rerun to retry them.")
+    return failed
 
 
 if __name__ == "__main__":
-    # Step 1: Fetch data from MySQL
-    mysql_data = fetch_mysql_data()
-
-    # Step 2: Insert into TimescaleDB
-    if mysql_data:
-        insert_into_timescale(mysql_data)
-    else:
-        print("⚠️ No data found in MySQL. Migration skipped.")
+    parser = argparse.ArgumentParser(description="Migrate OHLC tables from MySQL to TimescaleDB.")
+    parser.add_argument("tables", nargs="*", default=[TABLE_NAME])
+    parser.add_argument("--schema", default=SCHEMA_NAME)
+    parser.add_argument("--chunk", default="7D", help="Time span per chunk (pandas offset, e.g. 7D)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--reset", action="store_true", help="Ignore existing checkpoints")
+    args = parser.parse_args()
+    migrate_tables(args.tables, args.schema, args.chunk, args.workers, args.reset)
@@ -1,6 +1,7 @@
 import os
 import mysql.connector
 from dotenv import load_dotenv
+from database.pool_manager import get_pool_manager
 
 
 class MySQLHandler:
@@ -20,25 +21,27 @@ class MySQLHandler:
         if not all([self.host, self.port, self.user, self.password, self.database]):
             raise ValueError("MySQL credentials are missing. Check your .env file.")
 
-        # Connect to MySQL
+        # Borrow a connection from the process-wide pool
+        self.pool = None
         self.conn = None
         self.connect()
 
     def connect(self):
         """
-        Establish a MySQL database connection.
+        Borrow a MySQL connection from the shared pool (`database.pool_manager`).
         """
         try:
-            self.conn = mysql.connector.connect(
+            self.pool = get_pool_manager().sync_pool(
+                "mysql",
                 host=self.host,
                 port=int(self.port),
                 user=self.user,
                 password=self.password,
                 database=self.database
             )
+            self.conn = self.pool.getconn()
             self.cursor = self.conn.cursor(dictionary=True)
-            print("✅ MySQL connection established successfully!")
-        except mysql.connector.Error as e:
+        except (mysql.connector.Error, TimeoutError) as e:
             print(f"❌ Error connecting to MySQL: {e}")
             self.conn = None
 
@@ -67,12 +70,12 @@ class MySQLHandler:
 
     def close(self):
         """
-        Close the database connection.
+        Return the connection to the pool.
         """
         if self.conn:
             self.cursor.close()
-            self.conn.close()
-            print("🔌 MySQL connection closed.")
+            self.pool.putconn(self.conn)
+            self.conn = None
 
 
 # Example Usage
@@ -0,0 +1,580 @@
+"""
+Process-Wide Database Connection Pools
+
+`TimescaleDBHandler`, `MySQLHandler`, `DatabaseConnector` and `DatabaseHandler` used to open their
+own connections, so every `with TimescaleDBHandler()` block paid a full connect (TCP, TLS, auth).
+They now borrow from one `PoolManager` per process, which keeps a pool per driver and set of
+credentials:
+
+- sync pools (psycopg2, mysql.connector) are shared by all threads and live until the process exits;
+- async pools (asyncpg, aiomysql) are bound to an event loop, shared by the handlers on that loop and
+  closed when the last of them releases it.
+
+Every pool opens `warmup` connections up front, checks a connection that sat idle longer than
+`health_check_interval` with a `SELECT 1` before lending it (replacing it when dead), applies a
+server-side statement timeout, and counts borrows, wait time and utilisation:
+
+    from database.pool_manager import get_pool_manager
+    pool = get_pool_manager().sync_pool("timescaledb", host=..., port=..., user=..., password=..., database=...)
+    with pool.connection() as conn:
+        ...
+    get_pool_manager().metrics()    # {'timescaledb://user@host:port/db': {'borrowed': ..., 'wait_avg_ms': ...}}
+
+Sizes and timeouts come from the environment (DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_WARMUP,
+DB_POOL_TIMEOUT, DB_POOL_HEALTH_CHECK_INTERVAL, DB_STATEMENT_TIMEOUT_MS) and can be overridden per
+pool. Drivers are imported when their first pool is created.
+"""
+
+import os
+import time
+import queue
+import atexit
+import asyncio
+import inspect
+import weakref
+import threading
+from collections import namedtuple
+from contextlib import contextmanager, asynccontextmanager
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+DEFAULT_SETTINGS = {
+    "min_size": 1,
+    "max_size": 10,
+    "warmup": 1,                    # Connections opened when the pool is created
+    "timeout": 30.0,                # Seconds to wait for a free connection
+    "health_check_interval": 30.0,  # Idle seconds after which a connection is pinged before use
+    "statement_timeout_ms": 0,      # 0 = no limit
+}
+
+_ENVIRONMENT = {
+    "min_size": ("DB_POOL_MIN_SIZE", int),
+    "max_size": ("DB_POOL_MAX_SIZE", int),
+    "warmup": ("DB_POOL_WARMUP", int),
+    "timeout": ("DB_POOL_TIMEOUT", float),
+    "health_check_interval": ("DB_POOL_HEALTH_CHECK_INTERVAL", float),
+    "statement_timeout_ms": ("DB_STATEMENT_TIMEOUT_MS", int),
+}
+
+
+def pool_settings(**overrides):
+    """Pool settings: defaults, then the environment, then non-None `overrides`."""
+    settings = dict(DEFAULT_SETTINGS)
+    for key, (variable, cast) in _ENVIRONMENT.items():
+        if os.getenv(variable):
+            settings[key] = cast(os.getenv(variable))
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    settings["min_size"] = min(settings["min_size"], settings["max_size"])
+    settings["warmup"] = min(settings["warmup"], settings["max_size"])
+    return settings
+
+
+class PoolMetrics:
+    """
+    Borrow counts, wait times and utilisation of a pool (thread-safe).
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.borrowed = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.opened = 0
+        self.closed = 0
+        self.failed_checks = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquired(self, waited):
+        with self._lock:
+            self.borrowed += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def released(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self):
+        """The metrics as a dict (times in milliseconds, utilisation as a fraction of `max_size`)."""
+        with self._lock:
+            return {
+                "borrowed": self.borrowed,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "max_size": self.max_size,
+                "utilisation": self.in_use / self.max_size if self.max_size else 0.0,
+                "peak_utilisation": self.peak_in_use / self.max_size if self.max_size else 0.0,
+                "open": self.opened - self.closed,
+                "opened": self.opened,
+                "failed_checks": self.failed_checks,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": 1000 * self.wait_seconds / self.borrowed if self.borrowed else 0.0,
+                "wait_max_ms": 1000 * self.max_wait_seconds,
+            }
+
+
+# ---- Drivers ---------------------------------------------------------------------------------
+
+def _connect_psycopg2(credentials, settings):
+    import psycopg2
+    options = f"-c statement_timeout={settings['statement_timeout_ms']}" if settings["statement_timeout_ms"] else None
+    return psycopg2.connect(
+        host=credentials["host"],
+        port=int(credentials["port"]) if credentials.get("port") else None,
+        user=credentials["user"],
+        password=credentials["password"],
+        dbname=credentials["database"],
+        options=options,
+    )
+
+
+def _reset_psycopg2(conn):
+    """Ends a transaction the borrower left open and restores the session defaults it may have changed."""
+    import psycopg2.extensions
+    if conn.closed:
+        return
+    if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+    if conn.autocommit:
+        conn.autocommit = False
+
+
+def _connect_mysql(credentials, settings):
+    import mysql.connector
+    conn = mysql.connector.connect(
+        host=credentials["host"],
+        port=int(credentials["port"]) if credentials.get("port") else 3306,
+        user=credentials["user"],
+        password=credentials["password"],
+        database=credentials["database"],
+    )
+    if settings["statement_timeout_ms"]:
+        cursor = conn.cursor()
+        cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(settings['statement_timeout_ms'])}")
+        cursor.close()
+    return conn
+
+
+def _reset_mysql(conn):
+    if conn.is_connected():
+        conn.rollback()
+
+
+def _ping(conn):
+    """Runs `SELECT 1` on a DB-API connection; False when it fails."""
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        conn.rollback()
+        return True
+    except Exception:
+        return False
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+# (connect, reset on return) per sync driver
+SYNC_DRIVERS = {
+    "timescaledb": (_connect_psycopg2, _reset_psycopg2),
+    "mysql": (_connect_mysql, _reset_mysql),
+}
+
+
+class SyncPool:
+    """
+    Thread-safe pool of DB-API connections with warm-up, liveness checks and metrics.
+
+    `getconn()` / `putconn()` mirror `psycopg2.pool`, so code written against psycopg2 pools works unchanged.
+    """
+    def __init__(self, name, connect, reset, settings):
+        """
+        Args:
+            name (str): Label used in logs and metrics.
+            connect (callable): Opens a new connection.
+            reset (callable): Cleans up a returned connection (e.g. rolls back an open transaction).
+            settings (dict): See `pool_settings`.
+        """
+        self.name = name
+        self._connect = connect
+        self._reset = reset
+        self.settings = settings
+        self.metrics = PoolMetrics(settings["max_size"])
+        self._idle = queue.LifoQueue()  # (connection, returned at); most recently used first
+        self._slots = threading.BoundedSemaphore(settings["max_size"])
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for _ in range(settings["warmup"]):
+            self._idle.put((self._open(), time.monotonic()))
+        logger.info(f"✅ {name} pool ready ({settings['warmup']} warm, max {settings['max_size']}).")
+
+    def _open(self):
+        conn = self._connect()
+        with self._lock:
+            self.metrics.opened += 1
+        return conn
+
+    def _discard(self, conn):
+        _close_quietly(conn)
+        with self._lock:
+            self.metrics.closed += 1
+
+    def _alive(self, conn, idle_since):
+        if getattr(conn, "closed", False):
+            return False
+        if time.monotonic() - idle_since < self.settings["health_check_interval"]:
+            return True
+        return _ping(conn)
+
+    def getconn(self, timeout=None):
+        """
+        Borrows a live connection, opening one when none is idle.
+
+        Raises:
+            TimeoutError: No connection became free within `timeout` (defaults to the pool's).
+        """
+        if self._closed:
+            raise RuntimeError(f"❌ {self.name} pool is closed.")
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.settings["timeout"] if timeout is None else timeout):
+            with self._lock:
+                self.metrics.timeouts += 1
+            raise TimeoutError(f"❌ No free connection in the {self.name} pool "
+                               f"({self.settings['max_size']} in use).")
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    candidate, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._open()
+                    break
+                if self._alive(candidate, idle_since):
+                    conn = candidate
+                else:
+                    with self._lock:
+                        self.metrics.failed_checks += 1
+                    logger.warning(f"⚠️ Replacing a dead connection of the {self.name} pool.")
+                    self._discard(candidate)
+        except Exception:
+            self._slots.release()
+            raise
+        self.metrics.acquired(time.perf_counter() - started)
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Returns a borrowed connection; it is closed instead when broken or `close` is set."""
+        try:
+            if not close and not self._closed and not getattr(conn, "closed", False):
+                try:
+                    self._reset(conn)
+                except Exception:
+                    close = True
+            if close or self._closed or getattr(conn, "closed", False):
+                self._discard(conn)
+            else:
+                self._idle.put((conn, time.monotonic()))
+        finally:
+            self.metrics.released()
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for a `with` block."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        """Closes the idle connections; borrowed ones are closed when returned."""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+class AsyncPool:
+    """
+    An asyncpg / aiomysql pool with wait-time and utilisation metrics.
+
+    `acquire()` is an async context manager like the drivers' own, so it can be passed wherever a
+    driver pool was (e.g. `BulkWriter.write_async`).
+    """
+    def __init__(self, name, pool, driver, settings):
+        """
+        Args:
+            name (str): Label used in logs and metrics.
+            pool: The driver's pool.
+            driver (AsyncDriver): How to ping, discard and count the driver's connections.
+            settings (dict): See `pool_settings`.
+        """
+        self.name = name
+        self.pool = pool
+        self.driver = driver
+        self.settings = settings
+        self.metrics = PoolMetrics(settings["max_size"])
+        self.users = 0
+        # Driver connection -> when it was last returned. Keyed on the underlying connection, since
+        # asyncpg hands out a new proxy on every acquire; entries go away with their connection.
+        self._returned = weakref.WeakKeyDictionary()
+
+    async def _release(self, conn):
+        released = self.pool.release(conn)  # A coroutine on asyncpg, a plain call on aiomysql
+        if inspect.isawaitable(released):
+            await released
+
+    async def _borrow(self):
+        """A live connection; ones idle longer than `health_check_interval` are pinged first."""
+        while True:
+            conn = await self.pool.acquire()
+            idle_since = self._returned.pop(self.driver.unwrap(conn), None)
+            if idle_since is None or time.monotonic() - idle_since < self.settings["health_check_interval"]:
+                return conn
+            if await self.driver.ping(conn):
+                return conn
+            self.metrics.failed_checks += 1
+            logger.warning(f"⚠️ Replacing a dead connection of the {self.name} pool.")
+            self.driver.discard(conn)
+            await self._release(conn)
+
+    @asynccontextmanager
+    async def acquire(self):
+        started = time.perf_counter()
+        try:
+            conn = await asyncio.wait_for(self._borrow(), self.settings["timeout"])
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise TimeoutError(f"❌ No free connection in the {self.name} pool "
+                               f"({self.settings['max_size']} in use).")
+        self.metrics.acquired(time.perf_counter() - started)
+        try:
+            yield conn
+        finally:
+            self.metrics.released()
+            self._returned[self.driver.unwrap(conn)] = time.monotonic()
+            await self._release(conn)
+
+    def snapshot(self):
+        """`PoolMetrics.snapshot()` with the driver's count of open connections."""
+        metrics = self.metrics.snapshot()
+        metrics["open"] = self.driver.size(self.pool)
+        del metrics["opened"]  # The driver opens and replaces connections itself
+        return metrics
+
+    async def close(self):
+        if hasattr(self.pool, "wait_closed"):  # aiomysql
+            self.pool.close()
+            await self.pool.wait_closed()
+        else:
+            await self.pool.close()
+
+
+async def _create_asyncpg(credentials, settings):
+    import asyncpg
+    server_settings = {}
+    if settings["statement_timeout_ms"]:
+        server_settings["statement_timeout"] = str(settings["statement_timeout_ms"])
+    return await asyncpg.create_pool(
+        host=credentials["host"],
+        port=int(credentials["port"]) if credentials.get("port") else None,
+        user=credentials["user"],
+        password=credentials["password"],
+        database=credentials["database"],
+        min_size=max(settings["min_size"], settings["warmup"]),
+        max_size=settings["max_size"],
+        server_settings=server_settings or None,
+    )
+
+
+async def _ping_asyncpg(conn):
+    try:
+        await conn.fetchval("SELECT 1")
+        return True
+    except Exception:
+        return False
+
+
+async def _create_aiomysql(credentials, settings):
+    import aiomysql
+    init_command = None
+    if settings["statement_timeout_ms"]:
+        init_command = f"SET SESSION MAX_EXECUTION_TIME = {int(settings['statement_timeout_ms'])}"
+    return await aiomysql.create_pool(
+        host=credentials["host"],
+        port=int(credentials["port"]) if credentials.get("port") else 3306,
+        user=credentials["user"],
+        password=credentials["password"],
+        db=credentials["database"],
+        minsize=max(settings["min_size"], settings["warmup"]),
+        maxsize=settings["max_size"],
+        init_command=init_command,
+    )
+
+
+async def _ping_aiomysql(conn):
+    try:
+        await conn.ping(reconnect=False)
+        return True
+    except Exception:
+        return False
+
+
+# unwrap: the driver's own connection object behind what the pool hands out
+AsyncDriver = namedtuple("AsyncDriver", ["create", "ping", "discard", "size", "unwrap"])
+
+ASYNC_DRIVERS = {
+    "timescaledb": AsyncDriver(_create_asyncpg, _ping_asyncpg, lambda conn: conn.terminate(),
+                               lambda pool: pool.get_size(), lambda conn: conn._con),
+    "mysql": AsyncDriver(_create_aiomysql, _ping_aiomysql, lambda conn: conn.close(),
+                         lambda pool: pool.size, lambda conn: conn),
+}
+
+
+class PoolManager:
+    """
+    The process's connection pools, one per (driver, credentials).
+    """
+    def __init__(self):
+        self._pid = os.getpid()
+        self._sync_pools = {}
+        self._async_pools = {}  # (event loop, key) -> AsyncPool
+        self._orphaned = []  # Pools inherited through fork; kept alive and never closed
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind, credentials):
+        return (f"{kind}://{credentials.get('user')}@{credentials.get('host')}:{credentials.get('port') or ''}"
+                f"/{credentials.get('database')}")
+
+    def _check_fork(self):
+        """
+        A forked child must not use its parent's sockets; it starts with empty pools.
+
+        The inherited pools are kept referenced instead of dropped: closing (or garbage-collecting)
+        their connections would send a Terminate on the sockets the parent still uses.
+        """
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._orphaned.append((self._sync_pools, self._async_pools))
+            self._sync_pools = {}
+            self._async_pools = {}
+
+    def _after_fork_in_child(self):
+        self._lock = threading.Lock()  # The parent may have held it while forking
+        self._check_fork()
+
+    def sync_pool(self, kind, settings=None, **credentials):
+        """
+        The shared sync pool of a database, created (and warmed up) on first use.
+
+        Args:
+            kind (str): 'timescaledb' (psycopg2) or 'mysql' (mysql.connector).
+            settings (dict, optional): Overrides of `pool_settings`, used when the pool is created.
+            **credentials: host, port, user, password, database.
+
+        Returns:
+            SyncPool: The pool.
+        """
+        key = self._key(kind, credentials)
+        with self._lock:
+            self._check_fork()
+            pool = self._sync_pools.get(key)
+            if pool is None:
+                connect, reset = SYNC_DRIVERS[kind]
+                resolved = pool_settings(**(settings or {}))
+                pool = SyncPool(key, lambda: connect(credentials, resolved), reset, resolved)
+                self._sync_pools[key] = pool
+        return pool
+
+    async def async_pool(self, kind, settings=None, **credentials):
+        """
+        The async pool of a database on the running event loop; each call must be paired with
+        `release_async`.
+
+        Args:
+            kind (str): 'timescaledb' (asyncpg) or 'mysql' (aiomysql).
+            settings (dict, optional): Overrides of `pool_settings`, used when the pool is created.
+            **credentials: host, port, user, password, database.
+
+        Returns:
+            AsyncPool: The pool.
+        """
+        key = (asyncio.get_running_loop(), self._key(kind, credentials))
+        with self._lock:
+            self._check_fork()
+            pool = self._async_pools.get(key)
+        if pool is None:
+            resolved = pool_settings(**(settings or {}))
+            driver = ASYNC_DRIVERS[kind]
+            pool = AsyncPool(key[1], await driver.create(credentials, resolved), driver, resolved)
+            with self._lock:
+                existing = self._async_pools.setdefault(key, pool)
+            if existing is not pool:  # Created concurrently on the same loop
+                await pool.close()
+                pool = existing
+            else:
+                logger.info(f"✅ {key[1]} async pool ready (max {resolved['max_size']}).")
+        pool.users += 1
+        return pool
+
+    async def release_async(self, pool):
+        """Drops a reference to an async pool, closing it when it was the last."""
+        pool.users -= 1
+        if pool.users > 0:
+            return
+        with self._lock:
+            for key, candidate in list(self._async_pools.items()):
+                if candidate is pool:
+                    del self._async_pools[key]
+        await pool.close()
+        logger.info(f"🔌 {pool.name} async pool closed. Metrics: {pool.snapshot()}")
+
+    def metrics(self):
+        """Metrics of every pool, keyed by pool name (async ones suffixed with ' (async)')."""
+        with self._lock:
+            result = {name: pool.metrics.snapshot() for name, pool in self._sync_pools.items()}
+            result.update({f"{name} (async)": pool.snapshot() for (_, name), pool in self._async_pools.items()})
+        return result
+
+    def close_all(self):
+        """Closes the sync pools (called at exit); never the ones inherited from a parent process."""
+        with self._lock:
+            self._check_fork()
+            pools, self._sync_pools = self._sync_pools, {}
+        for pool in pools.values():
+            pool.closeall()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_pool_manager():
+    """The process-wide `PoolManager`."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = PoolManager()
+                atexit.register(_manager.close_all)
+                os.register_at_fork(after_in_child=_manager._after_fork_in_child)
+    return _manager
@@ -0,0 +1,213 @@
+"""
+Incremental Resampling of 1-Minute OHLC Tables
+
+The 5m/15m/1h tables used to be rebuilt with one `INSERT ... SELECT time_bucket(...) GROUP BY`
+over the whole 1-minute table, so every run cost more as history grew and re-inserted existing
+rows. `ResampleManager` instead refreshes only the buckets touched since the last run:
+
+- `BulkWriter` widens the source table's dirty range (`dirty_from` / `dirty_to` in the ingestion
+  catalog, see `database.watermark_catalog`) with every load, backfills into the past included.
+- A refresh locks the source's catalog row, deletes and re-aggregates only the buckets covering
+  that range in every resampled table, and clears the range, all in one transaction. Tables that
+  were never built (no row in `resample_state`, `migrations/005_resample_state.sql`) are built from
+  the whole source once.
+
+Buckets are aligned to the 09:15 IST session open, so a 1h bar covers 09:15-10:14, not 09:00-09:59.
+TimescaleDB's `time_bucket()` / `first()` / `last()` are used when the extension is installed; plain
+PostgreSQL (14+) falls back to `date_bin()` and ordered array aggregates (`aggregate_select`). The DELETE + INSERT also
+drops bars whose source rows were deleted and needs no unique constraint on the target.
+
+Usage:
+    manager = ResampleManager(conn)             # psycopg2 connection
+    manager.refresh_all(schema='fno')           # every *_1m table -> *_5m, *_15m, *_1h
+"""
+
+import time
+from database import watermark_catalog
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+# Resampled tables per 1-minute table: suffix -> bucket width
+TIMEFRAMES = {
+    "5m": "5 minutes",
+    "15m": "15 minutes",
+    "1h": "1 hour",
+}
+
+SOURCE_SUFFIX = "_1m"
+STATE_TABLE = "public.resample_state"
+STATE_MIGRATION = "005_resample_state.sql"
+
+# Bucket origin: any past session open (IST wall time for naive tables, the instant for timestamptz)
+SESSION_ORIGIN = "2000-01-03 09:15:00"
+SESSION_ORIGIN_TZ = "2000-01-03 09:15:00+05:30"
+
+OHLC_COLUMNS = "timestamp, open, high, low, close, volume"
+
+
+def session_origin(timezone_aware):
+    """SQL literal of the bucket origin for a naive (IST wall time) or timestamptz table."""
+    return f"'{SESSION_ORIGIN_TZ}'::timestamptz" if timezone_aware else f"'{SESSION_ORIGIN}'::timestamp"
+
+
+def aggregate_select(source, bucket, origin, timescaledb, condition=""):
+    """
+    SELECT of session-aligned OHLCV bars from a finer OHLC table.
+
+    Args:
+        source (str): The qualified source table.
+        bucket (str): SQL interval expression of the bar width (e.g. "'1 hour'::interval" or a parameter).
+        origin (str): SQL origin expression (see `session_origin`).
+        timescaledb (bool): Use TimescaleDB's `time_bucket` / `first` / `last` instead of plain PostgreSQL.
+        condition (str, optional): A WHERE clause on the source rows.
+
+    Returns:
+        str: The query, returning timestamp, open, high, low, close, volume ordered by timestamp.
+    """
+    if timescaledb:
+        bucket_start = f"time_bucket({bucket}, timestamp, origin => {origin})"
+        first_open, last_close = "first(open, timestamp)", "last(close, timestamp)"
+    else:
+        bucket_start = f"date_bin({bucket}, timestamp, {origin})"
+        first_open, last_close = ("(array_agg(open ORDER BY timestamp))[1]",
+                                  "(array_agg(close ORDER BY timestamp DESC))[1]")
+    return (f"SELECT {bucket_start} AS timestamp, {first_open} AS open, max(high) AS high, min(low) AS low, "
+            f"{last_close} AS close, sum(volume) AS volume FROM {source} {condition} GROUP BY 1 ORDER BY 1")
+
+
+class ResampleManager:
+    """
+    Keeps the resampled tables of 1-minute OHLC tables up to date incrementally.
+    """
+    def __init__(self, conn, timeframes=None):
+        """
+        Initializes the manager.
+
+        Args:
+            conn: An open psycopg2 connection.
+            timeframes (dict, optional): Target suffix -> bucket width. Defaults to `TIMEFRAMES`.
+        """
+        self.conn = conn
+        self.timeframes = timeframes or TIMEFRAMES
+        self._timescaledb = None
+
+    def _ensure_state(self, cursor):
+        cursor.execute(watermark_catalog.catalog_ddl())
+        cursor.execute(watermark_catalog.read_migration(STATE_MIGRATION))
+        if self._timescaledb is None:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb')")
+            self._timescaledb = cursor.fetchone()[0]
+
+    @staticmethod
+    def target_table(source, suffix):
+        """'fno.nifty50_1m' -> 'fno.nifty50_5m'."""
+        return source[:-len(SOURCE_SUFFIX)] + "_" + suffix
+
+    def _create_target(self, cursor, source, target):
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {target} (LIKE {source} INCLUDING ALL)")
+        if self._timescaledb:
+            cursor.execute("SELECT create_hypertable(%s, 'timestamp', if_not_exists => TRUE, migrate_data => TRUE)",
+                           (target,))
+
+    def _rebuild(self, cursor, source, target, bucket, origin, lo, hi):
+        """
+        Re-aggregates the buckets overlapping [lo, hi] (all of them when lo is None).
+
+        Returns:
+            int: The number of bars written.
+        """
+        condition, params = "", []
+        if lo is not None:
+            # Widen the range to whole buckets, so every touched bucket is rebuilt from all its minutes
+            condition = (f"WHERE timestamp >= date_bin(%s::interval, %s, {origin}) "
+                         f"AND timestamp < date_bin(%s::interval, %s, {origin}) + %s::interval")
+            params = [bucket, lo, bucket, hi, bucket]
+        cursor.execute(f"DELETE FROM {target} {condition}", params)
+        cursor.execute(
+            f"INSERT INTO {target} ({OHLC_COLUMNS}) "
+            + aggregate_select(source, "%s::interval", origin, self._timescaledb, condition),
+            [bucket] + params,
+        )
+        return cursor.rowcount
+
+    def refresh(self, source):
+        """
+        Refreshes the resampled tables of one 1-minute table.
+
+        Args:
+            source (str): The qualified 1-minute table, e.g. 'fno.nifty50_1m'.
+
+        Returns:
+            dict: Target table -> bars written (targets that were up to date are left out).
+        """
+        started = time.perf_counter()
+        written = {}
+        try:
+            with self.conn.cursor() as cursor:
+                self._ensure_state(cursor)
+                if not watermark_catalog.get_watermarks(self.conn, tables=[source]):
+                    watermark_catalog.seed_watermarks(self.conn, [source])
+
+                # Blocks concurrent loads into the source until the dirty range is consumed
+                cursor.execute(f"SELECT dirty_from, dirty_to FROM {watermark_catalog.CATALOG_TABLE} "
+                               f"WHERE table_name = %s FOR UPDATE", (source,))
+                dirty = cursor.fetchone()
+                dirty_from, dirty_to = dirty if dirty else (None, None)
+
+                cursor.execute(watermark_catalog.timestamp_type_query(), (source,))
+                timezone_aware = "with time zone" in cursor.fetchone()[0]
+                origin = session_origin(timezone_aware)
+                if timezone_aware and dirty_from is not None:
+                    # The catalog records timestamptz tables in UTC
+                    cursor.execute("SELECT %s::timestamp AT TIME ZONE 'UTC', %s::timestamp AT TIME ZONE 'UTC'",
+                                   (dirty_from, dirty_to))
+                    dirty_from, dirty_to = cursor.fetchone()
+
+                cursor.execute(f"SELECT target_table FROM {STATE_TABLE} WHERE source_table = %s", (source,))
+                built = {row[0] for row in cursor.fetchall()}
+
+                for suffix, bucket in self.timeframes.items():
+                    target = self.target_table(source, suffix)
+                    if target in built and dirty_from is None:
+                        continue
+                    self._create_target(cursor, source, target)
+                    lo, hi = (dirty_from, dirty_to) if target in built else (None, None)
+                    written[target] = self._rebuild(cursor, source, target, bucket, origin, lo, hi)
+                    cursor.execute(
+                        f"INSERT INTO {STATE_TABLE} (target_table, source_table, bucket, refreshed_from, refreshed_to) "
+                        f"VALUES (%s, %s, %s::interval, %s, %s) ON CONFLICT (target_table) DO UPDATE SET "
+                        f"refreshed_from = EXCLUDED.refreshed_from, refreshed_to = EXCLUDED.refreshed_to, "
+                        f"refreshed_at = now()",
+                        (target, source, bucket, lo, hi),
+                    )
+
+                cursor.execute(f"UPDATE {watermark_catalog.CATALOG_TABLE} SET dirty_from = NULL, dirty_to = NULL "
+                               f"WHERE table_name = %s", (source,))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        elapsed = time.perf_counter() - started
+        if written:
+            logger.info(f"✅ Resampled {source} into {len(written)} tables "
+                        f"({sum(written.values())} bars) in {elapsed:.2f}s")
+        else:
+            logger.info(f"✅ Resampled tables of {source} are up to date.")
+        return written
+
+    def refresh_all(self, schema="fno"):
+        """
+        Refreshes the resampled tables of every 1-minute table of a schema.
+
+        Returns:
+            dict: Source table -> result of `refresh`.
+        """
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT table_name FROM information_schema.tables "
+                           "WHERE table_schema = %s AND lower(table_name) LIKE %s ORDER BY table_name",
+                           (schema, "%" + SOURCE_SUFFIX.replace("_", "\\_")))
+            sources = [f"{schema}.{row[0]}" for row in cursor.fetchall()]
+        self.conn.commit()
+        return {source: self.refresh(source) for source in sources}
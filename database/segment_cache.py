@@ -0,0 +1,216 @@
+"""
+Day-Segmented Cache for Historical OHLC Ranges
+
+Caching whole query ranges (`table:start:end`) misses as soon as a request shifts by one day. This
+cache stores every day of a table as its own block and assembles any requested range from them:
+
+- Days are looked up in a process-local LRU first, then in Redis (one MGET for all of them).
+- Missing days are grouped into contiguous runs and fetched with a single query covering all runs.
+- Finished days (before the current IST day) never expire: historical bars only change when they
+  are backfilled or quarantined, and those jobs drop the affected days with `invalidate()`. The
+  current day is cached with a short TTL, and future days are not cached at all.
+- Days without rows (weekends, holidays) are cached as empty blocks so they are not queried again.
+
+Days are IST calendar days and timestamps are naive IST wall time, the convention of the naive OHLC
+columns (as ingested) and of `backtest_engine.data_router`. Rows of timestamptz columns are converted
+on the way in; `fetch_ranges` gets naive IST bounds and binds them in the column's own type.
+
+Rolling-window and walk-forward workloads mostly re-read days they have already seen, so after the
+first pass they are served almost entirely from the cache.
+"""
+
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from database.parquet_mirror import OHLC_COLUMNS
+from utils.timestamp_utils import to_ist_naive
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+DAY = pd.Timedelta(days=1)
+IST = 'Asia/Kolkata'
+
+
+def to_ist_wall(value):
+    """Converts a date string / datetime to naive IST wall time (naive values are IST already)."""
+    value = pd.Timestamp(value)
+    return value.tz_convert(IST).tz_localize(None) if value.tzinfo is not None else value
+
+
+def coalesce_days(days):
+    """
+    Groups sorted days into contiguous [start, end) ranges.
+
+    Args:
+        days (list): Sorted, normalized timestamps.
+
+    Returns:
+        list: (start, end) tuples, `end` exclusive.
+    """
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] == day:
+            ranges[-1] = (ranges[-1][0], day + DAY)
+        else:
+            ranges.append((day, day + DAY))
+    return ranges
+
+
+class DaySegmentCache:
+    """
+    Assembles OHLC ranges from per-day blocks cached locally and in Redis.
+
+    Attributes:
+        memory_hits (int): Days served from the local LRU.
+        redis_hits (int): Days served from Redis.
+        fetched_days (int): Days fetched from the database.
+        queries (int): Database queries issued.
+    """
+    def __init__(self, frame_cache, open_day_ttl=300, max_memory_days=20000):
+        """
+        Initializes the cache.
+
+        Args:
+            frame_cache (FrameCache): The binary Redis cache the day blocks are stored in.
+            open_day_ttl (int, optional): TTL in seconds of the current (still changing) day. Defaults to 300.
+            max_memory_days (int, optional): Finished days kept in the local LRU. Defaults to 20000.
+        """
+        self.frame_cache = frame_cache
+        self.open_day_ttl = open_day_ttl
+        self.max_memory_days = max_memory_days
+        self._memory = OrderedDict()  # day key -> Arrow table, least recently used first
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.fetched_days = 0
+        self.queries = 0
+
+    @staticmethod
+    def day_key(table_name, day):
+        """Cache key of one day of a table."""
+        return f"{table_name}:{day.strftime('%Y-%m-%d')}"
+
+    def _remember(self, key, table):
+        self._memory[key] = table
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_days:
+            self._memory.popitem(last=False)
+
+    async def invalidate(self, table_name, start_time, end_time):
+        """
+        Drops the cached days of a table overlapping a range, locally and in Redis.
+
+        Args:
+            table_name (str): The table (as used in the cache keys).
+            start_time (str or datetime): Inclusive start; naive values are taken as IST.
+            end_time (str or datetime): Inclusive end.
+
+        Returns:
+            int: The number of days dropped from Redis (cached or not).
+        """
+        start, end = to_ist_wall(start_time), to_ist_wall(end_time)
+        keys = [self.day_key(table_name, day) for day in pd.date_range(start.normalize(), end.normalize(), freq='D')]
+        for key in keys:
+            self._memory.pop(key, None)
+        await self.frame_cache.delete_many(keys)
+        return len(keys)
+
+    @staticmethod
+    def _to_table(rows):
+        """Normalizes fetched rows to an Arrow table with a naive IST timestamp column and float64 prices."""
+        df = pd.DataFrame(rows, columns=OHLC_COLUMNS)
+        df['timestamp'] = to_ist_naive(df['timestamp'])
+        for column in OHLC_COLUMNS[1:]:
+            df[column] = df[column].astype(np.float64)
+        return pa.Table.from_pandas(df.sort_values('timestamp', kind='stable'), preserve_index=False)
+
+    async def get_range(self, table_name, start_time, end_time, fetch_ranges):
+        """
+        Returns the rows of a table with start_time <= timestamp <= end_time.
+
+        Args:
+            table_name (str): The table (used in the cache keys).
+            start_time (str or datetime): Inclusive start; naive values are taken as IST.
+            end_time (str or datetime): Inclusive end.
+            fetch_ranges (callable): Coroutine function taking a list of (start, end) naive IST ranges
+                                     (end exclusive) and returning the rows of all of them in one query,
+                                     as records or a DataFrame with the OHLC columns.
+
+        Returns:
+            pd.DataFrame: Rows with a naive IST 'timestamp' column and float64 OHLCV columns.
+        """
+        start, end = to_ist_wall(start_time), to_ist_wall(end_time)
+        if end < start:
+            return pd.DataFrame(columns=OHLC_COLUMNS)
+        days = list(pd.date_range(start.normalize(), end.normalize(), freq='D'))
+        keys = [self.day_key(table_name, day) for day in days]
+        blocks = {}
+
+        # 1. Local LRU
+        for key in keys:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                blocks[key] = self._memory[key]
+        self.memory_hits += len(blocks)
+
+        # 2. Redis
+        missing = [key for key in keys if key not in blocks]
+        if missing:
+            for key, table in zip(missing, await self.frame_cache.get_many(missing, as_arrow=True)):
+                if table is not None:
+                    blocks[key] = table.replace_schema_metadata(None)
+                    self._remember(key, blocks[key])
+                    self.redis_hits += 1
+
+        # 3. Database: all missing days in one query
+        missing_days = [day for day, key in zip(days, keys) if key not in blocks]
+        if missing_days:
+            blocks.update(await self._fetch_days(table_name, missing_days, fetch_ranges))
+
+        table = pa.concat_tables([blocks[key] for key in keys])
+        timestamps = table.column('timestamp').to_numpy()
+        lo = np.searchsorted(timestamps, start.to_datetime64(), 'left')
+        hi = np.searchsorted(timestamps, end.to_datetime64(), 'right')
+        return table.slice(lo, hi - lo).to_pandas()
+
+    async def _fetch_days(self, table_name, days, fetch_ranges):
+        """Fetches the given days in one query, caches them and returns their blocks by key."""
+        ranges = coalesce_days(days)
+        self.queries += 1
+        self.fetched_days += len(days)
+        logger.info(f"Fetching {len(days)} uncached days of {table_name} in {len(ranges)} ranges")
+        table = self._to_table(await fetch_ranges(ranges))
+
+        # Rows are sorted, so every day is a contiguous slice.
+        timestamps = table.column('timestamp').to_numpy()
+        day_starts = pd.DatetimeIndex(days).to_numpy()
+        los = np.searchsorted(timestamps, day_starts, 'left')
+        his = np.searchsorted(timestamps, day_starts + np.timedelta64(1, 'D'), 'left')
+        today = pd.Timestamp.now(tz=IST).tz_localize(None).normalize()
+
+        blocks, finished, open_days = {}, {}, {}
+        for day, lo, hi in zip(days, los, his):
+            key = self.day_key(table_name, day)
+            blocks[key] = table.slice(lo, hi - lo)
+            if day < today:
+                finished[key] = blocks[key]
+                self._remember(key, blocks[key])
+            elif day == today:
+                open_days[key] = blocks[key]
+
+        await self.frame_cache.set_many(finished)
+        await self.frame_cache.set_many(open_days, expire=self.open_day_ttl)
+        return blocks
+
+    def stats(self):
+        """Day-level hit/miss counters, plus the underlying Redis cache statistics."""
+        served = self.memory_hits + self.redis_hits + self.fetched_days
+        return {
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "fetched_days": self.fetched_days,
+            "queries": self.queries,
+            "day_hit_rate": (self.memory_hits + self.redis_hits) / served if served else 0.0,
+            "redis": self.frame_cache.stats(),
+        }
@@ -2,12 +2,16 @@ import os
 import psycopg2
 from dotenv import load_dotenv
 from utils.env_loader import load_env
+from database.pool_manager import get_pool_manager
 
 
 class TimescaleDBHandler:
     def __init__(self):
         """
         Initialize TimescaleDB connection using credentials from the .env file.
+
+        The connection is borrowed from the process-wide pool (`database.pool_manager`) and
+        returned by `close()`, so opening a handler costs no connection setup after the first.
         """
         load_dotenv(load_env())
 
@@ -20,23 +24,25 @@ class TimescaleDBHandler:
         if not all([self.host, self.port, self.user, self.password, self.database]):
             raise ValueError("❌ TimescaleDB credentials are missing. Check your .env file.")
 
+        self.pool = None
         self.conn = None
         self.cursor = None
         self.connect()
 
     def connect(self):
-        """Establish a connection to TimescaleDB."""
+        """Borrow a TimescaleDB connection from the shared pool."""
         try:
-            self.conn = psycopg2.connect(
+            self.pool = get_pool_manager().sync_pool(
+                "timescaledb",
                 host=self.host,
                 port=int(self.port),
                 user=self.user,
                 password=self.password,
                 database=self.database
             )
+            self.conn = self.pool.getconn()
             self.cursor = self.conn.cursor()
-            print("✅ Connected to TimescaleDB successfully!")
-        except psycopg2.Error as e:
+        except (psycopg2.Error, TimeoutError) as e:
             print(f"❌ Connection error: {e}")
             self.conn = None
 
@@ -66,11 +72,11 @@ class TimescaleDBHandler:
             self.conn.rollback()
 
     def close(self):
-        """Close the database connection."""
+        """Return the connection to the pool (an open transaction is rolled back)."""
         if self.conn:
             self.cursor.close()
-            self.conn.close()
-            print("🔌 TimescaleDB connection closed.")
+            self.pool.putconn(self.conn)
+            self.conn = None
 
     def __enter__(self):
         """Enable context manager support."""
@@ -0,0 +1,205 @@
+"""
+Ingestion Watermark Catalog
+
+Finding where every OHLC table ends used to take one `ORDER BY timestamp DESC LIMIT 1` (or
+`MAX(timestamp)`) query per table. The `ingestion_metadata` table
+(`migrations/003_ingestion_metadata.sql`) instead keeps, per table, the first and last timestamp,
+the row count and the last validated timestamp. `BulkWriter` updates it in the same transaction
+as every load (see `watermark_upsert`), so all watermarks come back with one query:
+
+    from database.watermark_catalog import get_watermarks
+    watermarks = get_watermarks(conn, schema='fno', suffix='_1m')
+    watermarks['fno.nifty50_1m']['last_timestamp']
+
+Tables loaded before the catalog existed are registered once with `seed_watermarks`.
+"""
+
+import os
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+CATALOG_TABLE = "public.ingestion_metadata"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+CATALOG_MIGRATIONS = ["003_ingestion_metadata.sql", "004_ingestion_dirty_range.sql"]
+WATERMARK_COLUMNS = ["table_name", "first_timestamp", "last_timestamp", "row_count", "last_validated", "updated_at",
+                     "dirty_from", "dirty_to"]
+
+# Upsert of a loaded batch's range and row count; LEAST/GREATEST ignore NULLs. The dirty range
+# collects what was loaded since the resampled tables were last refreshed.
+_UPSERT = f"""
+    INSERT INTO {CATALOG_TABLE} AS m
+        (table_name, first_timestamp, last_timestamp, row_count, updated_at, dirty_from, dirty_to{{validated_column}})
+    SELECT {{table}}, lo, hi, n, now(), lo, hi{{validated_value}} FROM {{source}} WHERE n > 0
+    ON CONFLICT (table_name) DO UPDATE SET
+        first_timestamp = LEAST(m.first_timestamp, EXCLUDED.first_timestamp),
+        last_timestamp = GREATEST(m.last_timestamp, EXCLUDED.last_timestamp),
+        row_count = m.row_count + EXCLUDED.row_count,
+        updated_at = now(),
+        dirty_from = LEAST(m.dirty_from, EXCLUDED.dirty_from),
+        dirty_to = GREATEST(m.dirty_to, EXCLUDED.dirty_to){{validated_update}}
+"""
+
+# Advances the last validated timestamp with a validated batch, if everything before it was validated
+_VALIDATED_UPDATE = """,
+        last_validated = CASE WHEN m.last_validated >= m.last_timestamp
+                              THEN GREATEST(m.last_validated, EXCLUDED.last_validated)
+                              ELSE m.last_validated END"""
+
+# Timestamp type of a table's 'timestamp' column
+_TIMESTAMP_TYPE = """
+    SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+    WHERE attrelid = {table}::regclass AND attname = 'timestamp'
+"""
+
+
+def read_migration(name):
+    """The SQL of a file in `database/migrations`."""
+    with open(os.path.join(MIGRATIONS_DIR, name), "r") as f:
+        return f.read()
+
+
+def catalog_ddl():
+    """The catalog's idempotent DDL (CREATE TABLE / ADD COLUMN IF NOT EXISTS)."""
+    return "\n".join(read_migration(name) for name in CATALOG_MIGRATIONS)
+
+
+def timestamp_type_query(placeholder="%s"):
+    """Query for the type of a table's 'timestamp' column, taking the table name as parameter."""
+    return _TIMESTAMP_TYPE.format(table=placeholder)
+
+
+def watermark_expression(timestamp_type):
+    """
+    Converts a table's timestamps to the catalog's timezone-naive form.
+
+    Args:
+        timestamp_type (str): The table's timestamp column type (see `timestamp_type_query`).
+
+    Returns:
+        str: A format string with a `{}` for the column expression.
+    """
+    return "({} AT TIME ZONE 'UTC')" if "with time zone" in (timestamp_type or "") else "{}"
+
+
+def watermark_upsert(source, placeholder="%s", validated=False):
+    """
+    Upsert statement adding a loaded batch to a table's catalog row.
+
+    Args:
+        source (str): A relation (e.g. a CTE name) with columns `lo`, `hi` and `n` (first and last
+                      timestamp and row count of the new rows).
+        placeholder (str, optional): Parameter placeholder of the table name. Defaults to '%s'.
+        validated (bool, optional): The batch was validated while loading. The last validated
+                                    timestamp then follows the new rows, as long as everything
+                                    before them was validated too. Defaults to False.
+    """
+    if validated:
+        return _UPSERT.format(table=placeholder, source=source, validated_column=", last_validated",
+                              validated_value=", hi", validated_update=_VALIDATED_UPDATE)
+    return _UPSERT.format(table=placeholder, source=source, validated_column="", validated_value="",
+                          validated_update="")
+
+
+def _rows_to_watermarks(rows):
+    return {row[0]: dict(zip(WATERMARK_COLUMNS[1:], row[1:])) for row in rows}
+
+
+def _select(schema=None, suffix=None, tables=None, placeholder="%s"):
+    """The catalog SELECT with optional filters, and its parameters."""
+    conditions, params = [], []
+    if tables:
+        conditions.append(f"table_name = ANY({placeholder.format(len(params) + 1)})")
+        params.append(list(tables))
+    if schema:
+        conditions.append(f"table_name LIKE {placeholder.format(len(params) + 1)}")
+        params.append(f"{schema}.%")
+    if suffix:
+        conditions.append(f"lower(table_name) LIKE {placeholder.format(len(params) + 1)}")
+        params.append(f"%{suffix.lower()}")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {', '.join(WATERMARK_COLUMNS)} FROM {CATALOG_TABLE}{where} ORDER BY table_name", params
+
+
+def ensure_catalog(conn):
+    """Creates the catalog table if it does not exist (psycopg2 connection)."""
+    with conn.cursor() as cursor:
+        cursor.execute(catalog_ddl())
+    conn.commit()
+
+
+def get_watermarks(conn, schema=None, suffix=None, tables=None):
+    """
+    Reads the watermarks of all (or the selected) tables with one query.
+
+    Args:
+        conn: An open psycopg2 connection.
+        schema (str, optional): Only tables of this schema.
+        suffix (str, optional): Only tables whose name ends with this (case-insensitive), e.g. '_1m'.
+        tables (list, optional): Only these qualified table names.
+
+    Returns:
+        dict: Table name -> {'first_timestamp', 'last_timestamp', 'row_count', 'last_validated', 'updated_at',
+              'dirty_from', 'dirty_to'}.
+    """
+    ensure_catalog(conn)
+    query, params = _select(schema, suffix, tables)
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    conn.commit()
+    return _rows_to_watermarks(rows)
+
+
+async def get_watermarks_async(conn, schema=None, suffix=None, tables=None):
+    """
+    Like `get_watermarks`, on an asyncpg connection or pool.
+    """
+    await conn.execute(catalog_ddl())
+    query, params = _select(schema, suffix, tables, placeholder="${}")
+    return _rows_to_watermarks(await conn.fetch(query, *params))
+
+
+def seed_watermarks(conn, tables):
+    """
+    Registers tables that are not in the catalog yet from their current contents.
+
+    This scans each table once; afterwards the bulk writer keeps the rows up to date.
+
+    Args:
+        conn: An open psycopg2 connection.
+        tables (list): Qualified table names.
+
+    Returns:
+        dict: The watermarks of the seeded tables.
+    """
+    ensure_catalog(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT table_name FROM {CATALOG_TABLE} WHERE table_name = ANY(%s)", (list(tables),))
+        known = {row[0] for row in cursor.fetchall()}
+        for table in tables:
+            if table in known:
+                continue
+            cursor.execute(timestamp_type_query(), (table,))
+            column = watermark_expression(cursor.fetchone()[0]).format("timestamp")
+            cursor.execute(
+                f"WITH stats AS (SELECT min({column}) AS lo, max({column}) AS hi, count(*) AS n FROM {table}) "
+                + watermark_upsert("stats"),
+                (table,),
+            )
+            logger.info(f"📋 Registered {table} in the ingestion catalog.")
+    conn.commit()
+    return get_watermarks(conn, tables=[table for table in tables if table not in known])
+
+
+def mark_validated(conn, table, timestamp):
+    """
+    Records that a table has been validated up to `timestamp` (psycopg2 connection).
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {CATALOG_TABLE} (table_name, last_validated) VALUES (%s, %s) "
+            f"ON CONFLICT (table_name) DO UPDATE SET last_validated = EXCLUDED.last_validated, updated_at = now()",
+            (table, timestamp),
+        )
+    conn.commit()
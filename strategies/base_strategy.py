@@ -17,6 +17,7 @@ Key Features:
 Usage:
 - Inherit from `BaseStrategy` and implement the `apply_strategy()` method.
 - Use `self.library` to apply indicators dynamically.
+- Call `apply_exit_rules()` to manage trades with stop-loss, take-profit and trailing-stop rules.
 - Call `backtest()` to evaluate strategy performance.
 - Use `plot_results()` to visualize strategy effectiveness.
 """
@@ -24,6 +25,7 @@ Usage:
 import numpy as np
 import matplotlib.pyplot as plt
 from abc import ABC, abstractmethod
+from strategies.exit_rules import apply_exit_rules, risk_settings
 
 class BaseStrategy(ABC):
     """
@@ -34,6 +36,7 @@ class BaseStrategy(ABC):
         strategy_params (dict): Configuration dictionary containing strategy-specific parameters.
         signals (pd.DataFrame): Stores buy/sell signals generated by the strategy.
         library (module): The technical analysis library (`talib` or `pandas_ta`).
+        indicator_cache (IndicatorCache): Optional cache shared between strategy instances on the same data.
     """
     def __init__(self, df, strategy_params, library="talib"):
         """
@@ -48,6 +51,7 @@ class BaseStrategy(ABC):
         self.strategy_params = strategy_params
         self.signals = None
         self.library = self._load_library(library)
+        self.indicator_cache = None
 
     def _load_library(self, library_name):
         """
@@ -72,6 +76,68 @@ class BaseStrategy(ABC):
         else:
             raise ValueError(f"Unsupported library: {library_name}")
 
+    def indicator(self, name, func, column="close", **params):
+        """
+        Computes an indicator on a column of `self.df`, reusing a shared result when possible.
+
+        When `indicator_cache` is set (e.g. during a parameter sweep), the indicator is computed once
+        on the cache's source data and shared by every strategy instance using the same parameters.
+
+        Parameters:
+            name (str): Indicator name, used as the cache key (e.g. 'EMA').
+            func (callable): Function computing the indicator from a NumPy array (e.g. `talib.EMA`).
+            column (str): Column of `self.df` to compute the indicator on.
+            **params: Keyword arguments passed to `func`.
+
+        Returns:
+            np.ndarray or tuple: The indicator output aligned with `self.df`.
+        """
+        if self.indicator_cache is None:
+            return func(self.df[column].to_numpy(dtype=np.float64), **params)
+
+        value = self.indicator_cache.get(name, func, column, **params)
+        source_index = self.indicator_cache.source.index
+        if source_index is self.df.index or source_index.equals(self.df.index):
+            return value
+
+        # The strategy runs on a window of the cached data (e.g. walk-forward): take the matching rows,
+        # as a cheap slice when the window is a contiguous block of the source.
+        positions = None
+        if len(self.df.index) and source_index.is_monotonic_increasing:
+            start = source_index.searchsorted(self.df.index[0])
+            if source_index[start:start + len(self.df.index)].equals(self.df.index):
+                positions = slice(start, start + len(self.df.index))
+        if positions is None:
+            positions = source_index.get_indexer(self.df.index)
+        if isinstance(value, tuple):
+            return tuple(np.asarray(v)[positions] for v in value)
+        return np.asarray(value)[positions]
+
+    def apply_exit_rules(self, signals, prices=None, defaults=None, allow_short=False):
+        """
+        Manages the trades of `signals` with stop-loss, take-profit and trailing-stop exits.
+
+        The percentages come from the strategy parameters (`stop_loss_pct`, `take_profit_pct`,
+        `trailing_sl_pct`) or their `risk_management` block; see `strategies.exit_rules.risk_settings`.
+
+        Parameters:
+            signals (pd.DataFrame): Signals with a 'signal' column of entries (1 = buy, -1 = sell).
+            prices (array-like, optional): Prices to evaluate the rules on. Defaults to `self.df["close"]`.
+            defaults (dict, optional): Fallback percentages keyed like the strategy parameters.
+            allow_short (bool): Whether a sell signal while flat opens a short position.
+
+        Returns:
+            pd.DataFrame: `signals` with the 'signal' column replaced by the managed entries/exits and
+                          'entry_price', 'stop_loss', 'take_profit' and 'trailing_stop' columns added.
+        """
+        if prices is None:
+            prices = self.df["close"].to_numpy(dtype=np.float64)
+        settings = risk_settings(self.strategy_params, defaults)
+        for column, values in apply_exit_rules(prices, signals["signal"].to_numpy(), allow_short=allow_short,
+                                               **settings).items():
+            signals[column] = values
+        return signals
+
     @abstractmethod
     def apply_strategy(self):
         """
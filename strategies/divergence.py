@@ -0,0 +1,78 @@
+"""
+RSI Divergence Detection
+
+Vectorized divergence detectors used by the RSI strategies. Both return an array aligned with the
+input: 1 for bullish divergence, -1 for bearish divergence, 0 otherwise.
+
+Methods:
+- **bar**: compares every bar with the previous one.
+  - Bullish: close falls while RSI rises.
+  - Bearish: close rises while RSI falls.
+- **swing**: compares every bar with the swing extreme of the preceding `lookback` bars.
+  - Bullish: the low breaks below the lowest low of the window while RSI stays above its value at that low.
+  - Bearish: the high breaks above the highest high of the window while RSI stays below its value at that high.
+  Only past bars are used, so the signal is known at the close of the bar it is reported on.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DIVERGENCE_METHODS = ("bar", "swing")
+
+
+def bar_divergence(close, rsi):
+    """
+    Bar-to-bar divergence: price and RSI moving in opposite directions between consecutive bars.
+
+    Args:
+        close (array-like): Close prices.
+        rsi (array-like): RSI values aligned with `close`.
+
+    Returns:
+        np.ndarray: 1 for bullish, -1 for bearish divergence, 0 otherwise (the first two bars are 0).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    divergence = np.zeros(len(close))
+    if len(close) < 3:
+        return divergence
+
+    price_down = close[2:] < close[1:-1]
+    price_up = close[2:] > close[1:-1]
+    rsi_up = rsi[2:] > rsi[1:-1]
+    rsi_down = rsi[2:] < rsi[1:-1]
+    divergence[2:] = np.where(price_down & rsi_up, 1, np.where(price_up & rsi_down, -1, 0))
+    return divergence
+
+
+def swing_divergence(low, high, rsi, lookback=14):
+    """
+    Swing-point divergence: a new low/high against the extreme of the preceding `lookback` bars.
+
+    Args:
+        low (array-like): Low prices (close prices can be passed when no lows are available).
+        high (array-like): High prices.
+        rsi (array-like): RSI values aligned with the prices.
+        lookback (int, optional): Number of preceding bars searched for the previous swing point. Defaults to 14.
+
+    Returns:
+        np.ndarray: 1 for bullish, -1 for bearish divergence, 0 otherwise (the first `lookback` bars are 0).
+    """
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    lookback = int(lookback)
+    divergence = np.zeros(len(low))
+    if lookback < 1 or len(low) <= lookback:
+        return divergence
+
+    # Window k holds the `lookback` bars before bar k + lookback; locate its extremes in absolute positions.
+    offsets = np.arange(len(low) - lookback)
+    swing_low = sliding_window_view(low[:-1], lookback).argmin(axis=1) + offsets
+    swing_high = sliding_window_view(high[:-1], lookback).argmax(axis=1) + offsets
+
+    current = offsets + lookback
+    bullish = (low[current] < low[swing_low]) & (rsi[current] > rsi[swing_low])
+    bearish = (high[current] > high[swing_high]) & (rsi[current] < rsi[swing_high])
+    divergence[lookback:] = np.where(bullish, 1, np.where(bearish, -1, 0))
+    return divergence
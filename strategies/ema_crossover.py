@@ -57,8 +57,8 @@ class EMA_CrossoverStrategy(BaseStrategy):
 
         # Compute EMAs using the selected library
         if self.library == "talib":
-            self.df["EMA_Short"] = talib.EMA(self.df["close"].values, timeperiod=short_period)
-            self.df["EMA_Long"] = talib.EMA(self.df["close"].values, timeperiod=long_period)
+            self.df["EMA_Short"] = self.indicator("EMA", talib.EMA, timeperiod=short_period)
+            self.df["EMA_Long"] = self.indicator("EMA", talib.EMA, timeperiod=long_period)
 
         elif self.library == "pandas_ta":
             self.df["EMA_Short"] = self.df.ta.ema(length=short_period)
@@ -77,9 +77,9 @@ class EMA_RSI_CrossoverStrategy(BaseStrategy):
 
         # Compute indicators using the selected library
         if self.library == "talib":
-            self.df["EMA_Short"] = talib.EMA(self.df["close"].values, timeperiod=short_period)
-            self.df["EMA_Long"] = talib.EMA(self.df["close"].values, timeperiod=long_period)
-            self.df["RSI"] = talib.RSI(self.df["close"].values, timeperiod=rsi_period)
+            self.df["EMA_Short"] = self.indicator("EMA", talib.EMA, timeperiod=short_period)
+            self.df["EMA_Long"] = self.indicator("EMA", talib.EMA, timeperiod=long_period)
+            self.df["RSI"] = self.indicator("RSI", talib.RSI, timeperiod=rsi_period)
 
         elif self.library == "pandas_ta":
             self.df["EMA_Short"] = self.df.ta.ema(length=short_period)
@@ -0,0 +1,144 @@
+"""
+Exit Rules: Stop-Loss, Take-Profit and Trailing Stop
+
+Strategies that manage open trades bar by bar (e.g. `RSI_MACD_CrossoverStrategyV1`,
+`StraddleStrangleStrategy`) share the same exit logic. This module implements it once as a tight
+loop over NumPy arrays, without any per-bar DataFrame access:
+
+- A position is opened on an entry signal while flat (+1 long, -1 short when shorts are allowed).
+- Stop-loss and take-profit levels are fixed at entry as a percentage of the entry price.
+- The trailing stop starts at the same distance from the entry price and ratchets with the best
+  price seen since entry; it never moves against the position.
+- On every following bar the position is closed when the price crosses the stop-loss, the trailing
+  stop or the take-profit level of the previous bar, or when the strategy gives the opposite signal.
+
+The loop is compiled with `numba` when it is installed and runs as plain Python over the arrays
+otherwise.
+
+Usage:
+- `BaseStrategy.apply_exit_rules(...)` for strategies.
+- `risk_settings(strategy_params)` to resolve the percentages from strategy parameters and the
+  `risk_management` config block.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+# Strategy parameter -> key of the shared `risk_management` config block
+RISK_PARAMS = {
+    "stop_loss_pct": "stop_loss",
+    "take_profit_pct": "take_profit",
+    "trailing_sl_pct": "trailing_stop_loss",
+}
+
+
+def _exit_loop(prices, signals, stop_loss_pct, take_profit_pct, trailing_pct, allow_short,
+               out_signal, entry_price, stop_loss, take_profit, trailing_stop):
+    """
+    Walks the bars once, writing the resulting signals and the active levels into the output buffers.
+
+    Disabled rules (percentage <= 0) use infinite levels so they never trigger.
+    """
+    inf = np.inf
+    position = 0
+    entry = stop = target = trail = 0.0
+    for i in range(len(prices)):
+        price = prices[i]
+        signal = signals[i]
+
+        if position == 1:
+            if price >= target or price <= stop or price <= trail or signal == -1:
+                out_signal[i] = -1
+                position = 0
+            elif trailing_pct > 0.0:
+                trail = max(trail, price * (1.0 - trailing_pct))
+        elif position == -1:
+            if price <= target or price >= stop or price >= trail or signal == 1:
+                out_signal[i] = 1
+                position = 0
+            elif trailing_pct > 0.0:
+                trail = min(trail, price * (1.0 + trailing_pct))
+        elif signal == 1 or (signal == -1 and allow_short):
+            position = 1 if signal == 1 else -1
+            out_signal[i] = position
+            entry = price
+            stop = price * (1.0 - position * stop_loss_pct) if stop_loss_pct > 0.0 else -position * inf
+            target = price * (1.0 + position * take_profit_pct) if take_profit_pct > 0.0 else position * inf
+            trail = price * (1.0 - position * trailing_pct) if trailing_pct > 0.0 else -position * inf
+        else:
+            continue
+
+        # Record the levels in force on this bar (including the bar that closed the position).
+        entry_price[i] = entry
+        stop_loss[i] = stop
+        take_profit[i] = target
+        trailing_stop[i] = trail
+
+
+_exit_kernel = njit(cache=True, nogil=True)(_exit_loop) if njit is not None else None
+
+
+def risk_settings(strategy_params, defaults=None):
+    """
+    Resolves the stop-loss, take-profit and trailing-stop percentages for a strategy.
+
+    Strategy parameters (`stop_loss_pct`, `take_profit_pct`, `trailing_sl_pct`) take precedence over
+    the `risk_management` block (`stop_loss`, `take_profit`, `trailing_stop_loss`), which can be given
+    inside the strategy parameters; `defaults` fills whatever is left.
+
+    Args:
+        strategy_params (dict): The strategy parameters.
+        defaults (dict, optional): Fallback values keyed like the strategy parameters.
+
+    Returns:
+        dict: The 'stop_loss_pct', 'take_profit_pct' and 'trailing_sl_pct' values (0 disables a rule).
+    """
+    defaults = defaults or {}
+    risk_management = strategy_params.get("risk_management") or {}
+    settings = {}
+    for param, config_key in RISK_PARAMS.items():
+        value = strategy_params.get(param, risk_management.get(config_key, defaults.get(param)))
+        settings[param] = float(value) if value is not None else 0.0
+    return settings
+
+
+def apply_exit_rules(prices, signals, stop_loss_pct=0.0, take_profit_pct=0.0, trailing_sl_pct=0.0,
+                     allow_short=False):
+    """
+    Turns entry/exit signals into trades managed by stop-loss, take-profit and trailing-stop rules.
+
+    Args:
+        prices (array-like): Prices the rules are evaluated on (e.g. close prices).
+        signals (array-like): Strategy signals: 1 = buy, -1 = sell, 0 = no signal.
+        stop_loss_pct (float, optional): Stop-loss distance from the entry price (0.02 = 2%). 0 disables it.
+        take_profit_pct (float, optional): Take-profit distance from the entry price. 0 disables it.
+        trailing_sl_pct (float, optional): Trailing-stop distance from the best price. 0 disables it.
+        allow_short (bool, optional): Whether a sell signal while flat opens a short. Defaults to False.
+
+    Returns:
+        dict: NumPy arrays aligned with `prices`:
+            - 'signal': 1/-1 on the bars where positions are opened/closed, 0 elsewhere.
+            - 'entry_price', 'stop_loss', 'take_profit', 'trailing_stop': levels of the open position
+              on every bar it is held (NaN while flat).
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    signals = np.ascontiguousarray(signals, dtype=np.int64)
+    n = len(prices)
+    out_signal = np.zeros(n, dtype=np.int64)
+    levels = {key: np.full(n, np.nan) for key in ("entry_price", "stop_loss", "take_profit", "trailing_stop")}
+    args = (float(stop_loss_pct), float(take_profit_pct), float(trailing_sl_pct), bool(allow_short))
+
+    if _exit_kernel is not None:
+        _exit_kernel(prices, signals, *args, out_signal, *levels.values())
+    else:
+        # Plain Python reads and writes lists much faster than NumPy scalars.
+        out = [out_signal.tolist()] + [array.tolist() for array in levels.values()]
+        _exit_loop(prices.tolist(), signals.tolist(), *args, *out)
+        out_signal = np.asarray(out[0], dtype=np.int64)
+        levels = {key: np.asarray(values, dtype=np.float64) for key, values in zip(levels, out[1:])}
+
+    return dict(signal=out_signal, **levels)
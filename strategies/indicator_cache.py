@@ -0,0 +1,75 @@
+"""
+Indicator Cache for Parameter Sweeps
+
+Strategies compute their indicators with calls such as `talib.EMA(close, timeperiod=9)`. When the
+same data is backtested with many parameter combinations, most of those calls repeat: every
+combination with `ema_short=9` recomputes EMA(9). `IndicatorCache` memoizes indicator results per
+(indicator, input column, parameters) for one source DataFrame so each distinct series is computed
+only once.
+
+Usage:
+- Create one cache per source DataFrame: `cache = IndicatorCache(df)`.
+- Attach it to a strategy before `apply_strategy()`: `strategy.indicator_cache = cache`.
+- Strategies request indicators through `BaseStrategy.indicator(...)`, which uses the cache when present.
+"""
+
+import numpy as np
+
+
+class IndicatorCache:
+    """
+    Memoizes indicator outputs computed on the columns of a source DataFrame.
+
+    Attributes:
+        source (pd.DataFrame): The market data the indicators are computed on.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of indicators actually computed.
+    """
+    def __init__(self, source):
+        """
+        Initializes the cache.
+
+        Parameters:
+            source (pd.DataFrame): Market data with OHLC prices.
+        """
+        self.source = source
+        self.hits = 0
+        self.misses = 0
+        self._values = {}
+        self._columns = {}
+
+    def _column(self, column):
+        """Returns a source column as a contiguous float64 array (converted once per column)."""
+        if column not in self._columns:
+            self._columns[column] = np.ascontiguousarray(self.source[column].to_numpy(dtype=np.float64))
+        return self._columns[column]
+
+    def get(self, name, func, column="close", **params):
+        """
+        Returns the indicator output, computing it on the first request only.
+
+        Parameters:
+            name (str): Indicator name, used as part of the cache key (e.g. 'EMA').
+            func (callable): Function computing the indicator from a NumPy array.
+            column (str): Source column passed to `func`.
+            **params: Keyword arguments passed to `func` (e.g. `timeperiod=9`).
+
+        Returns:
+            np.ndarray or tuple: The indicator output aligned with the source rows.
+        """
+        key = (name, column, tuple(sorted(params.items())))
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+
+        self.misses += 1
+        value = func(self._column(column), **params)
+        # Cached arrays are shared between strategy instances, so guard them against in-place edits.
+        for array in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+        self._values[key] = value
+        return value
+
+    def __len__(self):
+        return len(self._values)
@@ -77,8 +77,8 @@ class MACD_CrossoverStrategy(BaseStrategy):
 
         # Compute MACD using the selected library
         if self.library == "talib":
-            self.df["MACD"], self.df["MACD_Signal"], self.df["MACD_Hist"] = talib.MACD(
-                self.df["close"].values,
+            self.df["MACD"], self.df["MACD_Signal"], self.df["MACD_Hist"] = self.indicator(
+                "MACD", talib.MACD,
                 fastperiod=fast_length,
                 slowperiod=slow_length,
                 signalperiod=signal_length
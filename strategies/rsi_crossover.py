@@ -22,6 +22,7 @@ and a trailing stop-loss mechanism.
 4. **RSI Divergence Detection**:
    - **Bullish Divergence**: Price forms a lower low while RSI forms a higher low.
    - **Bearish Divergence**: Price forms a higher high while RSI forms a lower high.
+   - Compared bar-to-bar, or against the swing highs/lows of a lookback window (`divergence_method`).
 
 5. **Trailing Stop-Loss**:
    - Dynamically adjusts stop-loss based on a percentage (user-defined).
@@ -45,6 +46,7 @@ import numpy as np
 import pandas as pd
 import pandas_ta as ta
 from strategies.base_strategy import BaseStrategy
+from strategies.divergence import DIVERGENCE_METHODS, bar_divergence, swing_divergence
 
 class RSI_CrossoverStrategy(BaseStrategy):
     """
@@ -67,6 +69,8 @@ class RSI_CrossoverStrategy(BaseStrategy):
                 - 'rsi_oversold': Oversold threshold (e.g., 30).
                 - 'higher_tf_rsi_period' (optional): Rolling period for higher timeframe RSI.
                 - 'trailing_sl': Percentage-based trailing stop-loss.
+                - 'divergence_method' (optional): 'bar' (default) or 'swing'.
+                - 'divergence_lookback' (optional): Bars searched for swing points (default 14).
             library (str): The technical analysis library to use ('talib' or 'pandas_ta').
         """
         super().__init__(df, strategy_params)
@@ -88,7 +92,7 @@ class RSI_CrossoverStrategy(BaseStrategy):
 
         # Select the correct library (TA-Lib or Pandas_TA)
         if self.library == "talib":
-            self.df["RSI"] = talib.RSI(self.df["close"], timeperiod=self.strategy_params["rsi_period"])
+            self.df["RSI"] = self.indicator("RSI", talib.RSI, timeperiod=self.strategy_params["rsi_period"])
         else:
             self.df["RSI"] = self.df.ta.rsi(self.strategy_params["rsi_period"])
 
@@ -116,27 +120,33 @@ class RSI_CrossoverStrategy(BaseStrategy):
                                         np.where(self.signals["signal"] == -1,
                                                  self.df["close"] * (1 + self.strategy_params["trailing_sl"]), None))  # Sell SL
 
-    def detect_rsi_divergence(self):
+    def detect_rsi_divergence(self, method=None, lookback=None):
         """
         Detects RSI Divergence (Bullish/Bearish).
 
         - Bullish Divergence: Price forms a lower low while RSI forms a higher low.
         - Bearish Divergence: Price forms a higher high while RSI forms a lower high.
 
+        Parameters:
+            method (str, optional): 'bar' compares consecutive bars; 'swing' compares the swing
+                                    lows/highs of the preceding `lookback` bars. Defaults to the
+                                    'divergence_method' parameter, or 'bar'.
+            lookback (int, optional): Swing-point window. Defaults to the 'divergence_lookback'
+                                      parameter, or 14.
+
         Returns:
             np.array: An array indicating divergence signals:
                       1 for bullish divergence, -1 for bearish divergence, 0 otherwise.
         """
-
-        divergence = np.zeros(len(self.df))
-
-        for i in range(2, len(self.df)):
-            # Bullish Divergence (Price Lower Low, RSI Higher Low)
-            if self.df["close"].iloc[i] < self.df["close"].iloc[i - 1] and self.df["RSI"].iloc[i] > self.df["RSI"].iloc[i - 1]:
-                divergence[i] = 1
-
-            # Bearish Divergence (Price Higher High, RSI Lower High)
-            elif self.df["close"].iloc[i] > self.df["close"].iloc[i - 1] and self.df["RSI"].iloc[i] < self.df["RSI"].iloc[i - 1]:
-                divergence[i] = -1
-
-        return divergence
+        method = method or self.strategy_params.get("divergence_method", "bar")
+        lookback = lookback or self.strategy_params.get("divergence_lookback", 14)
+        if method not in DIVERGENCE_METHODS:
+            raise ValueError(f"Unsupported divergence method: {method} (expected one of {DIVERGENCE_METHODS})")
+        close = self.df["close"].to_numpy(dtype=np.float64)
+        rsi = self.df["RSI"].to_numpy(dtype=np.float64)
+
+        if method == "bar":
+            return bar_divergence(close, rsi)
+        low = self.df["low"].to_numpy(dtype=np.float64) if "low" in self.df else close
+        high = self.df["high"].to_numpy(dtype=np.float64) if "high" in self.df else close
+        return swing_divergence(low, high, rsi, lookback)
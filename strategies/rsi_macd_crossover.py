@@ -85,9 +85,9 @@ class RSI_MACD_CrossoverStrategy(BaseStrategy):
 
         # Compute RSI and MACD based on selected library
         if self.library == "talib":
-            self.df["RSI"] = talib.RSI(self.df["close"].values, timeperiod=rsi_period)
-            self.df["MACD"], self.df["MACD_Signal"], self.df["MACD_Hist"] = talib.MACD(
-                self.df["close"].values,
+            self.df["RSI"] = self.indicator("RSI", talib.RSI, timeperiod=rsi_period)
+            self.df["MACD"], self.df["MACD_Signal"], self.df["MACD_Hist"] = self.indicator(
+                "MACD", talib.MACD,
                 fastperiod=fast_length,
                 slowperiod=slow_length,
                 signalperiod=signal_length
@@ -128,15 +128,12 @@ class RSI_MACD_CrossoverStrategyV1(BaseStrategy):
         fast_length = self.strategy_params.get("macd_fast", 12)
         slow_length = self.strategy_params.get("macd_slow", 26)
         signal_length = self.strategy_params.get("macd_signal", 9)
-        stop_loss_pct = self.strategy_params.get("stop_loss_pct", 0.02)  # 2%
-        take_profit_pct = self.strategy_params.get("take_profit_pct", 0.05)  # 5%
-        trailing_sl_pct = self.strategy_params.get("trailing_sl_pct", 0.03)  # 3%
 
         # Compute RSI & MACD
         if self.library == "talib":
-            self.df["RSI"] = talib.RSI(self.df["close"], timeperiod=rsi_period)
-            self.df["MACD"], self.df["MACD_Signal"], _ = talib.MACD(
-                self.df["close"], fastperiod=fast_length, slowperiod=slow_length, signalperiod=signal_length
+            self.df["RSI"] = self.indicator("RSI", talib.RSI, timeperiod=rsi_period)
+            self.df["MACD"], self.df["MACD_Signal"], _ = self.indicator(
+                "MACD", talib.MACD, fastperiod=fast_length, slowperiod=slow_length, signalperiod=signal_length
             )
         elif self.library == "pandas_ta":
             self.df["RSI"] = self.df.ta.rsi(length=rsi_period)
@@ -150,39 +147,9 @@ class RSI_MACD_CrossoverStrategyV1(BaseStrategy):
 
         signals["signal"] = np.where(buy_condition, 1, np.where(sell_condition, -1, 0))
 
-        # Stop-Loss & Take-Profit Implementation
-        signals["entry_price"] = np.nan
-        signals["stop_loss"] = np.nan
-        signals["take_profit"] = np.nan
-        signals["trailing_stop"] = np.nan
-        position = 0
-
-        for i in range(1, len(signals)):
-            if signals["signal"].iloc[i] == 1 and position == 0:  # Buy
-                entry_price = self.df["close"].iloc[i]
-                stop_loss = entry_price * (1 - stop_loss_pct)
-                take_profit = entry_price * (1 + take_profit_pct)
-                trailing_stop = entry_price * (1 - trailing_sl_pct)
-
-                signals.at[signals.index[i], "entry_price"] = entry_price
-                signals.at[signals.index[i], "stop_loss"] = stop_loss
-                signals.at[signals.index[i], "take_profit"] = take_profit
-                signals.at[signals.index[i], "trailing_stop"] = trailing_stop
-
-                position = 1  # Holding
-
-            elif position == 1:  # Manage trade
-                current_price = self.df["close"].iloc[i]
-                if current_price >= signals["take_profit"].iloc[i-1]:  # Take profit hit
-                    signals.at[signals.index[i], "signal"] = -1
-                    position = 0
-                elif current_price <= signals["stop_loss"].iloc[i-1]:  # Stop-loss hit
-                    signals.at[signals.index[i], "signal"] = -1
-                    position = 0
-                elif current_price > signals["trailing_stop"].iloc[i-1]:  # Adjust trailing stop
-                    new_trailing_stop = current_price * (1 - trailing_sl_pct)
-                    signals.at[signals.index[i], "trailing_stop"] = new_trailing_stop
-                else:
-                    signals.at[signals.index[i], "trailing_stop"] = signals["trailing_stop"].iloc[i-1]
-
-        self.signals = signals
\ No newline at end of file
+        # Stop-Loss, Take-Profit & Trailing Stop (from strategy params or the risk_management block)
+        self.signals = self.apply_exit_rules(signals, defaults={
+            "stop_loss_pct": 0.02,  # 2%
+            "take_profit_pct": 0.05,  # 5%
+            "trailing_sl_pct": 0.03,  # 3%
+        })
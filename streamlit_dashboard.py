@@ -3,6 +3,7 @@ import pandas as pd
 import json
 import plotly.graph_objs as go
 import plotly.express as px  # For simplified graph creation
+from utils.timestamp_utils import to_ist_naive
 
 # Load Backtest Results from JSON
 def load_backtest_results(filepath="backtest_results.json"):
@@ -53,7 +54,7 @@ if selected_strategy:
 
                 # Cumulative Profit Graph
                 st.subheader("Cumulative Profit")
-                df["timestamp"] = pd.to_datetime(df["timestamp"])
+                df["timestamp"] = to_ist_naive(df["timestamp"])
                 df = df.sort_values(by="timestamp")
                 df["cumulative_profit"] = df["profit"].cumsum()
                 fig_cumulative_profit = px.line(df, x="timestamp", y="cumulative_profit", title="Cumulative Profit")
@@ -0,0 +1,144 @@
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import binary_copy
+from database.binary_copy import (COPY_SIGNATURE, COPY_TRAILER, OHLC_KINDS, PG_EPOCH_US, CopyBinaryDecoder,
+                                  decode_copy_binary, encode_copy_binary)
+
+
+def ohlc_columns(rows=500):
+    timestamps = np.datetime64("2024-01-02T09:15:00", "us") + np.arange(rows) * np.timedelta64(1, "m")
+    prices = 21000 + np.arange(rows, dtype=np.float64)
+    return {
+        "timestamp": timestamps,
+        "open": prices,
+        "high": prices + 5,
+        "low": prices - 5,
+        "close": prices + 1,
+        "volume": np.full(rows, 100.0),
+    }
+
+
+def raw_row(*fields):
+    """One binary COPY row; a field is (wire format, value), or None for NULL."""
+    row = struct.pack(">h", len(fields))
+    for field in fields:
+        if field is None:
+            row += struct.pack(">i", -1)
+        else:
+            value = struct.pack(field[0], field[1])
+            row += struct.pack(">i", len(value)) + value
+    return row
+
+
+def payload(*rows):
+    return COPY_SIGNATURE + struct.pack(">ii", 0, 0) + b"".join(rows) + COPY_TRAILER
+
+
+def pg_timestamp(value):
+    return (">q", int(np.datetime64(value, "us").astype(np.int64)) - PG_EPOCH_US)
+
+
+def test_encode_decode_round_trip():
+    columns = ohlc_columns()
+    df = decode_copy_binary(encode_copy_binary(columns, OHLC_KINDS), OHLC_KINDS)
+
+    assert list(df.columns) == list(OHLC_KINDS)
+    assert len(df) == 500
+    assert str(df["timestamp"].dt.tz) == "UTC"
+    np.testing.assert_array_equal(df["timestamp"].dt.tz_localize(None).to_numpy(), columns["timestamp"])
+    for name in ("open", "high", "low", "close", "volume"):
+        np.testing.assert_array_equal(df[name].to_numpy(), columns[name])
+
+
+def test_encode_rejects_missing_timestamps():
+    columns = ohlc_columns(3)
+    columns["timestamp"] = columns["timestamp"].copy()
+    columns["timestamp"][1] = np.datetime64("NaT")
+    with pytest.raises(ValueError):
+        encode_copy_binary(columns, OHLC_KINDS)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 48, 4096])
+def test_decode_in_chunks_that_split_rows(monkeypatch, chunk_size):
+    # A small threshold makes the decoder work on partial buffers between chunks
+    monkeypatch.setattr(binary_copy, "DECODE_THRESHOLD", 64)
+    data = encode_copy_binary(ohlc_columns(), OHLC_KINDS)
+    decoder = CopyBinaryDecoder(OHLC_KINDS)
+    for offset in range(0, len(data), chunk_size):
+        decoder.feed_bytes(data[offset:offset + chunk_size])
+
+    pd.testing.assert_frame_equal(decoder.close(), decode_copy_binary(data, OHLC_KINDS))
+
+
+def test_take_returns_rows_incrementally():
+    data = encode_copy_binary(ohlc_columns(10), OHLC_KINDS)
+    decoder = CopyBinaryDecoder(OHLC_KINDS)
+    decoder.feed_bytes(data[:len(data) // 2])
+    first = decoder.take()
+    decoder.feed_bytes(data[len(data) // 2:])
+    rest = decoder.close()
+
+    assert 0 < len(first) < 10
+    assert len(first) + len(rest) == 10
+    assert rest["close"].iloc[-1] == ohlc_columns(10)["close"][-1]
+
+
+def test_null_fields_become_nan_and_nat():
+    kinds = {"timestamp": "timestamp", "close": "float", "volume": "int"}
+    data = payload(
+        raw_row(pg_timestamp("2024-01-02T09:15"), (">d", 1.5), (">q", 10)),
+        raw_row(pg_timestamp("2024-01-02T09:16"), None, (">q", 20)),
+        raw_row(None, (">d", 2.5), None),
+        raw_row(pg_timestamp("2024-01-02T09:18"), (">d", 3.5), (">q", 40)),
+    )
+    df = decode_copy_binary(data, kinds)
+
+    assert len(df) == 4
+    assert df["close"].isna().tolist() == [False, True, False, False]
+    assert df["timestamp"].isna().tolist() == [False, False, True, False]
+    assert df["volume"].isna().tolist() == [False, False, True, False]
+    assert df["close"].iloc[3] == 3.5
+    assert df["timestamp"].iloc[3] == pd.Timestamp("2024-01-02 09:18", tz="UTC")
+
+
+def test_naive_columns_stay_naive():
+    kinds = {"timestamp": "timestamp", "close": "float"}
+    data = payload(raw_row(pg_timestamp("2024-01-02T09:15"), (">d", 1.0)))
+
+    aware = CopyBinaryDecoder(kinds)
+    aware.feed_bytes(data)
+    naive = CopyBinaryDecoder(kinds, naive_columns=["timestamp"])
+    naive.feed_bytes(data)
+
+    assert aware.close()["timestamp"].iloc[0] == pd.Timestamp("2024-01-02 09:15", tz="UTC")
+    naive_timestamp = naive.close()["timestamp"]
+    assert naive_timestamp.dt.tz is None
+    assert naive_timestamp.iloc[0] == pd.Timestamp("2024-01-02 09:15")
+
+
+def test_date_and_narrow_integer_columns():
+    kinds = {"day": "timestamp", "quantity": "int", "price": "float"}
+    data = payload(raw_row((">i", 8767), (">i", 7), (">f", 2.5)))  # 2024-01-02 is day 8767 after 2000-01-01
+    df = decode_copy_binary(data, kinds)
+
+    assert df["day"].iloc[0] == pd.Timestamp("2024-01-02", tz="UTC")
+    assert df["quantity"].iloc[0] == 7
+    assert df["price"].iloc[0] == 2.5
+
+
+def test_truncated_stream_raises():
+    data = encode_copy_binary(ohlc_columns(5), OHLC_KINDS)
+    decoder = CopyBinaryDecoder(OHLC_KINDS)
+    decoder.feed_bytes(data[:-10])
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+def test_field_count_mismatch_raises():
+    data = payload(raw_row((">d", 1.0)))
+    with pytest.raises(ValueError):
+        decode_copy_binary(data, {"close": "float", "volume": "float"})
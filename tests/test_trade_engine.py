@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from backtest_engine.trade_engine import match_round_trips
+
+
+def reference_round_trips(symbols, is_buy, prices, quantities, commissions, allow_short=False):
+    """Trade-by-trade version of the pairing rules documented on `match_round_trips`."""
+    profit = np.zeros(len(prices))
+    open_positions = {}
+    for i, buy in enumerate(is_buy):
+        symbol = None if symbols is None else symbols[i]
+        position = open_positions.get(symbol)
+        if position is None:
+            if buy or allow_short:
+                open_positions[symbol] = (buy, prices[i], quantities[i])
+        elif position[0] != buy:
+            long, entry_price, entry_quantity = position
+            direction = 1.0 if long else -1.0
+            profit[i] = (prices[i] - entry_price) * direction * entry_quantity - commissions[i]
+            del open_positions[symbol]
+    return profit
+
+
+def test_long_round_trip():
+    profit = match_round_trips(None, [True, False], [100.0, 110.0], [2, 2], [0.5, 1.0])
+    np.testing.assert_allclose(profit, [0.0, 19.0])
+
+
+def test_short_round_trip():
+    profit = match_round_trips(None, [False, True], [100.0, 90.0], [1, 1], [0.0, 0.0], allow_short=True)
+    np.testing.assert_allclose(profit, [0.0, 10.0])
+
+
+def test_leading_sell_is_ignored_without_shorts():
+    profit = match_round_trips(None, [False, True, False], [100.0, 90.0, 95.0], [1, 1, 1], [0, 0, 0])
+    np.testing.assert_allclose(profit, [0.0, 0.0, 5.0])
+
+
+def test_trades_in_the_direction_of_the_position_are_ignored():
+    profit = match_round_trips(None, [True, True, True, False], [100.0, 101.0, 102.0, 110.0],
+                               [1, 1, 1, 1], [0, 0, 0, 0])
+    np.testing.assert_allclose(profit, [0.0, 0.0, 0.0, 10.0])
+
+
+def test_partial_round_trip_leaves_the_open_position_unrealised():
+    profit = match_round_trips(None, [True, False, True], [100.0, 105.0, 103.0], [1, 1, 1], [0, 0, 0])
+    np.testing.assert_allclose(profit, [0.0, 5.0, 0.0])
+
+
+def test_symbols_are_paired_separately():
+    profit = match_round_trips(["A", "B", "A", "B"], [True, True, False, False],
+                               [100.0, 50.0, 110.0, 45.0], [1, 1, 1, 1], [0, 0, 0, 0])
+    np.testing.assert_allclose(profit, [0.0, 0.0, 10.0, -5.0])
+
+
+def test_empty_input():
+    assert len(match_round_trips(None, [], [], [], [])) == 0
+
+
+@pytest.mark.parametrize("allow_short", [False, True])
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_trade_by_trade_reference(allow_short, seed):
+    rng = np.random.default_rng(seed)
+    n = 300
+    symbols = rng.choice(["NIFTY50", "SENSEX", "BANKNIFTY"], n)
+    is_buy = rng.random(n) < 0.5
+    prices = rng.uniform(90, 110, n)
+    quantities = rng.integers(1, 5, n).astype(np.float64)
+    commissions = rng.uniform(0, 1, n)
+
+    expected = reference_round_trips(symbols, is_buy, prices, quantities, commissions, allow_short)
+    actual = match_round_trips(symbols, is_buy, prices, quantities, commissions, allow_short)
+    np.testing.assert_allclose(actual, expected)
@@ -2,6 +2,112 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Asia/Kolkata has a fixed UTC offset (no DST), so UTC <-> IST is a plain integer shift
+IST_OFFSET_SECONDS = 19800  # +05:30
+IST_OFFSET = np.timedelta64(IST_OFFSET_SECONDS, 's')
+
+_EPOCH_UNITS = {'s': 1, 'ms': 10 ** 3, 'us': 10 ** 6, 'ns': 10 ** 9}
+
+
+def _epochs_to_int(epochs, scale=1):
+    """
+    Returns epochs multiplied by `scale` as an int64 array (broker candles often arrive as floats).
+
+    Floats are scaled before they are rounded, so fractional seconds survive a conversion to a finer unit.
+    """
+    values = np.asarray(epochs)
+    if values.dtype.kind == 'f':
+        return np.rint(values * scale).astype(np.int64)
+    return values.astype(np.int64, copy=False) * scale
+
+
+def _series_like(values, result):
+    """`result` as a pd.Series, keeping the index and name when `values` is a Series."""
+    if isinstance(values, pd.Series):
+        return pd.Series(result, index=values.index, name=values.name)
+    return pd.Series(result)
+
+
+def epoch_to_utc(epochs, unit='s'):
+    """
+    Converts UNIX epochs to timezone-naive UTC datetimes, without per-element Python objects.
+
+    Args:
+        epochs (int, float, list, pd.Series, np.array): Epochs to convert.
+        unit (str, optional): 's', 'ms', 'us' or 'ns'. Defaults to 's'.
+
+    Returns:
+        np.ndarray: datetime64[ns] values.
+    """
+    return _epochs_to_int(epochs, _EPOCH_UNITS['ns'] // _EPOCH_UNITS[unit]).astype('datetime64[ns]')
+
+
+def epoch_to_ist(epochs, unit='s'):
+    """
+    Converts UNIX epochs to timezone-naive Asia/Kolkata wall-clock datetimes.
+
+    Equivalent to `pd.to_datetime(epochs, unit=unit, utc=True).dt.tz_convert('Asia/Kolkata').dt.tz_localize(None)`,
+    but is a single integer add instead of three timezone passes.
+
+    Args:
+        epochs (int, float, list, pd.Series, np.array): Epochs to convert.
+        unit (str, optional): 's', 'ms', 'us' or 'ns'. Defaults to 's'.
+
+    Returns:
+        np.ndarray: datetime64[ns] values.
+
+    Example:
+        # >>> epoch_to_ist([1672545600])
+        array(['2023-01-01T09:30:00.000000000'], dtype='datetime64[ns]')
+    """
+    shifted = _epochs_to_int(epochs, _EPOCH_UNITS['ns'] // _EPOCH_UNITS[unit]) + IST_OFFSET_SECONDS * _EPOCH_UNITS['ns']
+    return shifted.astype('datetime64[ns]')
+
+
+def ist_to_epoch(timestamps, unit='s'):
+    """
+    Converts timezone-naive Asia/Kolkata datetimes to UNIX epochs.
+
+    Args:
+        timestamps (pd.Series, pd.DatetimeIndex, np.array, list): Naive IST datetimes.
+        unit (str, optional): 's', 'ms', 'us' or 'ns'. Defaults to 's'.
+
+    Returns:
+        np.ndarray: int64 epochs.
+    """
+    values = np.asarray(pd.DatetimeIndex(timestamps).tz_localize(None), dtype='datetime64[ns]')
+    return (values - IST_OFFSET).astype(f'datetime64[{unit}]').astype(np.int64)
+
+
+def to_ist_naive(values):
+    """
+    Converts a column of timestamps to timezone-naive Asia/Kolkata wall-clock time.
+
+    Numeric values are treated as epoch seconds, strings are parsed once and timezone-aware values
+    are converted from their instant. Naive values are taken to be IST wall time already (as the
+    OHLC tables store it) and are kept as they are.
+
+    Args:
+        values (pd.Series, pd.Index, np.array, list): Timestamps to convert.
+
+    Returns:
+        Same container type as `values` (pd.Series keeps its index and name; other inputs give a
+        pd.DatetimeIndex) with naive IST datetimes.
+    """
+    if isinstance(values, pd.Series):
+        return pd.Series(to_ist_naive(values.array), index=values.index, name=values.name)
+
+    if not isinstance(values, (pd.Index, pd.api.extensions.ExtensionArray, np.ndarray)):
+        values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        return pd.DatetimeIndex(epoch_to_ist(values))
+
+    timestamps = pd.DatetimeIndex(values if values.dtype.kind == 'M' or isinstance(values.dtype, pd.DatetimeTZDtype)
+                                  else pd.to_datetime(values))
+    if timestamps.tz is None:
+        return timestamps
+    return pd.DatetimeIndex(timestamps.tz_convert(None).to_numpy() + IST_OFFSET)
+
 
 def timestamp_to_datetime(timestamp: int) -> datetime:
     """
@@ -121,7 +227,7 @@ def seconds_to_milliseconds(seconds):
     Returns:
         pd.Series: Milliseconds as a pandas Series.
     """
-    return (pd.to_datetime(seconds, unit='s').astype(np.int64) // 10 ** 6).astype(np.int64)
+    return _series_like(seconds, _epochs_to_int(seconds, 10 ** 3))
 
 
 def milliseconds_to_datetime(milliseconds, to_format='%Y-%m-%d %H:%M:%S'):
@@ -135,7 +241,7 @@ def milliseconds_to_datetime(milliseconds, to_format='%Y-%m-%d %H:%M:%S'):
     Returns:
         pd.Series: Datetime strings as a pandas Series.
     """
-    return pd.to_datetime(milliseconds, unit='ms').to_series().dt.strftime(to_format)
+    return _series_like(milliseconds, epoch_to_utc(np.atleast_1d(milliseconds), 'ms')).dt.strftime(to_format)
 
 
 def datetime_to_seconds(datetimes):
@@ -148,7 +254,8 @@ def datetime_to_seconds(datetimes):
     Returns:
         pd.Series: Seconds as a pandas Series.
     """
-    return (pd.to_datetime(datetimes).astype(np.int64) // 10 ** 9).astype(np.int64)
+    values = np.asarray(pd.to_datetime(np.atleast_1d(datetimes)), dtype='datetime64[s]')
+    return _series_like(datetimes, values.astype(np.int64))
 
 
 def nanoseconds_to_milliseconds(nanoseconds):
@@ -161,7 +268,7 @@ def nanoseconds_to_milliseconds(nanoseconds):
     Returns:
         pd.Series: Milliseconds as a pandas Series.
     """
-    return (pd.to_datetime(nanoseconds, unit='ns').astype(np.int64) // 10 ** 6).astype(np.int64)
+    return _series_like(nanoseconds, _epochs_to_int(nanoseconds) // 10 ** 6)
 
 
 def microseconds_to_datetime(microseconds, to_format='%Y-%m-%d %H:%M:%S'):
@@ -175,7 +282,7 @@ def microseconds_to_datetime(microseconds, to_format='%Y-%m-%d %H:%M:%S'):
     Returns:
         pd.Series: Datetime strings as a pandas Series.
     """
-    return pd.to_datetime(microseconds, unit='us').to_series().dt.strftime(to_format)
+    return _series_like(microseconds, epoch_to_utc(np.atleast_1d(microseconds), 'us')).dt.strftime(to_format)
 
 
 def string_milliseconds_to_datetime(string_milliseconds, to_format='%Y-%m-%d %H:%M:%S'):
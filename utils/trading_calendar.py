@@ -0,0 +1,133 @@
+"""
+NSE/BSE Trading Session Calendar
+
+Knows which days are trading sessions (weekdays that are not exchange holidays, from
+`config/market_calendar.yaml`) and builds the grid of bars a session should have, as NumPy
+datetime64 arrays in IST wall time (timezone-naive, as the 1-minute tables store it):
+
+    calendar = TradingCalendar.from_config("NSE")
+    calendar.sessions("2024-01-01", "2024-12-31")      # DatetimeIndex of session dates
+    calendar.minute_grid("2024-01-01", "2024-12-31")   # every expected 1-minute bar start
+
+Holidays are only known for the years listed in the config. `sessions()` (and so `minute_grid()`
+and gap detection) raises for ranges reaching outside them, since their holidays would otherwise be
+reported as missing sessions; `in_session()` only logs a warning, as it merely flags bars.
+"""
+
+import os
+import yaml
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger  # Import get_logger
+
+logger = get_logger(__name__)  # Get logger for this module
+
+CALENDAR_CONFIG_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../config/market_calendar.yaml"))
+
+
+class TradingCalendar:
+    """
+    Session dates and intraday bar grid of one exchange.
+    """
+    def __init__(self, holidays=(), session_open="09:15", session_close="15:30"):
+        """
+        Args:
+            holidays (iterable, optional): Dates the exchange is closed on (besides weekends).
+            session_open (str, optional): Session open, IST 'HH:MM'. Defaults to '09:15'.
+            session_close (str, optional): Session close, IST 'HH:MM' (the last bar starts one bar
+                                           earlier). Defaults to '15:30'.
+        """
+        self.holidays = np.array(sorted(pd.to_datetime(list(holidays)).normalize().unique()),
+                                 dtype="datetime64[D]")
+        # Years the holiday list covers; a calendar without holidays is taken as complete
+        self.years = set((self.holidays.astype("datetime64[Y]").astype(int) + 1970).tolist())
+        self._warned_years = set()
+        self.session_open = pd.Timedelta(f"{session_open}:00")
+        self.session_close = pd.Timedelta(f"{session_close}:00")
+
+    @classmethod
+    def from_config(cls, exchange="NSE", path=CALENDAR_CONFIG_PATH):
+        """Builds the calendar of an exchange from `config/market_calendar.yaml`."""
+        with open(path, "r") as file:
+            exchanges = yaml.safe_load(file)["exchanges"]
+        settings = exchanges[exchange]
+        if "same_as" in settings:
+            settings = exchanges[settings["same_as"]]
+        return cls(settings.get("holidays", []), settings.get("session_open", "09:15"),
+                   settings.get("session_close", "15:30"))
+
+    def uncovered_years(self, start_date, end_date):
+        """Years between two dates (inclusive) without a holiday list."""
+        if not self.years:
+            return []
+        return [year for year in range(pd.Timestamp(start_date).year, pd.Timestamp(end_date).year + 1)
+                if year not in self.years]
+
+    def sessions(self, start_date, end_date):
+        """
+        Trading session dates between two dates (inclusive).
+
+        Returns:
+            pd.DatetimeIndex: Session dates (midnight).
+
+        Raises:
+            ValueError: If the range reaches a year without a holiday list.
+        """
+        uncovered = self.uncovered_years(start_date, end_date)
+        if uncovered:
+            raise ValueError(f"No exchange holidays configured for {uncovered} "
+                             f"(config/market_calendar.yaml); add them or narrow the range.")
+        days = np.arange(np.datetime64(pd.Timestamp(start_date).date(), "D"),
+                         np.datetime64(pd.Timestamp(end_date).date(), "D") + 1)
+        return pd.DatetimeIndex(days[np.is_busday(days, holidays=self.holidays)])
+
+    def is_session(self, date):
+        """Whether a date is a trading session."""
+        return bool(np.is_busday(np.datetime64(pd.Timestamp(date).date(), "D"), holidays=self.holidays))
+
+    def in_session(self, timestamps, freq="1min"):
+        """
+        Whether each timestamp is the start of a bar inside a trading session.
+
+        Args:
+            timestamps (array-like): IST wall-time timestamps (timezone-naive).
+            freq (str, optional): Bar width; the last bar starts one bar before the close. Defaults to '1min'.
+
+        Returns:
+            np.ndarray: Boolean mask.
+        """
+        values = np.asarray(timestamps, dtype="datetime64[ns]")
+        days = values.astype("datetime64[D]")
+        if len(values):
+            uncovered = set(self.uncovered_years(days.min(), days.max())) - self._warned_years
+            if uncovered:
+                self._warned_years |= uncovered
+                logger.warning(f"No exchange holidays configured for {sorted(uncovered)}; "
+                               f"their holidays are taken as sessions.")
+        time_of_day = values - days
+        last_bar = (self.session_close - pd.Timedelta(freq)).to_timedelta64()
+        return (np.is_busday(days, holidays=self.holidays)
+                & (time_of_day >= self.session_open.to_timedelta64()) & (time_of_day <= last_bar))
+
+    def bar_offsets(self, freq="1min"):
+        """Offsets of a session's bar starts from midnight."""
+        step = pd.Timedelta(freq)
+        return np.arange(self.session_open.value, self.session_close.value, step.value).astype("timedelta64[ns]")
+
+    def minute_grid(self, start, end, freq="1min"):
+        """
+        Every bar start the sessions between `start` and `end` should have.
+
+        Args:
+            start (str or datetime): First timestamp (IST); the grid starts at or after it.
+            end (str or datetime): Last timestamp (IST); the grid ends at or before it.
+            freq (str, optional): Bar width. Defaults to '1min'.
+
+        Returns:
+            np.ndarray: Sorted datetime64[ns] bar starts (IST wall time).
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        sessions = self.sessions(start.normalize(), end.normalize()).to_numpy()
+        grid = (sessions[:, None] + self.bar_offsets(freq)[None, :]).ravel()
+        return grid[(grid >= start.to_datetime64()) & (grid <= end.to_datetime64())]